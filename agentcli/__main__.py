@@ -4,8 +4,8 @@ AgentCLI 主模块入口
 允许通过 python -m agentcli 运行
 """
 
-from .main import cli
+from .main import main
 
 if __name__ == "__main__":
-    cli()
+    main()
 
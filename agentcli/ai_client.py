@@ -4,19 +4,42 @@ DeepSeek API 客户端
 封装 OpenAI SDK 调用 DeepSeek API。
 """
 
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, Tuple
+import queue
+import threading
 import time
 
+import httpx
 from openai import OpenAI, OpenAIError
-from rich.console import Console
 
-from .config import Config
+from .config import Config, RouteEndpoint
+from .continuation import build_continuation_messages, stitch
+from .hedging import HedgeBudget, HedgeStats
+from .history import HistoryManager
+from .output import console
+from .performance import performance_guidance
+from .rate_limiter import CircuitOpenError, RequestGovernor, get_governor, get_status_code
+from .router import EndpointRouter
+from .utils.tokens import estimate_messages_tokens, estimate_tokens
 
-console = Console()
+# 流式读取过程中可能直接抛出的网络错误（SDK 只在建立请求时把它们包装为 APIConnectionError）
+STREAM_NETWORK_ERRORS = (OpenAIError, httpx.TransportError, OSError)
+
+
+class StreamInterruptedError(OpenAIError):
+    """流式响应在中途断开（partial 为断开前已收到的内容）"""
+    transient = True
+    
+    def __init__(self, message: str, partial: str = ""):
+        super().__init__(message)
+        self.partial = partial
 
 
 class AIClient:
-    """DeepSeek API 客户端"""
+    """DeepSeek API 客户端
+    
+    每次调用按阶段查找路由表，优先使用延迟最低的健康端点，失败时自动切换。
+    """
     
     def __init__(self, config: Config):
         """初始化 AI 客户端
@@ -25,141 +48,545 @@ class AIClient:
             config: 配置对象
         """
         self.config = config
-        self.client = OpenAI(
-            api_key=config.deepseek_api_key,
-            base_url=config.deepseek_base_url
-        )
         self.system_prompt = config.system_prompt
+        self.router = EndpointRouter()
+        self.hedge_budget = HedgeBudget(ratio=config.hedge_budget_ratio)
+        self.hedge_stats = HedgeStats()
+        self.history = HistoryManager(config.history_max_tokens)
+        self.continuations = 0
+        # 本客户端发出的请求统计（调控器按端点在进程内共享，其统计包含其他客户端的请求）
+        self.request_stats: Dict[str, float] = {
+            "requests": 0,
+            "retries": 0,
+            "fatal_errors": 0,
+            "transient_errors": 0,
+            "rejected": 0,
+            "throttled_seconds": 0.0,
+        }
+        self._stats_lock = threading.Lock()
+        # 不支持 assistant 前缀续写的端点（改用追加用户消息的方式续写）
+        self._prefix_unsupported: set = set()
+        self._clients: Dict[Tuple[str, str], OpenAI] = {}
+        self._governors: Dict[str, RequestGovernor] = {}
+        # 每个线程独立的事件监听器（服务模式下把 token 增量推送给对应的任务）
+        self._local = threading.local()
+        
+        # 默认端点
+        default_endpoint = config.get_routes("requirements")[0]
+        self.client = self._get_client(default_endpoint)
+        self._get_governor(default_endpoint)
+    
+    def _get_client(self, endpoint: RouteEndpoint) -> OpenAI:
+        """获取（或创建）端点对应的 OpenAI 客户端，复用连接池"""
+        client_key = (endpoint.base_url, endpoint.api_key)
+        if client_key not in self._clients:
+            self._clients[client_key] = OpenAI(
+                api_key=endpoint.api_key,
+                base_url=endpoint.base_url,
+                max_retries=0  # 重试统一由请求调控器负责，避免 SDK 内部重试叠加
+            )
+        return self._clients[client_key]
+    
+    def set_event_listener(self, listener: Optional[Callable[[str, Dict[str, Any]], None]]):
+        """为当前线程设置事件监听器
+        
+        流式输出的每个 token 增量会以 ("token", {"text": ...}) 的形式通知监听器。
+        
+        Args:
+            listener: 回调函数 (事件类型, 数据)，为 None 时取消监听
+        """
+        self._local.listener = listener
+    
+    def _emit(self, kind: str, data: Dict[str, Any]):
+        """通知当前线程的事件监听器"""
+        listener = getattr(self._local, "listener", None)
+        if listener:
+            listener(kind, data)
     
+    def _get_governor(self, endpoint: RouteEndpoint) -> RequestGovernor:
+        """获取端点对应的进程级共享请求调控器"""
+        if endpoint.base_url not in self._governors:
+            self._governors[endpoint.base_url] = get_governor(
+                endpoint.base_url,
+                requests_per_minute=self.config.rate_limit_rpm,
+                tokens_per_minute=self.config.rate_limit_tpm,
+                failure_threshold=self.config.circuit_failure_threshold,
+                recovery_timeout=self.config.circuit_recovery_seconds,
+                base_delay=self.config.retry_base_delay,
+                max_delay=self.config.retry_max_delay
+            )
+        return self._governors[endpoint.base_url]
+    
+    def _count(self, key: str, amount: float = 1):
+        with self._stats_lock:
+            self.request_stats[key] += amount
+
+    def _before_request(self, governor: RequestGovernor, estimated_tokens: int):
+        """经调控器检查熔断、等待限流，并计入本客户端的统计
+
+        Raises:
+            CircuitOpenError: 熔断器打开时
+        """
+        try:
+            waited = governor.before_request(estimated_tokens)
+        except CircuitOpenError:
+            self._count("rejected")
+            raise
+        self._count("requests")
+        if waited:
+            self._count("throttled_seconds", waited)
+
+    def _record_failure(self, governor: RequestGovernor, error: Exception) -> bool:
+        """向调控器报告失败并计入本客户端的统计
+
+        Returns:
+            该错误是否可重试
+        """
+        transient = governor.record_failure(error)
+        self._count("transient_errors" if transient else "fatal_errors")
+        return transient
+
     def chat(
         self,
         messages: List[Dict[str, str]],
-        temperature: float = 0.7,
-        max_tokens: int = 2000,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
         retry_count: int = 3,
-        stream: bool = False
+        stream: bool = False,
+        phase: str = "requirements"
     ) -> Optional[str]:
         """调用聊天 API
         
+        按阶段路由表依次尝试候选端点；瞬时错误（限流、超时、5xx、流中断）
+        在所有端点都失败后按退避策略重试，致命错误不重试，熔断中的端点被跳过。
+        
         Args:
             messages: 对话历史
-            temperature: 温度参数（0-1）
-            max_tokens: 最大 token 数
+            temperature: 温度参数（默认使用路由表中的配置）
+            max_tokens: 最大 token 数（默认使用路由表中的配置）
             retry_count: 重试次数
             stream: 是否使用流式输出
+            phase: 调用阶段（requirements/planning/code_generation/repair）
             
         Returns:
             AI 响应内容，失败返回 None
         """
-        # 确保第一条消息是系统提示词
+        # 确保第一条消息是系统提示词（只包含该阶段需要的部分）
         full_messages = [
-            {"role": "system", "content": self.system_prompt}
+            {"role": "system", "content": self.config.get_system_prompt(phase)}
         ] + messages
+        endpoints = [
+            endpoint.model_copy(update={
+                "temperature": endpoint.temperature if temperature is None else temperature,
+                "max_tokens": endpoint.max_tokens if max_tokens is None else max_tokens,
+            })
+            for endpoint in self.config.get_routes(phase)
+        ]
+        prompt_tokens = estimate_messages_tokens(full_messages)
         
         for attempt in range(retry_count):
-            try:
-                if stream:
-                    return self._chat_stream(full_messages, temperature, max_tokens)
-                else:
-                    response = self.client.chat.completions.create(
-                        model="deepseek-chat",
-                        messages=full_messages,
-                        temperature=temperature,
-                        max_tokens=max_tokens
-                    )
+            last_error: Optional[OpenAIError] = None
+            last_governor: Optional[RequestGovernor] = None
+            retryable = False
+            
+            for endpoint in self.router.order(endpoints, self._governors):
+                governor = self._get_governor(endpoint)
+                try:
+                    self._before_request(governor, prompt_tokens + endpoint.max_tokens)
+                except CircuitOpenError:
+                    continue
+                
+                started_at = time.monotonic()
+                try:
+                    content, finish_reason = self._request(endpoint, full_messages, stream)
                     
-                    content = response.choices[0].message.content
+                    governor.record_success()
+                    self.router.record_latency(endpoint, time.monotonic() - started_at)
+                    if finish_reason == "length":
+                        # 输出达到 max_tokens 被截断：续写剩余部分（续写失败时返回已收到的内容）
+                        console.print("[yellow]输出达到长度上限，正在续写剩余部分...[/yellow]")
+                        content, _ = self._continue(endpoint, full_messages, content, stream)
                     return content
-            
-            except OpenAIError as e:
-                if attempt < retry_count - 1:
-                    wait_time = 2 ** attempt  # 指数退避
-                    console.print(
-                        f"[yellow]API 调用失败，{wait_time}秒后重试... "
-                        f"({attempt + 1}/{retry_count})[/yellow]"
-                    )
-                    time.sleep(wait_time)
-                else:
-                    console.print(f"[red]API 调用失败: {e}[/red]")
-                    console.print("\n可能的原因：")
-                    console.print("1. API Key 无效或已过期")
-                    console.print("2. 网络连接问题")
-                    console.print("3. API 服务暂时不可用")
-                    console.print("\n请检查配置后重试。")
+                
+                except OpenAIError as e:
+                    retryable = self._record_failure(governor, e) or retryable
+                    last_error = e
+                    last_governor = governor
+                    partial = getattr(e, "partial", "")
+                    if partial and self.config.continuation_mode != "off":
+                        # 流式输出中途断开：从已收到的内容续写，而不是整个重新生成
+                        console.print("[yellow]流式输出中断，从已收到的内容继续...[/yellow]")
+                        content, complete = self._continue(endpoint, full_messages, partial, stream)
+                        if complete:
+                            return content
+                    if len(endpoints) > 1:
+                        console.print(f"[yellow]端点 {endpoint.key} 调用失败: {e}，尝试下一个端点...[/yellow]")
+                
+                except Exception as e:
+                    # 程序错误与端点无关：不计入熔断，但要释放半开探测名额，否则熔断器会一直停在半开状态
+                    governor.release()
+                    console.print(f"[red]未知错误: {e}[/red]")
                     return None
             
-            except Exception as e:
-                console.print(f"[red]未知错误: {e}[/red]")
+            if last_error is None:
+                console.print("[red]API 服务暂不可用，所有端点均已熔断，请稍后重试。[/red]")
+                return None
+            
+            if not retryable:
+                console.print(f"[red]API 调用失败（不可重试）: {last_error}[/red]")
+                console.print("\n请检查 API Key 是否有效、请求参数是否正确。")
+                return None
+            
+            if attempt < retry_count - 1:
+                self._count("retries")
+                wait_time = last_governor.backoff_delay(attempt, last_error)
+                console.print(
+                    f"[yellow]API 调用失败，{wait_time:.1f}秒后重试... "
+                    f"({attempt + 1}/{retry_count})[/yellow]"
+                )
+                time.sleep(wait_time)
+            else:
+                console.print(f"[red]API 调用失败: {last_error}[/red]")
+                console.print("\n可能的原因：")
+                console.print("1. 网络连接问题")
+                console.print("2. API 服务暂时不可用或触发限流")
+                console.print("\n请稍后重试。")
                 return None
         
         return None
     
-    def _chat_stream(
+    def _request(
         self,
-        messages: List[Dict[str, str]],
-        temperature: float = 0.7,
-        max_tokens: int = 2000
-    ) -> Optional[str]:
-        """流式调用聊天 API
+        endpoint: RouteEndpoint,
+        messages: List[Dict[str, Any]],
+        stream: bool
+    ) -> Tuple[str, Optional[str]]:
+        """向端点发送一次请求
+        
+        Returns:
+            (响应内容, finish_reason)
+        """
+        if stream:
+            return self._chat_stream(endpoint, messages)
+        response = self._get_client(endpoint).chat.completions.create(
+            model=endpoint.model,
+            messages=messages,
+            temperature=endpoint.temperature,
+            max_tokens=endpoint.max_tokens
+        )
+        choice = response.choices[0]
+        return choice.message.content or "", getattr(choice, "finish_reason", None)
+    
+    def _continue(
+        self,
+        endpoint: RouteEndpoint,
+        messages: List[Dict[str, Any]],
+        partial: str,
+        stream: bool
+    ) -> Tuple[str, bool]:
+        """以已收到的内容为前缀续写，直到响应正常结束或达到续写次数上限
         
         Args:
-            messages: 完整消息列表
-            temperature: 温度参数
-            max_tokens: 最大 token 数
+            endpoint: 目标端点
+            messages: 原请求的完整消息列表
+            partial: 已收到的内容
+            stream: 是否使用流式输出
             
         Returns:
-            AI 响应内容，失败返回 None
+            (拼接后的内容, 是否完整)
         """
+        mode = self.config.continuation_mode
+        if mode == "off":
+            return partial, False
+        
+        text = partial
+        governor = self._get_governor(endpoint)
+        attempts = 0
+        while attempts < self.config.max_continuations:
+            request_mode = "prompt" if endpoint.base_url in self._prefix_unsupported else mode
+            continuation_messages = build_continuation_messages(messages, text, request_mode)
+            try:
+                self._before_request(governor, estimate_messages_tokens(continuation_messages) + endpoint.max_tokens)
+            except CircuitOpenError:
+                return text, False
+            
+            attempts += 1
+            self.continuations += 1
+            try:
+                piece, finish_reason = self._request(endpoint, continuation_messages, stream)
+                governor.record_success()
+            except OpenAIError as e:
+                if request_mode == "prefix" and get_status_code(e) in (400, 422):
+                    # 端点不支持 assistant 前缀续写，改用追加用户消息的方式（不计入续写次数）。
+                    # 这是请求格式与端点不匹配，不是端点故障，不计入失败统计
+                    governor.release()
+                    self._prefix_unsupported.add(endpoint.base_url)
+                    attempts -= 1
+                    continue
+                self._record_failure(governor, e)
+                piece = getattr(e, "partial", "")
+                finish_reason = "length"  # 续写请求本身中断，继续从新的前缀续写
+            
+            stitched = stitch(text, piece)
+            if stream and stitched != text + piece:
+                # 已推送的内容中包含重复部分，通知监听器改用去重后的完整内容
+                self._emit("token_reset", {"discarded": len(text) + len(piece)})
+                self._emit("token", {"text": stitched})
+            text = stitched
+            if finish_reason != "length":
+                return text, True
+        
+        console.print("[yellow]续写次数已达上限，输出可能不完整[/yellow]")
+        return text, False
+    
+    def _stream_worker(
+        self,
+        stream_id: int,
+        endpoint: RouteEndpoint,
+        messages: List[Dict[str, str]],
+        events: "queue.Queue",
+        streams: Dict[int, object]
+    ):
+        """在后台线程中读取一路流式响应，把事件放入队列
+        
+        事件格式：(stream_id, kind, payload)，kind 为 token/done/error，
+        done 的 payload 为 finish_reason
+        """
+        finish_reason = None
         try:
-            stream = self.client.chat.completions.create(
-                model="deepseek-chat",
+            stream = self._get_client(endpoint).chat.completions.create(
+                model=endpoint.model,
                 messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
+                temperature=endpoint.temperature,
+                max_tokens=endpoint.max_tokens,
                 stream=True
             )
-            
-            full_content = ""
-            # 流式输出内容
+            streams[stream_id] = stream
             for chunk in stream:
-                if chunk.choices[0].delta.content is not None:
-                    content = chunk.choices[0].delta.content
-                    full_content += content
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content is not None:
+                    events.put((stream_id, "token", choice.delta.content))
+                finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+            events.put((stream_id, "done", finish_reason))
+        except Exception as e:
+            events.put((stream_id, "error", e))
+    
+    def _start_stream(self, stream_id: int, *args) -> threading.Thread:
+        """启动一路流式响应读取线程"""
+        thread = threading.Thread(
+            target=self._stream_worker,
+            args=(stream_id,) + args,
+            daemon=True
+        )
+        thread.start()
+        return thread
+    
+    def _stall_timeout(self, started_at: float, last_token_at: Optional[float]) -> Optional[float]:
+        """计算距离判定卡顿还剩多少秒，None 表示不检测"""
+        if last_token_at is None:
+            threshold = self.config.hedge_ttft_seconds
+            since = started_at
+        else:
+            threshold = self.config.hedge_gap_seconds
+            since = last_token_at
+        if threshold <= 0:
+            return None
+        return max(0.0, threshold - (time.monotonic() - since))
+    
+    def _chat_stream(
+        self,
+        endpoint: RouteEndpoint,
+        messages: List[Dict[str, str]]
+    ) -> Tuple[str, Optional[str]]:
+        """流式调用聊天 API
+        
+        首 token 或 token 间隔超过阈值时（在预算允许的情况下）发出对冲请求，
+        取先完成的一路并取消另一路。
+        
+        Args:
+            endpoint: 目标端点
+            messages: 完整消息列表
+            
+        Returns:
+            (AI 响应内容, finish_reason)
+            
+        Raises:
+            StreamInterruptedError: 流式响应中途断开（partial 为已收到的内容，由 chat 续写）
+            OpenAIError: 请求失败（由 chat 统一重试）
+        """
+        events: "queue.Queue" = queue.Queue()
+        streams: Dict[int, object] = {}
+        contents: Dict[int, str] = {0: ""}
+        alive = {0}
+        worker_args = (endpoint, messages, events, streams)
+        
+        started_at = time.monotonic()
+        last_token_at: Optional[float] = None
+        hedge_started_at: Optional[float] = None
+        hedge_checked = False
+        printed = 0
+        
+        self.hedge_budget.record_request()
+        self._start_stream(0, *worker_args)
+        
+        while True:
+            timeout = None
+            if not hedge_checked:
+                timeout = self._stall_timeout(started_at, last_token_at)
+            
+            try:
+                stream_id, kind, payload = events.get(timeout=timeout)
+            except queue.Empty:
+                # 主请求卡顿：尝试发出对冲请求
+                hedge_checked = True
+                if not self.hedge_budget.try_acquire():
+                    self.hedge_stats.record_denied()
+                    continue
+                try:
+                    self._before_request(
+                        self._get_governor(endpoint),
+                        estimate_messages_tokens(messages) + endpoint.max_tokens
+                    )
+                except CircuitOpenError:
+                    continue
+                phase = "首 token" if last_token_at is None else "token 间隔"
+                console.print(
+                    f"\n[yellow]{phase}超时，已发出对冲请求，取先完成的一路...[/yellow]"
+                )
+                hedge_started_at = time.monotonic()
+                contents[1] = ""
+                alive.add(1)
+                self._start_stream(1, *worker_args)
+                continue
+            
+            if kind == "token":
+                contents[stream_id] += payload
+                if stream_id == 0:
+                    last_token_at = time.monotonic()
+                if hedge_started_at is None:
                     # 实时输出内容，使用淡青色，不解析 markdown
-                    console.print(content, end="", style="cyan", markup=False, highlight=False)
+                    console.print(payload, end="", style="cyan", markup=False, highlight=False)
+                    self._emit("token", {"text": payload})
+                    printed = len(contents[0])
+                continue
             
-            console.print()  # 换行
-            return full_content
+            if kind == "error":
+                alive.discard(stream_id)
+                if alive:
+                    continue
+                # 所有请求都已断开：保留收到最多内容的一路，供调用方续写
+                partial = max(contents.values(), key=len)
+                if hedge_started_at is not None and partial != contents[0][:printed]:
+                    self._emit("token_reset", {"discarded": printed})
+                    self._emit("token", {"text": partial})
+                console.print()
+                if not isinstance(payload, STREAM_NETWORK_ERRORS):
+                    # 程序错误不是流中断，原样抛出，不重试也不续写
+                    raise payload
+                if isinstance(payload, OpenAIError) and not partial:
+                    raise payload
+                raise StreamInterruptedError(f"流式输出中断: {payload}", partial=partial) from payload
             
-        except Exception as e:
-            console.print(f"\n[red]流式输出错误: {e}[/red]")
-            return None
+            # kind == "done"：先完成的一路胜出，取消其余各路
+            winner = stream_id
+            finish_reason = payload
+            for other in alive - {winner}:
+                stream = streams.get(other)
+                if stream is not None:
+                    try:
+                        stream.close()
+                    except Exception:
+                        pass
+            break
+        
+        finished_at = time.monotonic()
+        if winner == 0:
+            console.print(contents[0][printed:], end="", style="cyan", markup=False, highlight=False)
+            if contents[0][printed:]:
+                self._emit("token", {"text": contents[0][printed:]})
+        else:
+            console.print("\n[dim]（对冲请求先完成，以下为其完整输出）[/dim]")
+            console.print(contents[winner], end="", style="cyan", markup=False, highlight=False)
+            # 之前推送的是主请求的部分输出，通知监听器改用对冲请求的完整输出
+            self._emit("token_reset", {"discarded": printed})
+            self._emit("token", {"text": contents[winner]})
+        console.print()  # 换行
+        
+        latency = finished_at - started_at
+        unhedged_latency = None
+        if winner != 0:
+            # 主请求被取消，按其卡顿前的输出速率估计还需多久才能完成
+            remaining = max(0, len(contents[winner]) - len(contents[0]))
+            if last_token_at is not None and contents[0] and last_token_at > started_at:
+                rate = len(contents[0]) / (last_token_at - started_at)
+                unhedged_latency = latency + remaining / rate
+            else:
+                unhedged_latency = latency + (finished_at - hedge_started_at)
+        
+        self.hedge_stats.record(
+            latency=latency,
+            unhedged_latency=unhedged_latency,
+            hedged=hedge_started_at is not None,
+            hedge_won=winner != 0
+        )
+        return contents[winner], finish_reason
+    
+    def get_run_stats(self) -> Dict[str, float]:
+        """获取本客户端的请求统计（重试、限流、对冲效果）
+        
+        只统计本客户端发出的请求，不包含同一进程中其他客户端经共享调控器发出的请求。
+        
+        Returns:
+            统计字典
+        """
+        with self._stats_lock:
+            stats: Dict[str, float] = dict(self.request_stats)
+        hedge_summary = self.hedge_stats.summary()
+        # 对冲统计中的 requests 只包含流式请求，不能覆盖总请求数
+        stats["streamed_requests"] = hedge_summary.pop("requests")
+        stats.update(hedge_summary)
+        stats["continuations"] = self.continuations
+        return stats
     
     def chat_with_context(
         self,
         user_message: str,
         conversation_history: List[Dict[str, str]],
-        temperature: float = 0.7,
-        max_tokens: int = 2000,
-        stream: bool = False
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        stream: bool = False,
+        phase: str = "requirements",
+        requirements: Optional[Dict[str, str]] = None
     ) -> Optional[str]:
         """带上下文的聊天
         
+        历史对话会按阶段压缩（见 HistoryManager），保证不超过 token 上限。
+        
         Args:
             user_message: 用户消息
             conversation_history: 历史对话记录
-            temperature: 温度参数
-            max_tokens: 最大 token 数
+            temperature: 温度参数（默认使用路由表中的配置）
+            max_tokens: 最大 token 数（默认使用路由表中的配置）
             stream: 是否使用流式输出
+            phase: 调用阶段
+            requirements: 已收集的需求（用于生成历史摘要）
             
         Returns:
             AI 响应内容
         """
-        messages = conversation_history + [
+        history = self.history.compact(
+            conversation_history,
+            requirements,
+            phase=phase,
+            reserved_tokens=estimate_tokens(user_message) + 4
+        )
+        messages = history + [
             {"role": "user", "content": user_message}
         ]
         
-        return self.chat(messages, temperature, max_tokens, stream=stream)
+        return self.chat(messages, temperature, max_tokens, stream=stream, phase=phase)
     
     def generate_task_list(
         self,
@@ -183,8 +610,7 @@ class AIClient:
 
 需求总结：
 """
-        for key, value in requirements.items():
-            prompt += f"- {key}: {value}\n"
+        prompt += self._requirements_prompt(requirements)
         
         prompt += """
 请按照以下步骤：
@@ -239,38 +665,52 @@ class AIClient:
         return self.chat_with_context(
             prompt,
             conversation_history,
-            temperature=0.3,  # 降低温度以获得更确定的输出
-            max_tokens=3000,
-            stream=stream
+            stream=stream,
+            phase="planning",  # 默认低温度以获得更确定的输出
+            requirements=requirements
         )
     
-    def generate_code_content(
+    def _requirements_prompt(self, requirements: Dict[str, str]) -> str:
+        """构建需求列表提示（有性能画像时附带对应的性能要求）
+        
+        Args:
+            requirements: 需求信息字典
+            
+        Returns:
+            提示文本
+        """
+        prompt = ""
+        for key, value in requirements.items():
+            prompt += f"- {key}: {value}\n"
+        guidance = performance_guidance(requirements)
+        if guidance:
+            prompt += "\n性能要求：\n"
+            for item in guidance:
+                prompt += f"- {item}\n"
+        return prompt
+    
+    def _code_context_prompt(
         self,
         file_path: str,
         task_description: str,
         code_description: str,
         requirements: Dict[str, str],
-        conversation_history: List[Dict[str, str]],
         created_files: Dict[str, str],
-        project_structure: List[str],
-        stream: bool = True
-    ) -> Optional[str]:
-        """生成代码文件内容
+        project_structure: List[str]
+    ) -> str:
+        """构建代码生成的上下文提示（文件信息、需求、已创建文件、项目结构）
         
         Args:
             file_path: 文件路径
             task_description: 任务描述
             code_description: 代码生成说明
             requirements: 需求信息字典
-            conversation_history: 对话历史
             created_files: 已创建的文件内容（路径 -> 内容）
             project_structure: 项目结构（已创建的文件和目录列表）
-            stream: 是否使用流式输出（默认 True）
             
         Returns:
-            生成的代码内容，失败返回 None
+            提示文本
         """
-        # 构建代码生成提示
         prompt = f"""
 现在需要为项目生成代码文件内容。
 
@@ -281,8 +721,7 @@ class AIClient:
 
 **项目需求：**
 """
-        for key, value in requirements.items():
-            prompt += f"- {key}: {value}\n"
+        prompt += self._requirements_prompt(requirements)
         
         prompt += "\n**已创建的文件内容（供参考）：**\n"
         if created_files:
@@ -318,6 +757,38 @@ class AIClient:
         prompt += "\n**项目结构：**\n"
         for item in project_structure:
             prompt += f"- {item}\n"
+        return prompt
+    
+    def generate_code_content(
+        self,
+        file_path: str,
+        task_description: str,
+        code_description: str,
+        requirements: Dict[str, str],
+        conversation_history: List[Dict[str, str]],
+        created_files: Dict[str, str],
+        project_structure: List[str],
+        stream: bool = True
+    ) -> Optional[str]:
+        """生成代码文件内容
+        
+        Args:
+            file_path: 文件路径
+            task_description: 任务描述
+            code_description: 代码生成说明
+            requirements: 需求信息字典
+            conversation_history: 对话历史
+            created_files: 已创建的文件内容（路径 -> 内容）
+            project_structure: 项目结构（已创建的文件和目录列表）
+            stream: 是否使用流式输出（默认 True）
+            
+        Returns:
+            生成的代码内容，失败返回 None
+        """
+        # 构建代码生成提示
+        prompt = self._code_context_prompt(
+            file_path, task_description, code_description, requirements, created_files, project_structure
+        )
         
         prompt += """
 **代码生成要求：**
@@ -365,9 +836,9 @@ class AIClient:
         response = self.chat_with_context(
             prompt,
             conversation_history,
-            temperature=0.5,  # 适中的温度，平衡创造性和准确性
-            max_tokens=4000,  # 代码可能较长，增加 token 限制
-            stream=stream
+            stream=stream,
+            phase="code_generation",  # 默认适中温度、较大 token 限制
+            requirements=requirements
         )
         
         if response:
@@ -379,6 +850,237 @@ class AIClient:
             console.print(f"[red]生成代码失败: {file_path}[/red]")
             return None
     
+    def generate_code_skeleton(
+        self,
+        file_path: str,
+        task_description: str,
+        code_description: str,
+        requirements: Dict[str, str],
+        created_files: Dict[str, str],
+        project_structure: List[str],
+        stream: bool = True
+    ) -> Optional[str]:
+        """生成大文件的代码骨架（导入、类和函数签名、文档字符串，函数体为 ...）
+        
+        Args:
+            file_path: 文件路径
+            task_description: 任务描述
+            code_description: 代码生成说明
+            requirements: 需求信息字典
+            created_files: 已创建的文件内容（路径 -> 内容）
+            project_structure: 项目结构（已创建的文件和目录列表）
+            stream: 是否使用流式输出（默认 True）
+            
+        Returns:
+            骨架代码，失败返回 None
+        """
+        prompt = self._code_context_prompt(
+            file_path, task_description, code_description, requirements, created_files, project_structure
+        )
+        prompt += """
+**骨架生成要求：**
+
+这是一个较大的文件，先只生成代码骨架，函数体稍后单独生成：
+
+1. 直接输出纯 Python 代码，不要包含 markdown 代码块标记
+2. 包含完整的导入语句、模块级常量和类定义（含类属性）
+3. 每个函数和方法写出完整签名（含类型注解）和说明其职责、参数、返回值的文档字符串
+4. 需要实现的函数体只写一行 `...`，不要写 `pass` 或 TODO
+5. 不超过 3 行的简单函数可以直接实现
+6. 确保所有导入都来自已创建的文件或标准库/第三方库
+"""
+        
+        console.print(f"\n[bold cyan]正在生成代码骨架: {file_path}[/bold cyan]")
+        response = self.chat(
+            [{"role": "user", "content": prompt}],
+            stream=stream,
+            phase="code_generation"
+        )
+        if response:
+            console.print()
+            return self._clean_generated_code(response)
+        return None
+    
+    def generate_function_body(
+        self,
+        file_path: str,
+        skeleton: str,
+        qualname: str,
+        requirements: Dict[str, str]
+    ) -> Optional[str]:
+        """为骨架中的一个函数生成实现（可在多个线程中并行调用）
+        
+        Args:
+            file_path: 文件路径
+            skeleton: 完整的代码骨架
+            qualname: 函数的限定名（如 Game.update）
+            requirements: 需求信息字典
+            
+        Returns:
+            完整的函数定义代码，失败返回 None
+        """
+        prompt = f"""
+以下是文件 {file_path} 的代码骨架，函数体为 `...` 的函数需要实现。
+
+**项目需求：**
+"""
+        prompt += self._requirements_prompt(requirements)
+        
+        prompt += f"""
+**代码骨架：**
+```python
+{skeleton}
+```
+
+请实现函数 `{qualname}`：
+- 只输出这一个函数的完整定义（包括装饰器和 def 行），签名与骨架保持一致
+- 只能使用骨架中已导入的模块和已定义的名称
+- 直接输出纯 Python 代码，不要包含 markdown 代码块标记和其他说明
+"""
+        
+        # 多个函数并行生成，不使用流式输出以免终端输出交错
+        response = self.chat(
+            [{"role": "user", "content": prompt}],
+            stream=False,
+            phase="code_generation"
+        )
+        return self._clean_generated_code(response) if response else None
+    
+    def generate_code_edit(
+        self,
+        file_path: str,
+        current_content: str,
+        change_request: str,
+        requirements: Dict[str, str],
+        stream: bool = True
+    ) -> Optional[str]:
+        """生成对现有文件的修改（搜索/替换块），只输出改动部分
+        
+        Args:
+            file_path: 文件路径
+            current_content: 文件当前内容
+            change_request: 修改要求
+            requirements: 需求信息字典
+            stream: 是否使用流式输出（默认 True）
+            
+        Returns:
+            包含搜索/替换块的响应，失败返回 None
+        """
+        prompt = f"""
+现在需要修改项目中已存在的文件。
+
+**文件信息：**
+- 文件路径: {file_path}
+- 修改要求: {change_request}
+
+**项目需求：**
+"""
+        prompt += self._requirements_prompt(requirements)
+        
+        prompt += f"\n**文件当前内容：**\n```\n{current_content}\n```\n"
+        prompt += """
+**输出要求：**
+
+1. 只输出需要修改的部分，不要输出整个文件
+2. 每处修改使用一个搜索/替换块：
+
+<<<<<<< SEARCH
+（从当前文件中逐字复制的原代码，包含足够的上下文行使其在文件中唯一）
+=======
+（替换后的代码）
+>>>>>>> REPLACE
+
+3. SEARCH 部分必须与当前文件内容完全一致（包括缩进）
+4. 新增代码时，把插入位置附近的几行作为 SEARCH，在 REPLACE 中保留这些行并加入新代码
+5. 多处修改按在文件中出现的顺序输出多个块，块之外不要输出其他内容
+"""
+        
+        console.print(f"\n[bold cyan]正在生成修改: {file_path}[/bold cyan]")
+        response = self.chat(
+            [{"role": "user", "content": prompt}],
+            stream=stream,
+            phase="repair"  # 低温度，输出只包含改动
+        )
+        if response:
+            console.print()
+        return response
+
+    def generate_file_rewrite(
+        self,
+        file_path: str,
+        current_content: str,
+        change_request: str,
+        requirements: Dict[str, str],
+        created_files: Dict[str, str],
+        project_structure: List[str],
+        stream: bool = True
+    ) -> Optional[str]:
+        """整文件重写现有文件（补丁无法应用时的回退）
+
+        已创建文件在上下文中会被截断，因此目标文件的完整当前内容单独放入提示，不限文件类型。
+
+        Args:
+            file_path: 文件路径
+            current_content: 文件当前内容
+            change_request: 修改要求
+            requirements: 需求信息字典
+            created_files: 已创建的文件内容（路径 -> 内容），其中的目标文件会被排除
+            project_structure: 项目结构（已创建的文件和目录列表）
+            stream: 是否使用流式输出（默认 True）
+
+        Returns:
+            修改后的完整文件内容，失败返回 None
+        """
+        context_files = {path: content for path, content in created_files.items() if path != file_path}
+        prompt = self._code_context_prompt(
+            file_path,
+            f"修改现有文件：{change_request}",
+            f"在文件当前内容的基础上完成修改：{change_request}",
+            requirements,
+            context_files,
+            project_structure
+        )
+        # 文件本身包含 ``` 时（如 README）用更长的围栏，避免内容被提前截断
+        fence = "````" if "```" in current_content else "```"
+        prompt += f"\n**文件当前内容（完整）：**\n{fence}\n{current_content}\n{fence}\n"
+        prompt += """
+**输出要求：**
+
+1. 输出修改后的完整文件内容，从第一行开始，不要包含 markdown 代码块标记和说明文字
+2. 只改动修改要求涉及的部分，其余内容（包括注释、空行和顺序）逐字保留，不要省略或概括
+3. 如果是 Python 文件，确保所有导入都来自已创建的文件或标准库/第三方库
+"""
+
+        console.print(f"\n[bold cyan]正在重新生成文件: {file_path}[/bold cyan]")
+        response = self.chat(
+            [{"role": "user", "content": prompt}],
+            stream=stream,
+            phase="code_generation"
+        )
+        if not response:
+            console.print(f"[red]重新生成文件失败: {file_path}[/red]")
+            return None
+        console.print()
+        if file_path.endswith(".py"):
+            return self._clean_generated_code(response)
+        return self._strip_outer_fence(response)
+
+    def _strip_outer_fence(self, text: str) -> str:
+        """只移除包裹整个响应的代码块标记（保留 README 等文件中原有的代码块）
+
+        Args:
+            text: 原始响应
+
+        Returns:
+            文件内容
+        """
+        import re
+
+        lines = text.strip("\n").split("\n")
+        if len(lines) >= 2 and lines[0].startswith("```") and re.fullmatch(r"`{3,}\s*", lines[-1]):
+            lines = lines[1:-1]
+        return "\n".join(lines) + "\n"
+
     def _clean_generated_code(self, code: str) -> str:
         """清理生成的代码，移除 markdown 代码块标记等
         
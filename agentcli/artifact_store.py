@@ -0,0 +1,288 @@
+"""
+项目产物缓存模块
+
+内容寻址的项目产物仓库：文件按（SHA-256, 权限）去重存为 blob，每个需求指纹对应
+一份清单（manifest）。相同需求和模板版本的项目已经成功生成过时，直接从仓库
+物化到输出目录——优先使用 reflink（写时复制），其次按配置使用硬链接，否则复制。
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from . import __version__
+from .output import console
+from .utils.template_loader import resolve_template_type
+
+
+# Linux FICLONE ioctl（btrfs、XFS 等支持写时复制的文件系统）
+FICLONE = 0x40049409
+
+# 物化方式
+LINK_MODES = ("auto", "hardlink", "copy")
+
+_template_versions: Dict[Path, str] = {}
+
+
+def hash_file(path: Path) -> str:
+    """计算文件内容的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def template_version(templates_dir: Path, template_type: Optional[str]) -> str:
+    """计算模板版本（模板目录下所有文件内容的摘要，进程内缓存）
+
+    Args:
+        templates_dir: 模板根目录
+        template_type: 模板类型
+
+    Returns:
+        版本摘要，模板不存在时为空字符串
+    """
+    if not template_type:
+        return ""
+    template_dir = templates_dir / template_type
+    if template_dir in _template_versions:
+        return _template_versions[template_dir]
+    if not template_dir.is_dir():
+        return ""
+
+    digest = hashlib.sha256()
+    for path in sorted(p for p in template_dir.rglob("*") if p.is_file()):
+        digest.update(str(path.relative_to(template_dir)).encode("utf-8"))
+        digest.update(hash_file(path).encode("ascii"))
+    _template_versions[template_dir] = digest.hexdigest()
+    return _template_versions[template_dir]
+
+
+def requirements_fingerprint(requirements: Dict[str, str], templates_dir: Path) -> str:
+    """计算需求指纹（需求内容 + 模板版本 + AgentCLI 版本）
+
+    Args:
+        requirements: 需求字典
+        templates_dir: 模板根目录
+
+    Returns:
+        指纹（十六进制字符串）
+    """
+    normalized = {str(k): str(v).strip() for k, v in requirements.items()}
+    payload = json.dumps(
+        {
+            "requirements": normalized,
+            "template": template_version(templates_dir, resolve_template_type(requirements)),
+            "agentcli": __version__,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _reflink(src: Path, dst: Path):
+    """使用 FICLONE 创建写时复制副本
+
+    Raises:
+        OSError: 平台或文件系统不支持时
+    """
+    try:
+        import fcntl
+    except ImportError as e:
+        raise OSError("当前平台不支持 reflink") from e
+
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        try:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        except OSError:
+            dst_file.close()
+            os.remove(dst)
+            raise
+
+
+class ArtifactStore:
+    """内容寻址的项目产物仓库"""
+
+    def __init__(self, root: Path, link_mode: str = "auto"):
+        """初始化产物仓库
+
+        Args:
+            root: 仓库根目录
+            link_mode: 物化方式
+                - auto: reflink，不支持时复制
+                - hardlink: reflink，其次硬链接，最后复制
+                  （硬链接与仓库共享 inode，原地修改会影响缓存，适合只读场景如 CI）
+                - copy: 始终复制
+        """
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"无效的物化方式: {link_mode}（可选: {', '.join(LINK_MODES)}）")
+        self.root = Path(root)
+        self.blobs_dir = self.root / "blobs"
+        self.manifests_dir = self.root / "manifests"
+        self.link_mode = link_mode
+        # 已知不支持 reflink 的设备，避免重复尝试
+        self._no_reflink_devices: set = set()
+
+    def _blob_path(self, digest: str, mode: int) -> Path:
+        # 权限是 blob 键的一部分：blob 的权限与目标文件一致，硬链接后无需（也不能）再 chmod
+        return self.blobs_dir / digest[:2] / f"{digest}.{mode:03o}"
+
+    def _manifest_path(self, fingerprint: str) -> Path:
+        return self.manifests_dir / f"{fingerprint}.json"
+
+    def _store_blob(self, path: Path, mode: int) -> str:
+        """把文件存为指定权限的 blob（已存在则跳过）
+
+        Args:
+            path: 文件路径
+            mode: 文件权限
+
+        Returns:
+            内容摘要
+        """
+        digest = hash_file(path)
+        blob_path = self._blob_path(digest, mode)
+        if not blob_path.exists():
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=blob_path.parent, suffix=".tmp")
+            os.close(fd)
+            shutil.copyfile(path, tmp_path)
+            # mkstemp 创建的文件权限为 0600
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, blob_path)
+        return digest
+
+    def lookup(self, fingerprint: str) -> Optional[Dict]:
+        """查找需求指纹对应的清单
+
+        Args:
+            fingerprint: 需求指纹
+
+        Returns:
+            清单字典，不存在或损坏时返回 None
+        """
+        try:
+            with open(self._manifest_path(fingerprint), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def ingest(self, fingerprint: str, output_dir: Path, project_name: str) -> Dict:
+        """把已验证的项目存入仓库
+
+        Args:
+            fingerprint: 需求指纹
+            output_dir: 输出目录
+            project_name: 项目名称（output_dir 下的项目目录名）
+
+        Returns:
+            清单字典
+        """
+        project_dir = output_dir / project_name
+        files: List[Dict] = []
+        dirs: List[str] = []
+
+        for path in sorted(project_dir.rglob("*")):
+            rel_path = path.relative_to(output_dir).as_posix()
+            if "__pycache__" in path.parts:
+                continue
+            if path.is_dir():
+                dirs.append(rel_path)
+            elif path.is_file():
+                mode = path.stat().st_mode & 0o777
+                files.append({
+                    "path": rel_path,
+                    "hash": self._store_blob(path, mode),
+                    "mode": mode,
+                })
+
+        manifest = {
+            "fingerprint": fingerprint,
+            "project_name": project_name,
+            "dirs": dirs,
+            "files": files,
+            "created_at": time.time(),
+        }
+
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+        manifest_path = self._manifest_path(fingerprint)
+        fd, tmp_path = tempfile.mkstemp(dir=self.manifests_dir, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, manifest_path)
+        return manifest
+
+    def _verify(self, manifest: Dict) -> bool:
+        """校验清单引用的 blob 都存在且内容未被修改"""
+        for entry in manifest["files"]:
+            blob_path = self._blob_path(entry["hash"], entry["mode"])
+            if not blob_path.is_file() or hash_file(blob_path) != entry["hash"]:
+                return False
+        return True
+
+    def _link_or_copy(self, blob_path: Path, target: Path) -> str:
+        """按物化方式把 blob 放到目标位置
+
+        Args:
+            blob_path: blob 路径
+            target: 目标路径
+
+        Returns:
+            实际使用的方式（reflink/hardlink/copy）
+        """
+        if self.link_mode != "copy":
+            device = blob_path.stat().st_dev
+            if device not in self._no_reflink_devices:
+                try:
+                    _reflink(blob_path, target)
+                    return "reflink"
+                except OSError:
+                    self._no_reflink_devices.add(device)
+
+        if self.link_mode == "hardlink":
+            try:
+                os.link(blob_path, target)
+                return "hardlink"
+            except OSError:
+                pass
+
+        shutil.copyfile(blob_path, target)
+        return "copy"
+
+    def materialize(self, manifest: Dict, output_dir: Path) -> Optional[Dict[str, int]]:
+        """把清单中的项目物化到输出目录
+
+        Args:
+            manifest: 清单字典
+            output_dir: 输出目录
+
+        Returns:
+            各物化方式使用的文件数，blob 缺失或损坏时返回 None
+        """
+        if not self._verify(manifest):
+            console.print("[yellow]缓存的项目产物已损坏，忽略该缓存[/yellow]")
+            return None
+
+        counts = {"reflink": 0, "hardlink": 0, "copy": 0}
+        for rel_dir in manifest["dirs"]:
+            (output_dir / rel_dir).mkdir(parents=True, exist_ok=True)
+
+        for entry in manifest["files"]:
+            target = output_dir / entry["path"]
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if target.exists() or target.is_symlink():
+                target.unlink()
+
+            method = self._link_or_copy(self._blob_path(entry["hash"], entry["mode"]), target)
+            counts[method] += 1
+            if method != "hardlink":
+                os.chmod(target, entry["mode"])
+
+        return counts
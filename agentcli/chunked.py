@@ -0,0 +1,250 @@
+"""
+分块代码生成模块
+
+单次请求的输出受 max_tokens 限制，大文件会被截断，而且只能串行地流式输出。
+分块生成先让模型输出代码骨架（导入、类和函数签名、文档字符串，函数体为 `...`），
+用 ast 验证并定位待实现的函数，再并行请求各个函数的实现，按 AST 位置拼接回骨架。
+"""
+
+import ast
+import textwrap
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union, TYPE_CHECKING
+
+from .output import console
+
+if TYPE_CHECKING:
+    from .ai_client import AIClient
+
+FunctionNode = Union[ast.FunctionDef, ast.AsyncFunctionDef]
+
+# 分块生成方式：auto（任务标记 chunked 时）/always/off
+CHUNKED_MODES = ("auto", "always", "off")
+
+# 这些装饰器下的 `...` 函数体是有意为之，不需要填充
+INTENTIONAL_STUB_DECORATORS = {"overload", "abstractmethod"}
+
+
+@dataclass
+class Stub:
+    """骨架中待实现的函数"""
+    qualname: str
+    start: int  # `...` 语句所在行（从 0 开始）
+    end: int  # `...` 语句结束行的下一行
+    indent: str  # 函数体的缩进
+    prefix: str  # `...` 与 def 在同一行时，def 部分的内容
+    has_docstring: bool
+
+
+def _is_ellipsis(stmt: ast.stmt) -> bool:
+    return (
+        isinstance(stmt, ast.Expr)
+        and isinstance(stmt.value, ast.Constant)
+        and stmt.value.value is Ellipsis
+    )
+
+
+def _has_docstring(node: FunctionNode) -> bool:
+    first = node.body[0]
+    return isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str)
+
+
+def _decorator_names(node: FunctionNode) -> List[str]:
+    names = []
+    for decorator in node.decorator_list:
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(target, ast.Attribute):
+            names.append(target.attr)
+        elif isinstance(target, ast.Name):
+            names.append(target.id)
+    return names
+
+
+def find_stubs(skeleton: str) -> List[Stub]:
+    """找出骨架中函数体为 `...` 的函数
+
+    Args:
+        skeleton: 骨架代码
+
+    Returns:
+        待实现的函数列表（按出现顺序）
+
+    Raises:
+        SyntaxError: 骨架不是合法的 Python 代码
+    """
+    tree = ast.parse(skeleton)
+    lines = skeleton.splitlines()
+    stubs: List[Stub] = []
+
+    def visit(body: List[ast.stmt], scope: str):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                bases = {getattr(base, "id", getattr(base, "attr", None)) for base in node.bases}
+                if "Protocol" not in bases:
+                    visit(node.body, f"{scope}{node.name}.")
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                has_docstring = _has_docstring(node)
+                rest = node.body[1:] if has_docstring else node.body
+                if len(rest) != 1 or not _is_ellipsis(rest[0]):
+                    continue
+                if INTENTIONAL_STUB_DECORATORS & set(_decorator_names(node)):
+                    continue
+                stmt = rest[0]
+                line = lines[stmt.lineno - 1]
+                prefix = line[:stmt.col_offset]
+                if prefix.strip():
+                    # def f(): ... 写在同一行
+                    indent = " " * (node.col_offset + 4)
+                    prefix = prefix.rstrip()
+                else:
+                    indent, prefix = prefix, ""
+                stubs.append(Stub(
+                    qualname=f"{scope}{node.name}",
+                    start=stmt.lineno - 1,
+                    end=stmt.end_lineno,
+                    indent=indent,
+                    prefix=prefix,
+                    has_docstring=has_docstring
+                ))
+
+    visit(tree.body, "")
+    return stubs
+
+
+def extract_body(code: str, name: str, drop_docstring: bool = True) -> List[str]:
+    """从模型返回的函数定义中取出函数体（已去掉缩进）
+
+    Args:
+        code: 模型返回的代码（完整的函数定义）
+        name: 函数名（不含类名）
+        drop_docstring: 是否去掉函数体中的文档字符串（骨架中已有时）
+
+    Returns:
+        函数体的代码行
+
+    Raises:
+        SyntaxError: 代码不是合法的 Python 代码
+        ValueError: 代码中没有找到该函数
+    """
+    code = textwrap.dedent(code)
+    tree = ast.parse(code)
+    functions = [
+        node for node in ast.walk(tree)
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))
+    ]
+    node = next((f for f in functions if f.name == name), functions[0] if functions else None)
+    if node is None:
+        raise ValueError(f"响应中没有函数定义: {name}")
+
+    body = node.body[1:] if drop_docstring and _has_docstring(node) and len(node.body) > 1 else node.body
+    first = body[0]
+    lines = code.splitlines()
+    if first.lineno == node.lineno:
+        segment = [lines[first.lineno - 1][first.col_offset:]] + lines[first.lineno:node.end_lineno]
+    else:
+        segment = lines[first.lineno - 1:node.end_lineno]
+    return textwrap.dedent("\n".join(segment)).splitlines()
+
+
+def splice(skeleton: str, stubs: List[Stub], bodies: List[List[str]]) -> str:
+    """把函数体按位置拼接回骨架
+
+    Args:
+        skeleton: 骨架代码
+        stubs: 待实现的函数列表
+        bodies: 与 stubs 一一对应的函数体（已去掉缩进）
+
+    Returns:
+        完整代码
+    """
+    lines = skeleton.splitlines()
+    # 从后往前替换，前面函数的行号不受影响
+    for stub, body in sorted(zip(stubs, bodies), key=lambda pair: pair[0].start, reverse=True):
+        new_lines = [stub.indent + line if line.strip() else "" for line in body]
+        if stub.prefix:
+            new_lines.insert(0, stub.prefix)
+        lines[stub.start:stub.end] = new_lines
+    return "\n".join(lines) + "\n"
+
+
+class ChunkedGenerator:
+    """先生成骨架、再并行填充函数体的代码生成器"""
+
+    def __init__(self, ai_client: "AIClient", max_workers: int = 4, fill_attempts: int = 2):
+        """初始化分块生成器
+
+        Args:
+            ai_client: AI 客户端
+            max_workers: 同时生成的函数数
+            fill_attempts: 单个函数的最大尝试次数
+        """
+        self.ai_client = ai_client
+        self.max_workers = max_workers
+        self.fill_attempts = fill_attempts
+
+    def _fill(self, file_path: str, skeleton: str, stub: Stub, requirements: Dict[str, str]) -> Optional[List[str]]:
+        """生成一个函数的函数体，响应无法解析时重试"""
+        name = stub.qualname.rsplit(".", 1)[-1]
+        for _ in range(self.fill_attempts):
+            response = self.ai_client.generate_function_body(file_path, skeleton, stub.qualname, requirements)
+            if not response:
+                continue
+            try:
+                return extract_body(response, name, drop_docstring=stub.has_docstring)
+            except (SyntaxError, ValueError):
+                continue
+        return None
+
+    def generate(
+        self,
+        file_path: str,
+        task_description: str,
+        code_description: str,
+        requirements: Dict[str, str],
+        created_files: Dict[str, str],
+        project_structure: List[str]
+    ) -> Optional[str]:
+        """分块生成代码文件
+
+        Args:
+            file_path: 文件路径
+            task_description: 任务描述
+            code_description: 代码生成说明
+            requirements: 需求信息字典
+            created_files: 已创建的文件内容（路径 -> 内容）
+            project_structure: 项目结构（已创建的文件和目录列表）
+
+        Returns:
+            完整代码，骨架或任一函数生成失败时返回 None（调用方应回退到整文件生成）
+        """
+        skeleton = self.ai_client.generate_code_skeleton(
+            file_path, task_description, code_description, requirements, created_files, project_structure
+        )
+        if not skeleton:
+            return None
+        try:
+            stubs = find_stubs(skeleton)
+        except SyntaxError as e:
+            console.print(f"[yellow]代码骨架语法错误: {e.msg} at line {e.lineno}[/yellow]")
+            return None
+        if not stubs:
+            return skeleton
+
+        console.print(f"[cyan]并行生成 {len(stubs)} 个函数: {file_path}[/cyan]")
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(stubs))) as pool:
+            futures = [pool.submit(self._fill, file_path, skeleton, stub, requirements) for stub in stubs]
+            bodies = [future.result() for future in futures]
+
+        missing = [stub.qualname for stub, body in zip(stubs, bodies) if body is None]
+        if missing:
+            console.print(f"[yellow]以下函数生成失败: {', '.join(missing)}[/yellow]")
+            return None
+
+        code = splice(skeleton, stubs, bodies)
+        try:
+            ast.parse(code)
+        except SyntaxError as e:
+            console.print(f"[yellow]拼接后的代码语法错误: {e.msg} at line {e.lineno}[/yellow]")
+            return None
+        return code
@@ -5,14 +5,65 @@
 """
 
 import os
+import re
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional
 
+import yaml
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field, validator
-from rich.console import Console
 
-console = Console()
+from .artifact_store import LINK_MODES
+from .chunked import CHUNKED_MODES
+from .continuation import CONTINUATION_MODES
+from .output import console
+
+
+def choice_or_default(name: str, value: str, choices: tuple, default: str) -> str:
+    """校验枚举类配置，无效时警告并使用默认值
+    
+    Args:
+        name: 配置名（用于提示）
+        value: 配置值
+        choices: 可选值
+        default: 默认值
+        
+    Returns:
+        有效的配置值
+    """
+    if value in choices:
+        return value
+    console.print(
+        f"[yellow]警告: {name} 的取值 {value!r} 无效（可选: {', '.join(choices)}），使用默认值 {default}[/yellow]"
+    )
+    return default
+
+
+# 调用阶段及其默认生成参数
+PHASE_DEFAULTS: Dict[str, Dict] = {
+    "requirements": {"max_tokens": 2000, "temperature": 0.7},
+    "planning": {"max_tokens": 3000, "temperature": 0.3},
+    "code_generation": {"max_tokens": 4000, "temperature": 0.5},
+    "repair": {"max_tokens": 4000, "temperature": 0.3},
+}
+
+# 系统提示词中的阶段标记，例如 <!-- phases: planning, code_generation -->
+PROMPT_SECTION_TAG = re.compile(r"^<!--\s*phases:\s*(.*?)\s*-->\s*$", re.MULTILINE)
+
+
+class RouteEndpoint(BaseModel):
+    """路由表中的一个端点（OpenAI 兼容接口）"""
+    
+    base_url: str = Field(..., description="API Base URL")
+    api_key: str = Field(..., description="API Key")
+    model: str = Field(default="deepseek-chat", description="模型名称")
+    max_tokens: int = Field(default=2000, gt=0, description="最大 token 数")
+    temperature: float = Field(default=0.7, ge=0, le=2, description="温度参数")
+    
+    @property
+    def key(self) -> str:
+        """端点唯一标识"""
+        return f"{self.model}@{self.base_url}"
 
 
 class Config(BaseModel):
@@ -24,8 +75,48 @@ class Config(BaseModel):
         description="DeepSeek API Base URL"
     )
     system_prompt: str = Field(..., description="系统提示词内容")
+    phase_prompts: Dict[str, str] = Field(default_factory=dict, description="各阶段的精简系统提示词")
     project_root: Path = Field(..., description="项目根目录")
     
+    # 请求调控（同一进程内所有调用方共享）
+    rate_limit_rpm: int = Field(default=0, ge=0, description="每分钟请求数上限（0 表示不限制）")
+    rate_limit_tpm: int = Field(default=0, ge=0, description="每分钟 token 数上限（0 表示不限制）")
+    circuit_failure_threshold: int = Field(default=5, ge=1, description="熔断阈值（连续失败次数）")
+    circuit_recovery_seconds: float = Field(default=30.0, gt=0, description="熔断恢复时间（秒）")
+    retry_base_delay: float = Field(default=1.0, ge=0, description="重试退避基础等待时间（秒）")
+    retry_max_delay: float = Field(default=30.0, ge=0, description="重试退避最大等待时间（秒）")
+    
+    # 流式响应卡顿检测与对冲请求
+    hedge_ttft_seconds: float = Field(default=20.0, ge=0, description="首 token 超时阈值（秒，0 表示不检测）")
+    hedge_gap_seconds: float = Field(default=15.0, ge=0, description="token 间隔超时阈值（秒，0 表示不检测）")
+    hedge_budget_ratio: float = Field(default=0.1, ge=0, le=1, description="对冲请求占总请求的比例上限")
+    
+    # 本地缓存
+    cache_dir: Path = Field(
+        default_factory=lambda: Path.home() / ".cache" / "agentcli",
+        description="本地缓存目录"
+    )
+    plan_cache_enabled: bool = Field(default=True, description="是否复用相似需求的任务清单")
+    plan_cache_threshold: float = Field(default=0.6, ge=0, le=1, description="复用任务清单所需的最低相似度")
+    artifact_cache_enabled: bool = Field(default=True, description="是否缓存并复用完整的项目产物")
+    artifact_link_mode: str = Field(default="auto", description="产物物化方式: auto/hardlink/copy")
+    history_max_tokens: int = Field(default=3000, gt=0, description="发送的对话历史 token 上限")
+    chunked_generation: str = Field(
+        default="auto",
+        description="大文件分块生成: auto（任务标记 chunked 时）/always/off"
+    )
+    chunk_workers: int = Field(default=4, gt=0, description="分块生成时同时生成的函数数")
+    continuation_mode: str = Field(
+        default="prompt",
+        description="截断或中断时的续写方式: prompt/prefix（assistant 前缀续写，需要端点支持）/off"
+    )
+    max_continuations: int = Field(default=3, ge=0, description="单次调用最多续写次数")
+    service_workers: int = Field(default=4, gt=0, description="HTTP 服务同时执行的任务数")
+    service_queue_size: int = Field(default=64, gt=0, description="HTTP 服务排队任务数上限")
+    
+    # 按阶段路由：阶段 -> 按优先级排列的端点列表（未配置的阶段使用默认端点）
+    routes: Dict[str, List[RouteEndpoint]] = Field(default_factory=dict, description="阶段路由表")
+    
     class Config:
         arbitrary_types_allowed = True
     
@@ -37,6 +128,140 @@ class Config(BaseModel):
                 "请在 .env 文件中设置有效的 DEEPSEEK_API_KEY"
             )
         return v
+    
+    @validator('artifact_link_mode')
+    def validate_artifact_link_mode(cls, v):
+        """验证产物物化方式"""
+        return choice_or_default("artifact_link_mode", v, LINK_MODES, "auto")
+    
+    @validator('chunked_generation')
+    def validate_chunked_generation(cls, v):
+        """验证分块生成方式"""
+        return choice_or_default("chunked_generation", v, CHUNKED_MODES, "auto")
+    
+    @validator('continuation_mode')
+    def validate_continuation_mode(cls, v):
+        """验证续写方式"""
+        return choice_or_default("continuation_mode", v, CONTINUATION_MODES, "prompt")
+    
+    def get_system_prompt(self, phase: str) -> str:
+        """获取某个阶段的系统提示词（没有阶段提示词时使用完整提示词）
+        
+        Args:
+            phase: 调用阶段
+            
+        Returns:
+            系统提示词
+        """
+        return self.phase_prompts.get(phase) or self.system_prompt
+    
+    def get_routes(self, phase: str) -> List[RouteEndpoint]:
+        """获取某个阶段的候选端点列表
+        
+        Args:
+            phase: 调用阶段（requirements/planning/code_generation/repair）
+            
+        Returns:
+            端点列表（按配置的优先级排列）
+        """
+        if self.routes.get(phase):
+            return self.routes[phase]
+        
+        defaults = PHASE_DEFAULTS.get(phase, PHASE_DEFAULTS["requirements"])
+        return [RouteEndpoint(
+            base_url=self.deepseek_base_url,
+            api_key=self.deepseek_api_key,
+            **defaults
+        )]
+
+
+def load_routes(routes_file: Path, api_key: str, base_url: str) -> Dict[str, List[RouteEndpoint]]:
+    """从 YAML 文件加载阶段路由表
+    
+    文件格式示例::
+    
+        planning:
+          - model: deepseek-reasoner
+        code_generation:
+          - base_url: http://localhost:8001/v1
+            api_key_env: LOCAL_LLM_API_KEY
+            model: qwen2.5-coder
+          - model: deepseek-chat
+    
+    未指定的字段使用 DeepSeek 默认配置和该阶段的默认生成参数。
+    
+    Args:
+        routes_file: 路由表文件路径
+        api_key: 默认 API Key
+        base_url: 默认 API Base URL
+        
+    Returns:
+        阶段路由表
+        
+    Raises:
+        ValueError: 文件格式错误或包含未知阶段
+    """
+    with open(routes_file, "r", encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    
+    if not isinstance(data, dict):
+        raise ValueError(f"路由表格式错误: {routes_file}")
+    
+    routes: Dict[str, List[RouteEndpoint]] = {}
+    for phase, entries in data.items():
+        if phase not in PHASE_DEFAULTS:
+            raise ValueError(
+                f"未知的路由阶段: {phase}（可选: {', '.join(PHASE_DEFAULTS)}）"
+            )
+        
+        endpoints = []
+        for entry in entries or []:
+            entry = dict(entry)
+            key_env = entry.pop("api_key_env", None)
+            if key_env:
+                entry["api_key"] = os.getenv(key_env, "")
+            params = {**PHASE_DEFAULTS[phase], "base_url": base_url, "api_key": api_key}
+            params.update(entry)
+            endpoints.append(RouteEndpoint(**params))
+        routes[phase] = endpoints
+    
+    return routes
+
+
+def build_phase_prompts(content: str) -> Dict[str, str]:
+    """按阶段标记把系统提示词拆分为各阶段的精简提示词
+    
+    每个 `<!-- phases: ... -->` 标记到下一个标记之间为一节，只出现在标记列出的阶段中；
+    第一个标记之前的内容（标题）所有阶段共用。提示词中没有任何标记时返回空字典。
+    
+    Args:
+        content: 完整的系统提示词
+        
+    Returns:
+        阶段 -> 精简提示词
+        
+    Raises:
+        ValueError: 标记中包含未知阶段
+    """
+    matches = list(PROMPT_SECTION_TAG.finditer(content))
+    if not matches:
+        return {}
+    
+    sections = {phase: [content[:matches[0].start()].strip()] for phase in PHASE_DEFAULTS}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        body = content[match.end():end].strip()
+        for phase in (p.strip() for p in match.group(1).split(",")):
+            if phase not in PHASE_DEFAULTS:
+                raise ValueError(f"系统提示词中包含未知阶段: {phase}")
+            sections[phase].append(body)
+    
+    return {phase: "\n\n".join(part for part in parts if part) for phase, parts in sections.items()}
+
+
+def strip_section_tags(content: str) -> str:
+    """去掉系统提示词中的阶段标记"""
+    return PROMPT_SECTION_TAG.sub("", content)
 
 
 def load_system_prompt(project_root: Path) -> str:
@@ -71,6 +296,18 @@ def load_system_prompt(project_root: Path) -> str:
         raise RuntimeError(f"读取系统提示词文件失败: {e}")
 
 
+def load_env_file() -> bool:
+    """加载项目根目录下的 .env 文件（不校验配置，供守护进程客户端等轻量场景使用）
+    
+    Returns:
+        是否找到并加载了 .env 文件
+    """
+    env_file = Path(__file__).parent.parent / ".env"
+    if not env_file.exists():
+        return False
+    return load_dotenv(env_file)
+
+
 def load_config() -> Config:
     """加载应用配置
     
@@ -101,20 +338,57 @@ def load_config() -> Config:
     api_key = os.getenv("DEEPSEEK_API_KEY", "")
     base_url = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
     
-    # 加载系统提示词
+    # 加载系统提示词，并按阶段拆分为精简提示词
     try:
         system_prompt = load_system_prompt(project_root)
+        phase_prompts = {}
+        if os.getenv("AGENTCLI_PHASE_PROMPTS", "true").lower() not in ("false", "0", "no"):
+            phase_prompts = build_phase_prompts(system_prompt)
+        system_prompt = strip_section_tags(system_prompt)
     except Exception as e:
         console.print(f"[red]错误: {e}[/red]")
         raise
     
+    # 加载阶段路由表（可选）
+    routes_file = Path(os.getenv("AGENTCLI_ROUTES_FILE", str(project_root / "routes.yaml")))
+    routes = {}
+    if routes_file.exists():
+        try:
+            routes = load_routes(routes_file, api_key, base_url)
+        except Exception as e:
+            console.print(f"[red]路由表加载失败: {e}[/red]")
+            raise
+    
     # 创建配置对象
     try:
         config = Config(
             deepseek_api_key=api_key,
             deepseek_base_url=base_url,
             system_prompt=system_prompt,
-            project_root=project_root
+            phase_prompts=phase_prompts,
+            project_root=project_root,
+            rate_limit_rpm=os.getenv("AGENTCLI_RATE_LIMIT_RPM", "0"),
+            rate_limit_tpm=os.getenv("AGENTCLI_RATE_LIMIT_TPM", "0"),
+            circuit_failure_threshold=os.getenv("AGENTCLI_CIRCUIT_FAILURE_THRESHOLD", "5"),
+            circuit_recovery_seconds=os.getenv("AGENTCLI_CIRCUIT_RECOVERY_SECONDS", "30"),
+            retry_base_delay=os.getenv("AGENTCLI_RETRY_BASE_DELAY", "1"),
+            retry_max_delay=os.getenv("AGENTCLI_RETRY_MAX_DELAY", "30"),
+            hedge_ttft_seconds=os.getenv("AGENTCLI_HEDGE_TTFT_SECONDS", "20"),
+            hedge_gap_seconds=os.getenv("AGENTCLI_HEDGE_GAP_SECONDS", "15"),
+            hedge_budget_ratio=os.getenv("AGENTCLI_HEDGE_BUDGET_RATIO", "0.1"),
+            routes=routes,
+            cache_dir=os.path.expanduser(os.getenv("AGENTCLI_CACHE_DIR", "~/.cache/agentcli")),
+            plan_cache_enabled=os.getenv("AGENTCLI_PLAN_CACHE", "true"),
+            plan_cache_threshold=os.getenv("AGENTCLI_PLAN_CACHE_THRESHOLD", "0.6"),
+            artifact_cache_enabled=os.getenv("AGENTCLI_ARTIFACT_CACHE", "true"),
+            artifact_link_mode=os.getenv("AGENTCLI_ARTIFACT_LINK_MODE", "auto"),
+            history_max_tokens=os.getenv("AGENTCLI_HISTORY_MAX_TOKENS", "3000"),
+            chunked_generation=os.getenv("AGENTCLI_CHUNKED_GENERATION", "auto"),
+            chunk_workers=os.getenv("AGENTCLI_CHUNK_WORKERS", "4"),
+            continuation_mode=os.getenv("AGENTCLI_CONTINUATION_MODE", "prompt"),
+            max_continuations=os.getenv("AGENTCLI_MAX_CONTINUATIONS", "3"),
+            service_workers=os.getenv("AGENTCLI_SERVICE_WORKERS", "4"),
+            service_queue_size=os.getenv("AGENTCLI_SERVICE_QUEUE_SIZE", "64")
         )
         return config
     except ValueError as e:
@@ -123,15 +397,17 @@ def load_config() -> Config:
         raise
 
 
-def get_templates_dir(config: Config) -> Path:
+def get_templates_dir(config: Optional[Config] = None) -> Path:
     """获取模板目录路径
     
     Args:
-        config: 配置对象
+        config: 配置对象（离线模式下可以为 None，使用包内模板目录）
         
     Returns:
         模板目录路径
     """
+    if config is None:
+        return Path(__file__).parent / "templates"
     return config.project_root / "agentcli" / "templates"
 
 
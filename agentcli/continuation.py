@@ -0,0 +1,90 @@
+"""
+续写模块
+
+响应因 max_tokens 截断（finish_reason == "length"）或流式连接中途断开时，不重新生成整个响应，
+而是把已收到的内容作为 assistant 前缀请求模型续写，再把续写内容与已收到的内容去重拼接。
+"""
+
+import re
+from typing import Any, Dict, List
+
+# prefix: assistant 前缀续写（DeepSeek 需使用 /beta 端点）
+# prompt: 把已收到的内容作为 assistant 消息，再追加一条要求继续的用户消息
+# off: 不续写
+CONTINUATION_MODES = ("prefix", "prompt", "off")
+
+CONTINUE_PROMPT = (
+    "上一条回复在中途被截断。请从截断处继续输出剩余内容，"
+    "不要重复已经输出的部分，也不要添加任何说明。"
+)
+
+# 判定重复内容所需的最小重叠长度（过短的重叠可能只是巧合）
+MIN_OVERLAP = 8
+
+# 只在已收到内容的末尾这一段中查找重叠
+OVERLAP_WINDOW = 2000
+
+FENCE_LINE = re.compile(r"^```[\w+-]*[ \t]*\n")
+
+
+def build_continuation_messages(
+    messages: List[Dict[str, Any]],
+    partial: str,
+    mode: str = "prefix"
+) -> List[Dict[str, Any]]:
+    """构造续写请求的消息列表
+
+    Args:
+        messages: 原请求的完整消息列表（含系统提示词）
+        partial: 已收到的内容
+        mode: 续写方式（prefix/prompt）
+
+    Returns:
+        续写请求的消息列表
+    """
+    if mode == "prefix":
+        return messages + [{"role": "assistant", "content": partial, "prefix": True}]
+    return messages + [
+        {"role": "assistant", "content": partial},
+        {"role": "user", "content": CONTINUE_PROMPT},
+    ]
+
+
+def stitch(partial: str, continuation: str) -> str:
+    """拼接已收到的内容与续写内容，去掉续写开头重复的部分
+
+    模型续写时常会从被截断的那一行（或前几行）重新开始输出，这里找出已收到内容的末尾
+    与续写内容开头的最长重叠并只保留一份；续写内容若是从头重新输出，则直接使用续写内容。
+
+    Args:
+        partial: 已收到的内容
+        continuation: 续写内容
+
+    Returns:
+        拼接后的内容
+    """
+    if not partial:
+        return continuation
+    if not continuation:
+        return partial
+
+    # 已收到的内容中有未闭合的代码块时，续写开头重复的 ``` 标记是多余的
+    if partial.count("```") % 2 == 1:
+        continuation = FENCE_LINE.sub("", continuation, count=1)
+
+    # 模型从头重新输出
+    if len(continuation) >= len(partial) and continuation.startswith(partial):
+        return continuation
+
+    tail = partial[-OVERLAP_WINDOW:]
+    for size in range(min(len(tail), len(continuation)), MIN_OVERLAP - 1, -1):
+        if tail.endswith(continuation[:size]):
+            return partial + continuation[size:]
+
+    # 续写从被截断的行首重新开始（重叠部分不足 MIN_OVERLAP 但正好是整个残行）
+    line_start = partial.rfind("\n") + 1
+    last_line = partial[line_start:]
+    if last_line.strip() and continuation.startswith(last_line):
+        return partial[:line_start] + continuation
+
+    return partial + continuation
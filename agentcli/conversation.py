@@ -4,32 +4,42 @@
 管理多轮对话流程，收集用户需求。
 """
 
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, TYPE_CHECKING
 from enum import Enum
 
-from rich.console import Console
 from rich.panel import Panel
 from rich.prompt import Prompt
 
-from .ai_client import AIClient
+from .output import console
+from .performance import PERFORMANCE_QUESTIONS, apply_performance_defaults
+from .utils.template_loader import PROJECT_TYPE_LABELS
 
-console = Console()
+if TYPE_CHECKING:
+    from .ai_client import AIClient
+
+
+# FastAPI 项目的可选功能（需求中 features 字段的取值 -> 说明）
+OPTIONAL_FEATURES: Dict[str, str] = {
+    "缓存": "响应缓存（TTL + LRU 缓存、ETag 条件请求，写操作自动失效）",
+    "指标": "Prometheus 指标（请求延迟、并发数、响应大小、连接池，/metrics 端点）",
+}
 
 
 class ProjectType(Enum):
     """项目类型枚举"""
     PYTHON_CLI = "python_cli"
     FASTAPI = "fastapi"
+    ASYNC_WORKER = "async_worker"
 
 
 class ConversationManager:
     """对话管理器"""
     
-    def __init__(self, ai_client: AIClient):
+    def __init__(self, ai_client: Optional["AIClient"] = None):
         """初始化对话管理器
         
         Args:
-            ai_client: AI 客户端
+            ai_client: AI 客户端（离线模式下为 None）
         """
         self.ai_client = ai_client
         self.conversation_history: List[Dict[str, str]] = []
@@ -38,6 +48,8 @@ class ConversationManager:
     def add_message(self, role: str, content: str):
         """添加消息到对话历史
         
+        保存完整历史，发送请求时由 AIClient.chat_with_context 按阶段压缩副本。
+        
         Args:
             role: 角色（user/assistant）
             content: 消息内容
@@ -56,23 +68,27 @@ class ConversationManager:
         console.print(Panel.fit(
             "[bold cyan]请问你想创建什么类型的项目？[/bold cyan]\n\n"
             "[green]A)[/green] Python CLI 工具\n"
-            "[green]B)[/green] Python Web API (FastAPI)",
+            "[green]B)[/green] Python Web API (FastAPI)\n"
+            "[green]C)[/green] Python 异步 Worker（队列消费 / ETL）",
             title="项目类型"
         ))
         
         choice = Prompt.ask(
             "\n请选择",
-            choices=["A", "B", "a", "b"],
+            choices=["A", "B", "C", "a", "b", "c"],
             default="A"
         ).upper()
         
         project_type = None
         if choice == "A":
             project_type = ProjectType.PYTHON_CLI
-            self.requirements["project_type"] = "Python CLI 工具"
+            self.requirements["project_type"] = PROJECT_TYPE_LABELS[project_type.value]
         elif choice == "B":
             project_type = ProjectType.FASTAPI
-            self.requirements["project_type"] = "Python Web API (FastAPI)"
+            self.requirements["project_type"] = PROJECT_TYPE_LABELS[project_type.value]
+        elif choice == "C":
+            project_type = ProjectType.ASYNC_WORKER
+            self.requirements["project_type"] = PROJECT_TYPE_LABELS[project_type.value]
         
         # 记录到对话历史
         self.add_message("user", choice)
@@ -97,6 +113,51 @@ class ConversationManager:
         
         return purpose
     
+    def ask_performance_profile(self) -> Dict[str, str]:
+        """询问性能画像（可跳过）
+        
+        画像用于推导连接池、并行度等默认值，并决定后续问题的默认选项。
+        
+        Returns:
+            性能画像（需求字段 -> 选项），跳过时为空
+        """
+        console.print(Panel.fit(
+            "[bold cyan]需要按性能要求生成吗？[/bold cyan]\n\n"
+            "[green]A)[/green] 跳过（使用通用默认值）\n"
+            "[green]B)[/green] 配置（预期负载、数据量、延迟目标、负载类型）",
+            title="性能画像"
+        ))
+        
+        choice = Prompt.ask(
+            "\n请选择",
+            choices=["A", "B", "a", "b"],
+            default="A"
+        ).upper()
+        self.add_message("user", choice)
+        if choice != "B":
+            return {}
+        
+        profile = {}
+        for key, (question, options) in PERFORMANCE_QUESTIONS.items():
+            letters = [chr(ord("A") + i) for i in range(len(options))]
+            console.print(Panel.fit(
+                "\n".join(
+                    f"[green]{letter})[/green] {value}（{hint}）"
+                    for letter, (value, hint) in zip(letters, options)
+                ),
+                title=question
+            ))
+            answer = Prompt.ask(
+                "\n请选择",
+                choices=letters + [letter.lower() for letter in letters],
+                default="A"
+            ).upper()
+            profile[key] = options[letters.index(answer)][0]
+            self.add_message("user", answer)
+        
+        self.requirements.update(profile)
+        return profile
+    
     def ask_database_support(self) -> str:
         """询问是否需要数据库支持（仅 FastAPI）
         
@@ -157,6 +218,60 @@ class ConversationManager:
         
         return needs_docker
     
+    def ask_server_profile(self) -> str:
+        """询问服务器运行配置（仅 FastAPI）
+        
+        Returns:
+            运行配置（开发/生产）
+        """
+        console.print(Panel.fit(
+            "[bold cyan]服务器按哪种配置生成？[/bold cyan]\n\n"
+            "[green]A)[/green] 开发（单进程 Uvicorn，热重载）\n"
+            "[green]B)[/green] 生产（Gunicorn 多进程 + uvloop/httptools、GZip、多阶段精简镜像）",
+            title="运行配置"
+        ))
+        
+        suggested = apply_performance_defaults(self.requirements).get("server_profile")
+        choice = Prompt.ask(
+            "\n请选择",
+            choices=["A", "B", "a", "b"],
+            default="B" if suggested == "生产" else "A"
+        ).upper()
+        
+        profile = "生产" if choice == "B" else "开发"
+        self.requirements["server_profile"] = profile
+        self.add_message("user", choice)
+        
+        return profile
+    
+    def ask_features(self) -> List[str]:
+        """询问需要的可选功能（仅 FastAPI，可多选）
+        
+        Returns:
+            选中的功能列表
+        """
+        letters = [chr(ord("A") + i) for i in range(len(OPTIONAL_FEATURES))]
+        options = dict(zip(letters, OPTIONAL_FEATURES))
+        console.print(Panel.fit(
+            "[bold cyan]需要哪些可选功能？[/bold cyan]（多个用逗号分隔，直接回车跳过）\n\n"
+            + "\n".join(
+                f"[green]{letter})[/green] {OPTIONAL_FEATURES[name]}" for letter, name in options.items()
+            ),
+            title="可选功能"
+        ))
+        
+        # 默认选中性能画像建议的功能
+        suggested = apply_performance_defaults(self.requirements).get("features", "")
+        default = ",".join(letter for letter, name in options.items() if name in suggested)
+        choice = Prompt.ask("\n请选择", default=default)
+        selected = {c.strip().upper() for c in choice.replace("，", ",").split(",") if c.strip()}
+        features = [name for letter, name in options.items() if letter in selected]
+        
+        self.requirements["features"] = ", ".join(features) if features else "无"
+        self.add_message("user", choice or "无")
+        
+        return features
+    
     def ask_project_name(self) -> str:
         """询问项目名称
         
@@ -190,11 +305,14 @@ class ConversationManager:
         
         # 2. 询问项目用途
         self.ask_project_purpose()
+        self.ask_performance_profile()
         
         # 3. 根据项目类型询问特定需求
         if project_type == ProjectType.FASTAPI:
             self.ask_database_support()
             self.ask_docker_support()
+            self.ask_server_profile()
+            self.ask_features()
         
         # 4. 询问项目名称
         self.ask_project_name()
@@ -223,11 +341,11 @@ class ConversationManager:
 if __name__ == "__main__":
     # 测试对话管理器
     from .config import load_config
-    from .ai_client import AIClient
+    from . import ai_client as ai_client_module
     
     try:
         config = load_config()
-        ai_client = AIClient(config)
+        ai_client = ai_client_module.AIClient(config)
         manager = ConversationManager(ai_client)
         
         console.print("[bold green]欢迎使用 AgentCLI！[/bold green]\n")
@@ -0,0 +1,302 @@
+"""
+守护进程模块
+
+`agentcli serve` 启动一个常驻进程，保持配置、系统提示词、模板注册表和 AI 客户端
+（含 TLS 连接池）预热，通过 Unix socket 接收 JSON Lines 请求。客户端部分只依赖
+标准库，`agentcli` 检测到守护进程在运行时自动把请求转发给它。
+
+协议：每个连接发送一行 JSON 请求，最后收到一行 JSON 响应。
+    {"command": "ping"}
+    {"command": "plan", "requirements": {...}, "offline": false}
+    {"command": "execute", "requirements": {...}, "task_list": {...}, "output_dir": "..."}
+    {"command": "scaffold", "requirements": {...}, "output_dir": "...", "offline": false}
+    {"command": "shutdown"}
+响应为 {"ok": true, ...} 或 {"ok": false, "error": "..."}。
+
+请求带 "stream": true 时，响应之前先逐行转发进度事件（任务进度和 AI 流式输出的 token）：
+    {"event": "token", "data": {"text": "..."}}
+plan 请求带 "interactive": true 时，命中缓存任务清单后由客户端决定是否复用：
+守护进程发送 {"confirm": "reuse_plan", "data": {"score": ..., "purpose": ..., "hit_rate": ...}}，
+客户端回复一行 {"answer": true/false}；不带该字段时直接复用。
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .scaffold import Scaffolder
+
+SOCKET_NAME = "agentcli.sock"
+
+EventCallback = Callable[[str, Dict[str, Any]], None]
+ConfirmCallback = Callable[[str, Dict[str, Any]], bool]
+
+
+class DaemonError(Exception):
+    """守护进程返回的错误"""
+    pass
+
+
+def default_socket_path() -> Path:
+    """默认的守护进程 socket 路径（AGENTCLI_SOCKET，否则位于缓存目录下）"""
+    socket_path = os.getenv("AGENTCLI_SOCKET")
+    if socket_path:
+        return Path(os.path.expanduser(socket_path))
+    cache_dir = os.getenv("AGENTCLI_CACHE_DIR", "~/.cache/agentcli")
+    return Path(os.path.expanduser(cache_dir)) / SOCKET_NAME
+
+
+class DaemonClient:
+    """守护进程客户端（只依赖标准库）"""
+
+    def __init__(self, socket_path: Path, timeout: Optional[float] = None):
+        """初始化客户端
+
+        Args:
+            socket_path: 守护进程 socket 路径
+            timeout: 单次请求超时（秒），为 None 时一直等待
+        """
+        self.socket_path = Path(socket_path)
+        self.timeout = timeout
+
+    @classmethod
+    def connect(cls, socket_path: Optional[Path] = None) -> Optional["DaemonClient"]:
+        """连接正在运行的守护进程
+
+        Args:
+            socket_path: socket 路径（默认使用 default_socket_path()）
+
+        Returns:
+            客户端，守护进程未运行时返回 None
+        """
+        client = cls(socket_path or default_socket_path())
+        if not client.socket_path.exists():
+            return None
+        try:
+            client.request("ping", timeout=1.0)
+        except (OSError, DaemonError, ValueError):
+            return None
+        return client
+
+    def request(
+        self,
+        command: str,
+        timeout: Optional[float] = None,
+        on_event: Optional[EventCallback] = None,
+        on_confirm: Optional[ConfirmCallback] = None,
+        **params
+    ) -> Dict[str, Any]:
+        """发送一个请求并等待响应
+
+        Args:
+            command: 命令名称
+            timeout: 本次请求超时（默认使用客户端超时，作用于每次读取）
+            on_event: 进度事件回调 (事件类型, 数据)，设置后守护进程会转发进度事件
+            on_confirm: 确认回调 (确认名称, 数据) -> 是否同意，设置后由它决定是否复用缓存任务清单
+            **params: 请求参数
+
+        Returns:
+            响应字典
+
+        Raises:
+            DaemonError: 守护进程返回错误
+            OSError: 连接失败
+        """
+        if on_event:
+            params["stream"] = True
+        if on_confirm:
+            params["interactive"] = True
+        payload = json.dumps({"command": command, **params}, ensure_ascii=False) + "\n"
+        response = None
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout if timeout is not None else self.timeout)
+            sock.connect(str(self.socket_path))
+            sock.sendall(payload.encode("utf-8"))
+            with sock.makefile("r", encoding="utf-8") as reader:
+                for line in reader:
+                    message = json.loads(line)
+                    if "confirm" in message:
+                        answer = bool(on_confirm and on_confirm(message["confirm"], message.get("data", {})))
+                        sock.sendall((json.dumps({"answer": answer}) + "\n").encode("utf-8"))
+                    elif "event" in message:
+                        if on_event:
+                            on_event(message["event"], message.get("data", {}))
+                    else:
+                        response = message
+                        break
+
+        if response is None:
+            raise DaemonError("守护进程未返回响应")
+        if not response.get("ok"):
+            raise DaemonError(response.get("error", "未知错误"))
+        return response
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """处理一个客户端连接"""
+
+    def setup(self):
+        super().setup()
+        # 执行器的并行任务可能在其他线程中发出事件
+        self._write_lock = threading.Lock()
+        self._disconnected = False
+
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        try:
+            request = json.loads(line)
+            response = self.server.dispatch(
+                request,
+                emit=self._emit if request.get("stream") else None,
+                confirm=self._confirm if request.get("interactive") else None
+            )
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        self._send(response)
+
+    def _send(self, message: Dict[str, Any]):
+        data = (json.dumps(message, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._write_lock:
+            if self._disconnected:
+                return
+            try:
+                self.wfile.write(data)
+            except OSError:
+                # 客户端中途断开时继续完成生成（与本地运行时关闭终端一致），不再转发
+                self._disconnected = True
+
+    def _emit(self, kind: str, data: Dict[str, Any]):
+        self._send({"event": kind, "data": data})
+
+    def _confirm(self, name: str, data: Dict[str, Any]) -> bool:
+        self._send({"confirm": name, "data": data})
+        if self._disconnected:
+            return False
+        line = self.rfile.readline()
+        if not line:
+            return False
+        return bool(json.loads(line).get("answer"))
+
+
+class ScaffoldDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """项目生成守护进程（每个连接一个线程，共享同一个 Scaffolder）"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path, scaffolder: "Scaffolder"):
+        """初始化守护进程并绑定 socket
+
+        Args:
+            socket_path: socket 路径
+            scaffolder: 预热的项目生成器
+
+        Raises:
+            RuntimeError: 已有守护进程在运行
+        """
+        self.socket_path = Path(socket_path)
+        self.scaffolder = scaffolder
+        self.requests_served = 0
+        self._lock = threading.Lock()
+
+        if self.socket_path.exists():
+            if DaemonClient.connect(self.socket_path):
+                raise RuntimeError(f"已有守护进程在运行: {self.socket_path}")
+            # 上次异常退出遗留的 socket 文件
+            self.socket_path.unlink()
+
+        self.socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        # socket 可以使用守护进程持有的 API Key，只允许当前用户访问：在 umask 下创建，
+        # 绑定之后再 chmod 会留下其他用户可以连接的窗口
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(self.socket_path), DaemonRequestHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        super().server_close()
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+    def dispatch(
+        self,
+        request: Dict[str, Any],
+        emit: Optional[EventCallback] = None,
+        confirm: Optional[ConfirmCallback] = None
+    ) -> Dict[str, Any]:
+        """执行一个请求
+
+        Args:
+            request: 请求字典
+            emit: 向客户端转发进度事件，为 None 时不转发
+            confirm: 向客户端询问确认，为 None 时命中缓存任务清单直接复用
+
+        Returns:
+            响应字典
+        """
+        from . import __version__
+        from .task_generator import TaskList
+
+        command = request.get("command")
+        with self._lock:
+            self.requests_served += 1
+
+        if command == "ping":
+            return {"ok": True, "version": __version__, "pid": os.getpid(), "requests": self.requests_served}
+
+        if command == "shutdown":
+            # shutdown() 会等待 serve_forever 退出，不能在处理线程中同步调用
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {"ok": True}
+
+        requirements = request.get("requirements")
+        if command in ("plan", "execute", "scaffold") and not isinstance(requirements, dict):
+            return {"ok": False, "error": "缺少 requirements"}
+
+        if command == "plan":
+            confirm_reuse = None
+            if confirm:
+                def confirm_reuse(summary: Dict[str, Any]) -> bool:
+                    return confirm("reuse_plan", summary)
+
+            self.scaffolder.ai_client.set_event_listener(emit)
+            try:
+                task_list = self.scaffolder.plan(
+                    requirements,
+                    offline=bool(request.get("offline")),
+                    confirm_reuse=confirm_reuse
+                )
+            finally:
+                self.scaffolder.ai_client.set_event_listener(None)
+            if not task_list:
+                return {"ok": False, "error": "任务清单生成失败"}
+            return {"ok": True, "task_list": task_list.model_dump()}
+
+        if command == "execute":
+            task_list = TaskList(**request["task_list"])
+            self.scaffolder.ai_client.set_event_listener(emit)
+            try:
+                result = self.scaffolder.execute(
+                    requirements, task_list, Path(request["output_dir"]), on_event=emit
+                )
+            finally:
+                self.scaffolder.ai_client.set_event_listener(None)
+            return {"ok": result["success"], **result}
+
+        if command == "scaffold":
+            result = self.scaffolder.run(
+                requirements,
+                Path(request["output_dir"]),
+                offline=bool(request.get("offline")),
+                on_event=emit
+            )
+            return {"ok": result["success"], **result}
+
+        return {"ok": False, "error": f"未知命令: {command}"}
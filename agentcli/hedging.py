@@ -0,0 +1,129 @@
+"""
+尾延迟对冲模块
+
+流式响应首 token 过慢或 token 间隔过长（卡顿）时，发出一个对冲的重复请求，
+取先完成的一路，取消另一路。对冲频率受预算限制，并统计对冲效果。
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional
+
+
+def percentile(values: List[float], p: float) -> float:
+    """计算百分位数（nearest-rank）
+
+    Args:
+        values: 数值列表
+        p: 百分位（0-100）
+
+    Returns:
+        百分位数，列表为空时返回 0
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class HedgeBudget:
+    """对冲预算
+
+    允许的对冲次数 = burst + ratio × 请求总数，防止端点整体变慢时对冲请求翻倍放大负载。
+    """
+
+    def __init__(self, ratio: float = 0.1, burst: int = 1):
+        """初始化对冲预算
+
+        Args:
+            ratio: 对冲请求占总请求的比例上限
+            burst: 额外允许的突发对冲次数
+        """
+        self.ratio = ratio
+        self.burst = burst
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        """记录一次普通请求"""
+        with self._lock:
+            self.requests += 1
+
+    def try_acquire(self) -> bool:
+        """尝试消耗一次对冲额度
+
+        Returns:
+            是否允许发出对冲请求
+        """
+        with self._lock:
+            if self.hedges < self.burst + self.ratio * self.requests:
+                self.hedges += 1
+                return True
+            return False
+
+
+class HedgeStats:
+    """对冲效果统计"""
+
+    def __init__(self):
+        self.requests = 0
+        self.hedges_issued = 0
+        self.hedges_won = 0
+        self.hedges_denied = 0
+        # 实际耗时（取先完成的一路）
+        self.latencies: List[float] = []
+        # 不对冲时的耗时估计：对冲胜出时按主请求卡顿前的输出速率外推
+        self.unhedged_latencies: List[float] = []
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        latency: float,
+        unhedged_latency: Optional[float] = None,
+        hedged: bool = False,
+        hedge_won: bool = False
+    ):
+        """记录一次流式请求的结果
+
+        Args:
+            latency: 实际耗时（秒）
+            unhedged_latency: 不对冲时的耗时估计（秒）
+            hedged: 是否发出了对冲请求
+            hedge_won: 对冲请求是否胜出
+        """
+        with self._lock:
+            self.requests += 1
+            self.hedges_issued += int(hedged)
+            self.hedges_won += int(hedge_won)
+            self.latencies.append(latency)
+            self.unhedged_latencies.append(
+                unhedged_latency if unhedged_latency is not None else latency
+            )
+
+    def record_denied(self):
+        """记录一次因预算不足未能发出的对冲"""
+        with self._lock:
+            self.hedges_denied += 1
+
+    def summary(self) -> Dict[str, float]:
+        """生成统计摘要
+
+        Returns:
+            包含对冲次数和 p50/p95/p99 延迟（实际 vs 不对冲估计）的字典
+        """
+        with self._lock:
+            result: Dict[str, float] = {
+                "requests": self.requests,
+                "hedges_issued": self.hedges_issued,
+                "hedges_won": self.hedges_won,
+                "hedges_denied": self.hedges_denied,
+            }
+            for p in (50, 95, 99):
+                actual = percentile(self.latencies, p)
+                unhedged = percentile(self.unhedged_latencies, p)
+                result[f"p{p}"] = actual
+                result[f"p{p}_unhedged"] = unhedged
+                result[f"p{p}_saved"] = max(0.0, unhedged - actual)
+            return result
@@ -0,0 +1,124 @@
+"""
+对话历史压缩模块
+
+跟踪对话历史的 token 数量，超出上限时把较早的轮次折叠为结构化的需求摘要，
+并按调用阶段只保留该阶段需要的内容，保证发送的历史不超过配置的 token 上限。
+"""
+
+from typing import Dict, List, Optional
+
+from .utils.tokens import estimate_messages_tokens, estimate_tokens
+
+# 需要保留原始对话轮次的阶段；其余阶段的提示词已包含完整需求，只发送需求摘要
+VERBATIM_PHASES = {"requirements"}
+
+SUMMARY_HEADER = "[对话摘要] 以下是此前对话中已确认的需求："
+
+
+def summarize_requirements(requirements: Dict[str, str], max_value_chars: Optional[int] = None) -> str:
+    """把需求字典格式化为结构化摘要
+
+    Args:
+        requirements: 需求字典
+        max_value_chars: 每个字段值的最大字符数（为 None 时不截断）
+
+    Returns:
+        摘要文本（包含全部需求字段）
+    """
+    lines = [SUMMARY_HEADER]
+    for key, value in requirements.items():
+        value = str(value)
+        if max_value_chars is not None and len(value) > max_value_chars:
+            value = value[:max_value_chars] + "…"
+        lines.append(f"- {key}: {value}")
+    return "\n".join(lines)
+
+
+def is_summary(message: Dict[str, str]) -> bool:
+    """判断消息是否是此前压缩生成的需求摘要"""
+    return message.get("role") == "system" and (message.get("content") or "").startswith(SUMMARY_HEADER)
+
+
+class HistoryManager:
+    """对话历史压缩器"""
+
+    def __init__(self, max_tokens: int = 3000):
+        """初始化历史压缩器
+
+        Args:
+            max_tokens: 发送的历史（含当前消息）的 token 上限
+        """
+        self.max_tokens = max_tokens
+        self.stats = {"compactions": 0, "tokens_saved": 0}
+
+    def _summary_message(self, requirements: Dict[str, str], budget: int) -> Optional[Dict[str, str]]:
+        """构造不超过预算的需求摘要消息
+
+        先逐步截断字段值（保留所有字段名）；只剩字段名仍放不下时截断摘要末尾。
+
+        Returns:
+            摘要消息，预算连消息本身的开销都不够时返回 None
+        """
+        content = summarize_requirements(requirements)
+        max_value_chars = max((len(str(v)) for v in requirements.values()), default=0)
+        while estimate_tokens(content) + 4 > budget and max_value_chars > 0:
+            max_value_chars //= 2
+            content = summarize_requirements(requirements, max_value_chars)
+        if estimate_tokens(content) + 4 > budget:
+            # 每个字符至多估算为 1 个 token
+            content = content[:max(0, budget - 4)]
+        if not content:
+            return None
+        return {"role": "system", "content": content}
+
+    def compact(
+        self,
+        history: List[Dict[str, str]],
+        requirements: Optional[Dict[str, str]] = None,
+        phase: str = "requirements",
+        reserved_tokens: int = 0
+    ) -> List[Dict[str, str]]:
+        """压缩对话历史
+
+        需求阶段在未超出上限时原样返回；超出上限时，较早的轮次折叠为需求摘要，
+        只保留放得下的最近轮次。其他阶段有需求时只发送需求摘要。
+
+        Args:
+            history: 原始对话历史
+            requirements: 已收集的需求（为 None 时只丢弃最早的轮次）
+            phase: 调用阶段
+            reserved_tokens: 为当前消息预留的 token 数
+
+        Returns:
+            压缩后的对话历史（不修改原列表）
+        """
+        budget = max(0, self.max_tokens - reserved_tokens)
+        original_tokens = estimate_messages_tokens(history)
+        verbatim = phase in VERBATIM_PHASES or not requirements
+
+        if verbatim and original_tokens <= budget:
+            return list(history)
+
+        compacted: List[Dict[str, str]] = []
+        if requirements:
+            # 摘要按当前需求重新生成，替换历史中此前的摘要而不是累积
+            history = [message for message in history if not is_summary(message)]
+            summary = self._summary_message(requirements, budget)
+            if summary:
+                compacted.append(summary)
+                budget -= estimate_messages_tokens([summary])
+
+        recent: List[Dict[str, str]] = []
+        if verbatim:
+            # 从最近的轮次往前保留，直到放不下为止
+            for message in reversed(history):
+                cost = estimate_messages_tokens([message])
+                if cost > budget:
+                    break
+                recent.insert(0, message)
+                budget -= cost
+        compacted.extend(recent)
+
+        self.stats["compactions"] += 1
+        self.stats["tokens_saved"] += max(0, original_tokens - estimate_messages_tokens(compacted))
+        return compacted
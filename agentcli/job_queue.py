@@ -0,0 +1,276 @@
+"""
+持久化任务队列模块
+
+为 `agentcli worker` 提供租约（lease）语义的任务队列：工作进程领取任务时获得一个
+有期限的租约，执行期间定期续约（心跳）；租约过期的任务重新对其他工作进程可见，
+失败的任务按退避延迟重试，超过最大尝试次数后进入死信状态。
+
+JobQueue 定义了队列接口，SQLiteJobQueue 是基于 SQLite 的默认实现，多个进程
+（或多台机器）可以共享同一个数据库文件。共享卷需要支持 POSIX 文件锁（如本地磁盘、
+NFSv4 并开启锁服务），SQLite 依赖文件锁保证领取任务的原子性。
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+# 任务状态
+QUEUED = "queued"
+LEASED = "leased"
+SUCCEEDED = "succeeded"
+DEAD = "dead"
+
+QUEUE_FILE = "jobs.db"
+
+
+def default_queue_path() -> Path:
+    """默认的队列数据库路径（AGENTCLI_QUEUE，否则位于缓存目录下）"""
+    queue_path = os.getenv("AGENTCLI_QUEUE")
+    if queue_path:
+        return Path(os.path.expanduser(queue_path))
+    cache_dir = os.getenv("AGENTCLI_CACHE_DIR", "~/.cache/agentcli")
+    return Path(os.path.expanduser(cache_dir)) / QUEUE_FILE
+
+
+@dataclass
+class LeasedJob:
+    """已领取的任务"""
+    id: int
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    lease_token: str
+
+
+class JobQueue:
+    """任务队列接口"""
+
+    def enqueue(self, payload: Dict[str, Any], max_attempts: int = 3) -> int:
+        """提交任务，返回任务 ID"""
+        raise NotImplementedError
+
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[LeasedJob]:
+        """领取一个可执行的任务，没有任务时返回 None"""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: int, lease_token: str, visibility_timeout: float) -> bool:
+        """续约，租约已失效（被其他工作进程接管）时返回 False"""
+        raise NotImplementedError
+
+    def complete(self, job_id: int, lease_token: str, result: Dict[str, Any]) -> bool:
+        """标记任务成功，租约已失效时返回 False"""
+        raise NotImplementedError
+
+    def fail(self, job_id: int, lease_token: str, error: str, retry_delay: float) -> Optional[str]:
+        """标记任务失败，返回新状态（queued 或 dead），租约已失效时返回 None"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        raise NotImplementedError
+
+
+class SQLiteJobQueue(JobQueue):
+    """基于 SQLite 的任务队列"""
+
+    def __init__(self, path: Path, clock: Callable[[], float] = time.time):
+        """初始化队列（数据库不存在时自动创建）
+
+        Args:
+            path: 数据库文件路径
+            clock: 时钟函数（测试时可替换）
+        """
+        self.path = Path(path)
+        self.clock = clock
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    available_at REAL NOT NULL,
+                    lease_token TEXT,
+                    lease_expires_at REAL,
+                    worker_id TEXT,
+                    result TEXT,
+                    last_error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs (status, available_at);
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每次操作使用独立连接，队列对象可以在多个线程中共享
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def enqueue(self, payload: Dict[str, Any], max_attempts: int = 3) -> int:
+        now = self.clock()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO jobs (payload, status, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (json.dumps(payload, ensure_ascii=False), QUEUED, max_attempts, now, now, now)
+            )
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def lease(self, worker_id: str, visibility_timeout: float) -> Optional[LeasedJob]:
+        now = self.clock()
+        conn = self._connect()
+        try:
+            # BEGIN IMMEDIATE 取得写锁，保证同一任务只会被一个工作进程领取
+            conn.execute("BEGIN IMMEDIATE")
+
+            # 租约过期且已用完尝试次数的任务进入死信
+            conn.execute(
+                "UPDATE jobs SET status = ?, last_error = COALESCE(last_error, '租约过期'), "
+                "lease_token = NULL, updated_at = ? "
+                "WHERE status = ? AND lease_expires_at <= ? AND attempts >= max_attempts",
+                (DEAD, now, LEASED, now)
+            )
+
+            row = conn.execute(
+                "SELECT id, payload, attempts, max_attempts FROM jobs "
+                "WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires_at <= ?) "
+                "ORDER BY id LIMIT 1",
+                (QUEUED, now, LEASED, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+
+            lease_token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, lease_token = ?, "
+                "lease_expires_at = ?, worker_id = ?, updated_at = ? WHERE id = ?",
+                (LEASED, lease_token, now + visibility_timeout, worker_id, now, row["id"])
+            )
+            conn.execute("COMMIT")
+            return LeasedJob(
+                id=row["id"],
+                payload=json.loads(row["payload"]),
+                attempts=row["attempts"] + 1,
+                max_attempts=row["max_attempts"],
+                lease_token=lease_token
+            )
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _update_leased(self, job_id: int, lease_token: str, assignments: str, params: tuple) -> bool:
+        """只在租约仍然有效时更新任务"""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                f"UPDATE jobs SET {assignments}, updated_at = ? "
+                "WHERE id = ? AND status = ? AND lease_token = ?",
+                params + (self.clock(), job_id, LEASED, lease_token)
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def heartbeat(self, job_id: int, lease_token: str, visibility_timeout: float) -> bool:
+        return self._update_leased(
+            job_id, lease_token,
+            "lease_expires_at = ?",
+            (self.clock() + visibility_timeout,)
+        )
+
+    def complete(self, job_id: int, lease_token: str, result: Dict[str, Any]) -> bool:
+        return self._update_leased(
+            job_id, lease_token,
+            "status = ?, result = ?, lease_token = NULL, lease_expires_at = NULL",
+            (SUCCEEDED, json.dumps(result, ensure_ascii=False))
+        )
+
+    def fail(self, job_id: int, lease_token: str, error: str, retry_delay: float) -> Optional[str]:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND status = ? AND lease_token = ?",
+                (job_id, LEASED, lease_token)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+
+        status = DEAD if row["attempts"] >= row["max_attempts"] else QUEUED
+        updated = self._update_leased(
+            job_id, lease_token,
+            "status = ?, last_error = ?, available_at = ?, lease_token = NULL, lease_expires_at = NULL",
+            (status, error, self.clock() + retry_delay)
+        )
+        return status if updated else None
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT status, COUNT(*) AS count FROM jobs GROUP BY status").fetchall()
+        finally:
+            conn.close()
+        counts = {QUEUED: 0, LEASED: 0, SUCCEEDED: 0, DEAD: 0}
+        counts.update({row["status"]: row["count"] for row in rows})
+        return counts
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """查询任务详情"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return dict(row) if row else None
+
+    def requeue_dead(self) -> int:
+        """把死信任务重新放回队列（重置尝试次数），返回数量"""
+        now = self.clock()
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, available_at = ?, updated_at = ? WHERE status = ?",
+                (QUEUED, now, now, DEAD)
+            )
+            return cursor.rowcount
+        finally:
+            conn.close()
+
+
+def open_queue(location: Optional[str] = None) -> JobQueue:
+    """按位置打开任务队列
+
+    目前支持 SQLite（文件路径或 sqlite:/// 前缀），其他后端可以实现 JobQueue 接口后在此注册。
+
+    Args:
+        location: 队列位置（为 None 时使用 default_queue_path()）
+
+    Returns:
+        任务队列
+    """
+    if not location:
+        return SQLiteJobQueue(default_queue_path())
+    if location.startswith("sqlite:///"):
+        location = location[len("sqlite:///"):]
+    elif "://" in location:
+        raise ValueError(f"不支持的队列后端: {location}")
+    return SQLiteJobQueue(Path(os.path.expanduser(location)))
@@ -4,26 +4,31 @@ AgentCLI 主程序入口
 整合所有模块，提供完整的用户交互流程。
 """
 
+import json
 import sys
+import time
 from pathlib import Path
+from typing import Any, Dict, Optional, TYPE_CHECKING
 
 import click
-from rich.console import Console
-from rich.panel import Panel
-from rich import print as rprint
 
 from . import __version__
-from .config import load_config, get_templates_dir
-from .ai_client import AIClient
-from .conversation import ConversationManager
+from .config import load_config, load_env_file, get_templates_dir
+from .output import OUTPUT_MODES, console
 from .task_generator import TaskGenerator
 from .task_executor import TaskExecutor
+from .utils.template_loader import TemplateLoader
 
-console = Console()
+if TYPE_CHECKING:
+    from .ai_client import AIClient
+    from .daemon import DaemonClient
+    from .plan_cache import PlanCache
 
 
 def show_welcome():
     """显示欢迎信息"""
+    from rich.panel import Panel
+    
     welcome_text = f"""
 [bold cyan]AgentCLI v{__version__}[/bold cyan]
 
@@ -33,6 +38,7 @@ def show_welcome():
 
 [dim]- 支持 Python CLI 工具模板
 - 支持 FastAPI Web 项目模板
+- 支持异步 Worker / ETL 项目模板
 - CoT 推理分析需求
 - 自动生成完整项目结构[/dim]
 """
@@ -51,6 +57,8 @@ def show_completion_message(project_name: str, project_path: Path):
         project_name: 项目名称
         project_path: 项目路径
     """
+    from rich.panel import Panel
+    
     completion_text = f"""
 [bold green]项目创建成功！[/bold green]
 
@@ -75,16 +83,346 @@ def show_completion_message(project_name: str, project_path: Path):
     ))
 
 
+def show_run_summary(ai_client: "AIClient", plan_cache: Optional["PlanCache"] = None):
+    """显示本次运行的请求统计
+    
+    Args:
+        ai_client: AI 客户端
+        plan_cache: 任务清单缓存
+    """
+    from rich.table import Table
+    
+    stats = ai_client.get_run_stats()
+    if not stats.get("requests") and not plan_cache:
+        return
+    
+    table = Table(title="运行统计", show_header=True, header_style="bold cyan")
+    table.add_column("指标", style="cyan")
+    table.add_column("值", justify="right")
+    
+    table.add_row("API 请求数", f"{stats['requests']:.0f}")
+    table.add_row("重试次数", f"{stats['retries']:.0f}")
+    table.add_row("限流等待", f"{stats['throttled_seconds']:.1f}s")
+    table.add_row("对冲请求（发出 / 胜出）", f"{stats['hedges_issued']} / {stats['hedges_won']}")
+    table.add_row("续写次数（截断 / 中断）", f"{stats['continuations']:.0f}")
+    for p in (50, 95, 99):
+        table.add_row(
+            f"流式延迟 p{p}（实际 / 不对冲估计）",
+            f"{stats[f'p{p}']:.1f}s / {stats[f'p{p}_unhedged']:.1f}s"
+            f"（-{stats[f'p{p}_saved']:.1f}s）"
+        )
+    if plan_cache:
+        cache_stats = plan_cache.stats
+        table.add_row(
+            "任务清单缓存命中率",
+            f"{cache_stats['hit_rate']:.0%}（{cache_stats['hits']}/{cache_stats['lookups']}）"
+        )
+    
+    console.print(table)
+
+
+def load_requirements_file(path: str) -> Dict[str, str]:
+    """从 JSON 文件加载需求（非交互模式）
+    
+    Args:
+        path: JSON 文件路径
+        
+    Returns:
+        需求字典
+        
+    Raises:
+        ValueError: 文件内容不是 JSON 对象或缺少必需字段
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        requirements = json.load(f)
+    
+    if not isinstance(requirements, dict):
+        raise ValueError("需求文件必须是 JSON 对象")
+    
+    missing = [k for k in ("project_type", "purpose", "project_name") if k not in requirements]
+    if missing:
+        raise ValueError(f"需求文件缺少字段: {', '.join(missing)}")
+    
+    return {k: str(v) for k, v in requirements.items()}
+
+
+def run_offline(output_dir: str, requirements_file: Optional[str], assume_yes: bool):
+    """离线模式：根据模板确定性地渲染完整项目，不调用 AI
+    
+    Args:
+        output_dir: 输出目录
+        requirements_file: 需求 JSON 文件（为 None 时交互式收集）
+        assume_yes: 是否跳过任务清单确认
+    """
+    started_at = time.perf_counter()
+    templates_dir = get_templates_dir()
+    
+    if requirements_file:
+        requirements = load_requirements_file(requirements_file)
+    else:
+        from .conversation import ConversationManager
+        conversation_manager = ConversationManager()
+        requirements = conversation_manager.collect_requirements()
+        if not requirements or not conversation_manager.is_ready_for_generation():
+            console.print("\n[yellow]需求收集未完成，程序退出。[/yellow]")
+            sys.exit(0)
+        conversation_manager.show_requirements_summary()
+        # 交互耗时不计入渲染耗时
+        started_at = time.perf_counter()
+    
+    task_generator = TaskGenerator()
+    task_list = task_generator.generate_offline_tasks(requirements, TemplateLoader(templates_dir))
+    if not task_list:
+        sys.exit(1)
+    
+    if not assume_yes:
+        if not task_generator.confirm_task_list(task_list):
+            console.print("\n[yellow]任务已取消。[/yellow]")
+            sys.exit(0)
+        started_at = time.perf_counter()
+    
+    output_path = Path(output_dir).resolve()
+    task_executor = TaskExecutor(templates_dir, output_path, requirements=requirements)
+    
+    if not task_executor.execute(task_list):
+        console.print("\n[red]项目创建失败。[/red]")
+        sys.exit(1)
+    
+    console.print(f"\n[dim]离线渲染耗时 {time.perf_counter() - started_at:.3f}s（未调用 AI）[/dim]")
+    show_completion_message(task_list.project_name, output_path / task_list.project_name)
+
+
+def render_daemon_event(event: str, data: Dict[str, Any]):
+    """在终端显示守护进程转发的进度事件（与本地运行时的输出一致）
+    
+    Args:
+        event: 事件类型
+        data: 事件数据
+    """
+    if event == "token":
+        console.print(data.get("text", ""), end="", style="cyan", markup=False, highlight=False)
+    elif event == "token_reset":
+        console.print("\n[dim]（以下为重新生成的完整输出）[/dim]")
+    elif event == "task_completed":
+        console.print(f"[green]✓[/green] {data.get('name', '')}")
+    elif event == "task_failed":
+        console.print(f"[red]✗[/red] {data.get('name', '')} - 执行失败")
+    elif event == "file_written":
+        console.print(f"[dim]已写入 {data.get('path', '')}[/dim]")
+    elif event == "cache_restored":
+        console.print(f"[green]✓[/green] 已从产物缓存恢复 {data.get('files', 0)} 个文件")
+
+
+def confirm_daemon_request(name: str, data: Dict[str, Any]) -> bool:
+    """回答守护进程的确认请求
+    
+    Args:
+        name: 确认名称
+        data: 确认数据
+        
+    Returns:
+        是否同意
+    """
+    if name == "reuse_plan":
+        from .task_generator import ask_reuse_cached_plan
+        console.print()
+        return ask_reuse_cached_plan(data)
+    return False
+
+
+def run_via_daemon(
+    client: "DaemonClient",
+    output_dir: str,
+    requirements_file: Optional[str],
+    assume_yes: bool
+):
+    """通过正在运行的守护进程生成项目（本地只负责收集需求和确认）
+    
+    Args:
+        client: 守护进程客户端
+        output_dir: 输出目录
+        requirements_file: 需求 JSON 文件（为 None 时交互式收集）
+        assume_yes: 是否跳过任务清单确认
+    """
+    from .daemon import DaemonError
+    from .task_generator import TaskList
+    
+    console.print(f"[dim]使用守护进程: {client.socket_path}[/dim]\n")
+    
+    if requirements_file:
+        requirements = load_requirements_file(requirements_file)
+    else:
+        show_welcome()
+        from .conversation import ConversationManager
+        conversation_manager = ConversationManager()
+        requirements = conversation_manager.collect_requirements()
+        if not requirements or not conversation_manager.is_ready_for_generation():
+            console.print("\n[yellow]需求收集未完成，程序退出。[/yellow]")
+            sys.exit(0)
+        conversation_manager.show_requirements_summary()
+    
+    output_path = str(Path(output_dir).resolve())
+    try:
+        if assume_yes:
+            result = client.request(
+                "scaffold",
+                on_event=render_daemon_event,
+                requirements=requirements,
+                output_dir=output_path
+            )
+        else:
+            console.print("\n[cyan]守护进程正在生成任务清单...[/cyan]\n")
+            # 与本地运行一致：命中缓存任务清单时询问是否复用
+            planned = client.request(
+                "plan",
+                on_event=render_daemon_event,
+                on_confirm=confirm_daemon_request,
+                requirements=requirements
+            )
+            task_list = TaskList(**planned["task_list"])
+            if not TaskGenerator().confirm_task_list(task_list):
+                console.print("\n[yellow]任务已取消。[/yellow]")
+                sys.exit(0)
+            console.print("\n[cyan]守护进程正在执行任务...[/cyan]")
+            result = client.request(
+                "execute",
+                on_event=render_daemon_event,
+                requirements=requirements,
+                task_list=task_list.model_dump(),
+                output_dir=output_path
+            )
+    except DaemonError as e:
+        console.print(f"\n[red]守护进程执行失败: {e}[/red]")
+        sys.exit(1)
+    
+    source = "（来自产物缓存）" if result.get("cached") else ""
+    console.print(f"\n[dim]守护进程耗时 {result['elapsed']:.2f}s{source}[/dim]")
+    show_completion_message(result["project_name"], Path(result["project_path"]))
+
+
+def run_ndjson(output_dir: str, offline: bool, requirements_file: Optional[str], flush_interval: float):
+    """无头模式：不渲染终端输出（不导入 rich），把进度事件以 NDJSON 写到标准输出
+    
+    事件依次为 run_started、planning/planned、task_started、token_batch、file_validated、
+    file_written、task_completed/task_failed，最后是带耗时统计的 run_summary。
+    
+    Args:
+        output_dir: 输出目录
+        offline: 是否直接从模板生成（不调用 AI）
+        requirements_file: 需求 JSON 文件（必需）
+        flush_interval: token 合并输出的间隔（秒）
+    """
+    from .output import NdjsonWriter, set_output_mode
+    
+    set_output_mode("ndjson")
+    writer = NdjsonWriter(flush_interval=flush_interval)
+    
+    if not requirements_file:
+        writer("error", {"message": "ndjson 输出模式需要用 --requirements 指定需求文件"})
+        sys.exit(2)
+    try:
+        requirements = load_requirements_file(requirements_file)
+    except (ValueError, OSError) as e:
+        writer("error", {"message": str(e)})
+        sys.exit(2)
+    
+    output_path = Path(output_dir).resolve()
+    writer("run_started", {
+        "version": __version__,
+        "project_name": requirements["project_name"],
+        "offline": offline,
+        "output_dir": str(output_path),
+    })
+    
+    started_at = time.perf_counter()
+    stats: Dict[str, float] = {}
+    if offline:
+        templates_dir = get_templates_dir()
+        writer("planning", {"offline": True})
+        task_list = TaskGenerator().generate_offline_tasks(requirements, TemplateLoader(templates_dir))
+        if not task_list:
+            writer("error", {"message": f"找不到项目类型对应的模板: {requirements.get('project_type')}"})
+            writer.close()
+            sys.exit(1)
+        writer("planned", {"project_name": task_list.project_name, "tasks": len(task_list.tasks)})
+        task_executor = TaskExecutor(templates_dir, output_path, requirements=requirements, on_event=writer)
+        success = task_executor.execute(task_list)
+        result = {
+            "success": success,
+            "project_name": task_list.project_name,
+            "project_path": str(output_path / task_list.project_name),
+            "cached": False,
+        }
+    else:
+        try:
+            config = load_config()
+        except Exception as e:
+            writer("error", {"message": f"配置加载失败: {e}"})
+            sys.exit(1)
+        from .scaffold import Scaffolder
+        scaffolder = Scaffolder(config)
+        result = scaffolder.run(requirements, output_path, on_event=writer)
+        stats = scaffolder.ai_client.get_run_stats()
+    
+    writer.close()
+    result["elapsed"] = round(time.perf_counter() - started_at, 3)
+    result["timings"] = writer.timings
+    result["tokens"] = writer.token_count
+    result["stats"] = stats
+    writer("run_summary", result)
+    if not result["success"]:
+        sys.exit(1)
+
+
+def run_options(func):
+    """项目生成命令共用的选项"""
+    options = [
+        click.option('--output-dir', '-o', type=click.Path(), default=".",
+                     help='输出目录（默认为当前目录）'),
+        click.option('--offline', '--template-only', 'offline', is_flag=True,
+                     help='离线模式：直接从模板渲染项目，不调用 AI'),
+        click.option('--requirements', '-r', 'requirements_file', type=click.Path(exists=True, dir_okay=False),
+                     help='从 JSON 文件读取需求（跳过交互式问答）'),
+        click.option('--yes', '-y', 'assume_yes', is_flag=True,
+                     help='跳过任务清单确认'),
+        click.option('--no-daemon', 'no_daemon', is_flag=True,
+                     help='不使用正在运行的守护进程，在本进程内生成'),
+        click.option('--output', 'output_format', type=click.Choice(OUTPUT_MODES), default="text",
+                     show_default=True, help='输出格式：ndjson 为无头模式，向标准输出写入结构化事件（需配合 -r）'),
+        click.option('--flush-interval', type=float, default=0.5, show_default=True,
+                     help='ndjson 模式下 token 合并输出的间隔（秒）'),
+    ]
+    for option in reversed(options):
+        func = option(func)
+    return func
+
+
 @click.command()
 @click.version_option(version=__version__)
-@click.option('--output-dir', '-o', type=click.Path(), default=".",
-              help='输出目录（默认为当前目录）')
-def cli(output_dir):
+@run_options
+def cli(output_dir, offline, requirements_file, assume_yes, no_daemon, output_format, flush_interval):
     """AgentCLI - 智能项目初始化助手
     
     通过 AI 对话快速创建项目脚手架。
     """
+    if output_format == "ndjson":
+        run_ndjson(output_dir, offline, requirements_file, flush_interval)
+        return
+    
     try:
+        if offline:
+            run_offline(output_dir, requirements_file, assume_yes)
+            return
+        
+        # 守护进程在运行时交给它生成（配置、模板和 AI 连接都已预热）
+        if not no_daemon:
+            from .daemon import DaemonClient
+            load_env_file()
+            client = DaemonClient.connect()
+            if client:
+                run_via_daemon(client, output_dir, requirements_file, assume_yes)
+                return
+        
         # 显示欢迎信息
         show_welcome()
         console.print()
@@ -98,10 +436,13 @@ def cli(output_dir):
             console.print(f"[red]✗[/red] 配置加载失败: {e}\n")
             console.print("[yellow]请按照以下步骤配置 AgentCLI：[/yellow]")
             console.print("1. 确保 .env 文件存在并包含有效的 DEEPSEEK_API_KEY")
-            console.print("2. 确保 systemprompt.md 文件存在\n")
+            console.print("2. 确保 systemprompt.md 文件存在")
+            console.print("3. 或使用 --offline 直接从模板生成项目（无需 API Key）\n")
             sys.exit(1)
         
-        # 初始化 AI 客户端
+        # 初始化 AI 客户端（离线模式不需要，延迟导入以加快启动）
+        from .ai_client import AIClient
+        
         console.print("[cyan]正在连接 AI 服务...[/cyan]")
         ai_client = AIClient(config)
         console.print("[green]✓[/green] AI 服务连接成功\n")
@@ -110,17 +451,23 @@ def cli(output_dir):
         templates_dir = get_templates_dir(config)
         
         # 创建对话管理器
+        from rich.panel import Panel
+        from .conversation import ConversationManager
         conversation_manager = ConversationManager(ai_client)
         
-        # 开始收集需求
-        console.print(Panel.fit(
-            "[bold]让我们开始创建你的项目！[/bold]\n\n"
-            "我会通过几个问题来了解你的需求。",
-            border_style="cyan"
-        ))
-        console.print()
-        
-        requirements = conversation_manager.collect_requirements()
+        if requirements_file:
+            requirements = load_requirements_file(requirements_file)
+            conversation_manager.requirements = requirements
+        else:
+            # 开始收集需求
+            console.print(Panel.fit(
+                "[bold]让我们开始创建你的项目！[/bold]\n\n"
+                "我会通过几个问题来了解你的需求。",
+                border_style="cyan"
+            ))
+            console.print()
+            
+            requirements = conversation_manager.collect_requirements()
         
         if not requirements or not conversation_manager.is_ready_for_generation():
             console.print("\n[yellow]需求收集未完成，程序退出。[/yellow]")
@@ -129,13 +476,39 @@ def cli(output_dir):
         # 显示需求总结
         conversation_manager.show_requirements_summary()
         
-        # 生成任务清单
+        output_path = Path(output_dir).resolve()
+        artifact_store = None
+        if config.artifact_cache_enabled:
+            from .artifact_store import ArtifactStore
+            artifact_store = ArtifactStore(config.cache_dir / "artifacts", config.artifact_link_mode)
+        task_executor = TaskExecutor(
+            templates_dir,
+            output_path,
+            ai_client=ai_client,
+            requirements=requirements,
+            conversation_history=conversation_manager.conversation_history,
+            artifact_store=artifact_store
+        )
+        
+        # 相同需求已成功生成过时，直接恢复缓存的项目，跳过规划和生成
         console.print()
-        task_generator = TaskGenerator(ai_client)
+        cached_project = task_executor.restore_cached_project()
+        if cached_project:
+            console.print()
+            show_completion_message(cached_project, output_path / cached_project)
+            return
+        
+        # 生成任务清单
+        plan_cache = None
+        if config.plan_cache_enabled:
+            from .plan_cache import PlanCache
+            plan_cache = PlanCache(config.cache_dir, config.plan_cache_threshold)
+        task_generator = TaskGenerator(ai_client, plan_cache=plan_cache)
         
         task_list = task_generator.generate_tasks(
             requirements,
-            conversation_manager.conversation_history
+            conversation_manager.conversation_history,
+            auto_reuse=assume_yes
         )
         
         if not task_list:
@@ -144,24 +517,22 @@ def cli(output_dir):
             sys.exit(1)
         
         # 确认任务清单
-        confirmed = task_generator.confirm_task_list(task_list)
+        confirmed = assume_yes or task_generator.confirm_task_list(task_list)
         
         if not confirmed:
             console.print("\n[yellow]任务已取消。[/yellow]")
             sys.exit(0)
         
         # 执行任务
-        output_path = Path(output_dir).resolve()
-        task_executor = TaskExecutor(
-            templates_dir,
-            output_path,
-            ai_client=ai_client,
-            requirements=requirements,
-            conversation_history=conversation_manager.conversation_history
-        )
-        
         success = task_executor.execute(task_list)
         
+        if success and plan_cache:
+            # 只缓存执行成功（代码验证通过）的任务清单
+            plan_cache.add(requirements, task_list)
+        
+        console.print()
+        show_run_summary(ai_client, plan_cache)
+        
         if success:
             # 显示完成信息
             console.print()
@@ -191,23 +562,260 @@ def cli(output_dir):
         sys.exit(1)
 
 
-@click.group()
+@click.group(invoke_without_command=True)
 @click.version_option(version=__version__)
-def main():
-    """AgentCLI - 智能项目初始化助手"""
-    pass
+@run_options
+@click.pass_context
+def main(ctx, **options):
+    """AgentCLI - 智能项目初始化助手
+    
+    不带子命令时等同于 init。
+    """
+    if ctx.invoked_subcommand is None:
+        ctx.invoke(cli, **options)
 
 
 @main.command()
-def init():
+@run_options
+@click.pass_context
+def init(ctx, **options):
     """创建新项目（交互式）"""
-    cli.callback()
+    ctx.invoke(cli, **options)
+
+
+@main.command()
+@click.option('--socket', 'socket_path', type=click.Path(), default=None,
+              help='Unix socket 路径（默认 AGENTCLI_SOCKET 或缓存目录下的 agentcli.sock）')
+@click.option('--stop', is_flag=True, help='停止正在运行的守护进程')
+def serve(socket_path, stop):
+    """以守护进程模式运行，保持配置、模板和 AI 连接预热"""
+    from .daemon import DaemonClient, ScaffoldDaemon, default_socket_path
+    
+    load_env_file()
+    socket_path = Path(socket_path) if socket_path else default_socket_path()
+    
+    if stop:
+        client = DaemonClient.connect(socket_path)
+        if not client:
+            console.print("[yellow]守护进程未在运行[/yellow]")
+            return
+        client.request("shutdown")
+        console.print("[green]✓[/green] 守护进程已停止")
+        return
+    
+    try:
+        config = load_config()
+    except Exception as e:
+        console.print(f"[red]✗[/red] 配置加载失败: {e}")
+        sys.exit(1)
+    
+    from .scaffold import Scaffolder
+    
+    started_at = time.perf_counter()
+    scaffolder = Scaffolder(config)
+    try:
+        server = ScaffoldDaemon(socket_path, scaffolder)
+    except RuntimeError as e:
+        console.print(f"[red]✗[/red] {e}")
+        sys.exit(1)
+    
+    console.print(
+        f"[green]✓[/green] 守护进程已启动（预热耗时 {time.perf_counter() - started_at:.2f}s）: {socket_path}"
+    )
+    console.print("[dim]agentcli 检测到守护进程后会自动使用它；按 Ctrl+C 或运行 agentcli serve --stop 停止[/dim]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        console.print("\n[yellow]守护进程已退出[/yellow]")
+
+
+@main.command()
+@click.option('--host', default="127.0.0.1", show_default=True, help='监听地址')
+@click.option('--port', default=8080, show_default=True, type=int, help='监听端口')
+@click.option('--workers', type=int, default=None, help='同时执行的任务数（默认 AGENTCLI_SERVICE_WORKERS）')
+@click.option('--workspace', type=click.Path(file_okay=False), default=None,
+              help='任务输出目录（默认为缓存目录下的 jobs）')
+@click.option('--verbose', is_flag=True, help='输出访问日志')
+def service(host, port, workers, workspace, verbose):
+    """以 HTTP 服务模式运行（任务队列 + SSE 进度 + 压缩包下载）"""
+    try:
+        config = load_config()
+    except Exception as e:
+        console.print(f"[red]✗[/red] 配置加载失败: {e}")
+        sys.exit(1)
+    
+    from .scaffold import Scaffolder
+    from .service import JobManager, ScaffoldService
+    
+    job_manager = JobManager(
+        Scaffolder(config),
+        Path(workspace) if workspace else config.cache_dir / "jobs",
+        workers=workers or config.service_workers,
+        max_queue=config.service_queue_size
+    )
+    job_manager.start()
+    server = ScaffoldService((host, port), job_manager, verbose=verbose)
+    
+    console.print(
+        f"[green]✓[/green] HTTP 服务已启动: http://{host}:{server.server_address[1]}"
+        f"（{job_manager.workers} 个工作线程，工作目录 {job_manager.workspace}）"
+    )
+    console.print("[dim]POST /jobs 提交需求，GET /jobs/<id>/events 订阅进度，按 Ctrl+C 停止[/dim]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        console.print("\n[yellow]正在等待执行中的任务完成...[/yellow]")
+        job_manager.stop()
+        console.print("[yellow]HTTP 服务已退出[/yellow]")
+
+
+@main.command()
+@click.option('--requirements', '-r', 'requirements_files', multiple=True, required=True,
+              type=click.Path(exists=True, dir_okay=False), help='需求 JSON 文件（可重复指定）')
+@click.option('--queue', 'queue_location', default=None,
+              help='任务队列位置（默认 AGENTCLI_QUEUE 或缓存目录下的 jobs.db）')
+@click.option('--offline', is_flag=True, help='离线模式：直接从模板渲染，不调用 AI')
+@click.option('--max-attempts', default=3, show_default=True, type=int, help='最大尝试次数，超过后进入死信')
+def enqueue(requirements_files, queue_location, offline, max_attempts):
+    """把需求提交到持久化任务队列，由 agentcli worker 执行"""
+    from .job_queue import open_queue
+    
+    load_env_file()
+    job_queue = open_queue(queue_location)
+    for path in requirements_files:
+        try:
+            requirements = load_requirements_file(path)
+        except (ValueError, OSError) as e:
+            console.print(f"[red]✗[/red] {path}: {e}")
+            sys.exit(1)
+        job_id = job_queue.enqueue({"requirements": requirements, "offline": offline}, max_attempts)
+        console.print(f"[green]✓[/green] 已提交任务 #{job_id}: {requirements['project_name']}")
+
+
+@main.command()
+@click.option('--queue', 'queue_location', default=None,
+              help='任务队列位置（默认 AGENTCLI_QUEUE 或缓存目录下的 jobs.db）')
+@click.option('--output-dir', '-o', type=click.Path(file_okay=False), default=".",
+              help='输出目录（默认为当前目录）')
+@click.option('--concurrency', '-c', default=1, show_default=True, type=int, help='本进程中并行执行的任务数')
+@click.option('--visibility-timeout', default=300, show_default=True, type=float,
+              help='租约时长（秒），工作进程失联超过该时长后任务重新可见')
+@click.option('--retry-delay', default=30, show_default=True, type=float, help='首次重试延迟（秒）')
+@click.option('--max-jobs', type=int, default=None, help='每个工作线程最多处理的任务数')
+@click.option('--burst', is_flag=True, help='队列为空时退出（适合定时批处理）')
+def worker(queue_location, output_dir, concurrency, visibility_timeout, retry_delay, max_jobs, burst):
+    """从持久化任务队列中领取并执行任务（可在多个进程或机器上同时运行）"""
+    import threading
+    from .job_queue import open_queue
+    from .worker import Worker
+    
+    try:
+        config = load_config()
+    except Exception as e:
+        console.print(f"[red]✗[/red] 配置加载失败: {e}")
+        sys.exit(1)
+    
+    from .scaffold import Scaffolder
+    
+    job_queue = open_queue(queue_location)
+    scaffolder = Scaffolder(config)
+    stop = threading.Event()
+    workers = [
+        Worker(job_queue, scaffolder, Path(output_dir), visibility_timeout=visibility_timeout, retry_delay=retry_delay)
+        for _ in range(concurrency)
+    ]
+    threads = [
+        threading.Thread(target=w.run, kwargs={"max_jobs": max_jobs, "burst": burst, "stop": stop}, daemon=True)
+        for w in workers
+    ]
+    
+    console.print(f"[green]✓[/green] 工作进程已启动（{concurrency} 个并行任务），队列统计: {job_queue.stats()}")
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        console.print("\n[yellow]正在等待执行中的任务完成...[/yellow]")
+        stop.set()
+        for thread in threads:
+            thread.join()
+    
+    console.print(f"[dim]共处理 {sum(w.processed for w in workers)} 个任务，队列统计: {job_queue.stats()}[/dim]")
+
+
+@main.command(name="queue-stats")
+@click.option('--queue', 'queue_location', default=None,
+              help='任务队列位置（默认 AGENTCLI_QUEUE 或缓存目录下的 jobs.db）')
+@click.option('--requeue-dead', is_flag=True, help='把死信任务重新放回队列')
+def queue_stats(queue_location, requeue_dead):
+    """查看任务队列状态"""
+    from .job_queue import open_queue
+    
+    load_env_file()
+    job_queue = open_queue(queue_location)
+    if requeue_dead:
+        console.print(f"[green]✓[/green] 已重新排队 {job_queue.requeue_dead()} 个死信任务")
+    
+    from rich.table import Table
+    table = Table(title="任务队列", show_header=True, header_style="bold cyan")
+    table.add_column("状态", style="cyan")
+    table.add_column("任务数", justify="right")
+    for status, count in job_queue.stats().items():
+        table.add_row(status, str(count))
+    console.print(table)
+
+
+@main.command()
+@click.argument('project_dir', type=click.Path(exists=True, file_okay=False))
+@click.argument('files', nargs=-1, required=True)
+@click.option('--change', '-m', 'change_request', required=True, help='修改要求')
+@click.option('--requirements', '-r', 'requirements_file', type=click.Path(exists=True, dir_okay=False),
+              help='项目需求 JSON 文件（可选，作为修改上下文）')
+@click.option('--full', is_flag=True, help='跳过补丁，直接整文件重新生成')
+def update(project_dir, files, change_request, requirements_file, full):
+    """按修改要求增量更新已生成项目中的文件（FILES 为相对于项目目录的路径）"""
+    try:
+        config = load_config()
+        requirements = load_requirements_file(requirements_file) if requirements_file else None
+    except Exception as e:
+        console.print(f"[red]✗[/red] {e}")
+        sys.exit(1)
+    
+    from .ai_client import AIClient
+    from .patcher import ProjectUpdater
+    
+    updater = ProjectUpdater(AIClient(config), Path(project_dir))
+    failed = False
+    for file_path in files:
+        result = updater.update_file(file_path, change_request, requirements, full=full)
+        if result["success"]:
+            mode = "补丁" if result["mode"] == "patch" else "整文件重新生成"
+            console.print(f"[green]✓[/green] {file_path}（{mode}）")
+        else:
+            failed = True
+            console.print(f"[red]✗[/red] {file_path}: {result['error']}")
+    
+    stats = updater.stats
+    console.print(
+        f"[dim]补丁 {stats['patched']} 个，重新生成 {stats['regenerated']} 个，失败 {stats['failed']} 个；"
+        f"输出约 {stats['output_tokens']} tokens（整文件约 {stats['full_file_tokens']} tokens）[/dim]"
+    )
+    if failed:
+        sys.exit(1)
 
 
 @main.command()
 def version():
     """显示版本信息"""
-    rprint(f"[cyan]AgentCLI[/cyan] version [green]{__version__}[/green]")
+    console.print(f"[cyan]AgentCLI[/cyan] version [green]{__version__}[/green]")
 
 
 @main.command()
@@ -238,6 +846,13 @@ def doctor():
         from .config import load_config
         config = load_config()
         console.print("[green]✓[/green] 配置加载成功")
+        if config.phase_prompts:
+            from .utils.tokens import estimate_tokens
+            sizes = "，".join(
+                f"{phase} {estimate_tokens(prompt)}"
+                for phase, prompt in config.phase_prompts.items()
+            )
+            console.print(f"[green]✓[/green] 各阶段系统提示词 token 数: {sizes}（完整 {estimate_tokens(config.system_prompt)}）")
     except Exception as e:
         console.print(f"[red]✗[/red] 配置加载失败: {e}")
         issues.append(f"修复配置问题: {e}")
@@ -253,5 +868,4 @@ def doctor():
 
 
 if __name__ == "__main__":
-    cli()
-
+    main()
@@ -0,0 +1,174 @@
+"""
+输出模块
+
+终端模式下各模块通过 `console` 使用 rich 渲染输出；无头模式（`--output ndjson`）下不导入 rich，
+console 的输出被丢弃，进度以 NDJSON 事件的形式写到标准输出，每行一个 JSON 对象。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, IO, Optional
+
+OUTPUT_MODES = ("text", "ndjson")
+
+_mode = os.getenv("AGENTCLI_OUTPUT", "text")
+
+
+def set_output_mode(mode: str):
+    """设置输出模式（需在输出任何内容之前调用）
+
+    Args:
+        mode: text 或 ndjson
+
+    Raises:
+        ValueError: 未知的输出模式
+    """
+    global _mode
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"未知的输出模式: {mode}")
+    _mode = mode
+
+
+def get_output_mode() -> str:
+    """当前输出模式"""
+    return _mode
+
+
+def is_headless() -> bool:
+    """是否为无头模式（不渲染终端输出）"""
+    return _mode == "ndjson"
+
+
+def _discard(*args, **kwargs):
+    return None
+
+
+class _ConsoleProxy:
+    """延迟创建 rich Console 的代理，无头模式下丢弃所有输出"""
+
+    def __init__(self):
+        self._console = None
+        self._lock = threading.Lock()
+
+    def _get_console(self):
+        if self._console is None:
+            with self._lock:
+                if self._console is None:
+                    from rich.console import Console
+                    self._console = Console()
+        return self._console
+
+    def __getattr__(self, name: str):
+        if is_headless():
+            return _discard
+        return getattr(self._get_console(), name)
+
+
+console = _ConsoleProxy()
+
+
+class _NullProgress:
+    """无头模式下的进度条替身"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add_task(self, *args, **kwargs) -> int:
+        return 0
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+def progress_bar():
+    """创建任务进度条（无头模式下为不渲染的替身）"""
+    if is_headless():
+        return _NullProgress()
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
+        console=console._get_console()
+    )
+
+
+class NdjsonWriter:
+    """把进度事件写成 NDJSON
+
+    token 增量不会逐个输出，而是累积后按 flush_interval 合并为一个 token_batch 事件，
+    输出量和序列化开销只与运行时长有关，与 token 数量无关。其他事件写出前会先写出累积的 token。
+    可以直接作为 Scaffolder.run 的 on_event 回调使用（线程安全）。
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None, flush_interval: float = 0.5):
+        """初始化写入器
+
+        Args:
+            stream: 输出流（默认为标准输出）
+            flush_interval: token 合并输出的间隔（秒，0 表示每个 token 立即输出）
+        """
+        self.stream = stream or sys.stdout
+        self.flush_interval = flush_interval
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._pending: list = []
+        self._pending_count = 0
+        self._last_flush = self.started_at
+        self._task_started: Dict[Any, float] = {}
+        self.timings: Dict[str, Any] = {"tasks": {}}
+        self.token_count = 0
+
+    def _write(self, event: str, data: Dict[str, Any]):
+        record = {"event": event, "ts": round(time.monotonic() - self.started_at, 3)}
+        record.update(data)
+        self.stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def _flush_tokens(self):
+        if self._pending:
+            self._write("token_batch", {"text": "".join(self._pending), "tokens": self._pending_count})
+            self._pending = []
+            self._pending_count = 0
+        self._last_flush = time.monotonic()
+
+    def _record_timing(self, event: str, data: Dict[str, Any]):
+        now = time.monotonic() - self.started_at
+        if event == "planning":
+            self.timings["planning_started"] = now
+        elif event == "planned" and "planning_started" in self.timings:
+            self.timings["planning"] = round(now - self.timings.pop("planning_started"), 3)
+        elif event == "task_started":
+            self._task_started[data.get("id")] = now
+        elif event in ("task_completed", "task_failed") and data.get("id") in self._task_started:
+            started = self._task_started.pop(data.get("id"))
+            self.timings["tasks"][str(data.get("id"))] = round(now - started, 3)
+
+    def __call__(self, event: str, data: Dict[str, Any]):
+        """处理一个事件"""
+        with self._lock:
+            if event == "token":
+                self._pending.append(data.get("text", ""))
+                self._pending_count += 1
+                self.token_count += 1
+                if time.monotonic() - self._last_flush >= self.flush_interval:
+                    self._flush_tokens()
+                    self.stream.flush()
+                return
+
+            self._flush_tokens()
+            self._record_timing(event, data)
+            self._write(event, data)
+            self.stream.flush()
+
+    def close(self):
+        """写出剩余的 token"""
+        with self._lock:
+            self._flush_tokens()
+            self.stream.flush()
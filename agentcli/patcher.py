@@ -0,0 +1,393 @@
+"""
+增量修改模块
+
+修改已生成的项目时，让模型只输出改动（搜索/替换块或 unified diff），在本地模糊匹配后
+应用并验证，避免为整个文件重新支付输出 token；补丁无法应用或验证失败时才回退到整文件重新生成。
+"""
+
+import difflib
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from .output import console
+from .utils.code_validator import validate_generated_code
+from .utils.file_ops import create_file, read_file, validate_path
+from .utils.tokens import estimate_tokens
+
+if TYPE_CHECKING:
+    from .ai_client import AIClient
+
+SEARCH_MARKER = "<<<<<<< SEARCH"
+DIVIDER = "======="
+REPLACE_MARKER = ">>>>>>> REPLACE"
+
+HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,\d+)? \+\d+(?:,\d+)? @@")
+
+# 模糊匹配的最低相似度
+FUZZY_THRESHOLD = 0.85
+
+
+class PatchError(Exception):
+    """补丁无法解析或应用"""
+
+
+@dataclass
+class Edit:
+    """一处修改：把 search 替换为 replace"""
+    search: str
+    replace: str
+    line_hint: Optional[int] = None  # unified diff 中的原始行号（从 0 开始）
+
+
+def parse_search_replace(response: str) -> List[Edit]:
+    """解析搜索/替换块
+
+    格式：
+        <<<<<<< SEARCH
+        原代码
+        =======
+        新代码
+        >>>>>>> REPLACE
+
+    Args:
+        response: 模型响应
+
+    Returns:
+        修改列表
+
+    Raises:
+        PatchError: 块不完整
+    """
+    edits: List[Edit] = []
+    lines = response.splitlines()
+    i = 0
+    while i < len(lines):
+        if lines[i].strip() != SEARCH_MARKER:
+            i += 1
+            continue
+        search: List[str] = []
+        replace: List[str] = []
+        i += 1
+        while i < len(lines) and lines[i].strip() != DIVIDER:
+            search.append(lines[i])
+            i += 1
+        i += 1
+        while i < len(lines) and lines[i].strip() != REPLACE_MARKER:
+            replace.append(lines[i])
+            i += 1
+        if i >= len(lines):
+            raise PatchError("搜索/替换块不完整")
+        edits.append(Edit("\n".join(search), "\n".join(replace)))
+        i += 1
+    return edits
+
+
+def parse_unified_diff(response: str) -> List[Edit]:
+    """解析 unified diff，每个 hunk 转换为一处修改
+
+    不依赖 hunk 头中的行数（模型经常数错），只用起始行号作为定位提示。
+
+    Args:
+        response: 模型响应
+
+    Returns:
+        修改列表
+    """
+    edits: List[Edit] = []
+    lines = response.splitlines()
+    old: Optional[List[str]] = None
+    new: List[str] = []
+    hint: Optional[int] = None
+
+    def flush():
+        if old is not None and (old or new):
+            edits.append(Edit("\n".join(old), "\n".join(new), hint))
+
+    for i, line in enumerate(lines):
+        header = HUNK_HEADER.match(line)
+        if header:
+            flush()
+            old, new, hint = [], [], max(int(header.group(1)) - 1, 0)
+            continue
+        if old is None:
+            continue
+        next_line = lines[i + 1] if i + 1 < len(lines) else ""
+        if line.startswith("diff ") or line.startswith("```") or (
+            line.startswith("--- ") and next_line.startswith("+++ ")
+        ):
+            flush()
+            old = None
+        elif line.startswith("-"):
+            old.append(line[1:])
+        elif line.startswith("+"):
+            new.append(line[1:])
+        elif line.startswith("\\"):
+            continue  # \ No newline at end of file
+        else:
+            # 上下文行（模型常常省略空行前的空格）
+            old.append(line[1:] if line.startswith(" ") else line)
+            new.append(line[1:] if line.startswith(" ") else line)
+    flush()
+    return edits
+
+
+def parse_patch(response: str) -> List[Edit]:
+    """识别响应中的补丁格式并解析
+
+    Args:
+        response: 模型响应
+
+    Returns:
+        修改列表
+
+    Raises:
+        PatchError: 响应中没有可识别的补丁
+    """
+    if SEARCH_MARKER in response:
+        edits = parse_search_replace(response)
+    elif re.search(r"^@@ -\d+", response, re.MULTILINE):
+        edits = parse_unified_diff(response)
+    else:
+        edits = []
+    if not edits:
+        raise PatchError("响应中没有可识别的补丁")
+    return edits
+
+
+def _indent(line: str) -> str:
+    return line[:len(line) - len(line.lstrip())]
+
+
+def _reindent(lines: List[str], search_lines: List[str], matched: List[str]) -> List[str]:
+    """按匹配到的原代码调整替换内容的缩进（模型给出的缩进与文件不一致时）
+
+    从搜索内容与匹配到的原代码逐行对比得到缩进映射，替换内容中相同缩进的行按映射调整。
+    """
+    mapping: Dict[str, str] = {}
+    for search_line, matched_line in zip(search_lines, matched):
+        if search_line.strip() and matched_line.strip():
+            mapping.setdefault(_indent(search_line), _indent(matched_line))
+    if all(old == new for old, new in mapping.items()):
+        return lines
+
+    result = []
+    for line in lines:
+        indent = _indent(line)
+        if line.strip() and indent in mapping:
+            line = mapping[indent] + line[len(indent):]
+        result.append(line)
+    return result
+
+
+def _locate(
+    lines: List[str],
+    search_lines: List[str],
+    hint: Optional[int],
+    threshold: float
+) -> Tuple[int, bool]:
+    """在文件中定位 search_lines
+
+    依次尝试：逐字匹配、忽略首尾空白匹配、按相似度模糊匹配；有多个候选时取离行号提示最近的。
+
+    Returns:
+        (起始行, 是否需要调整缩进)
+
+    Raises:
+        PatchError: 找不到足够相似的位置
+    """
+    size = len(search_lines)
+    starts = range(len(lines) - size + 1)
+
+    def nearest(candidates: List[int]) -> int:
+        return min(candidates, key=lambda start: abs(start - hint) if hint is not None else start)
+
+    exact = [s for s in starts if lines[s:s + size] == search_lines]
+    if exact:
+        return nearest(exact), False
+
+    stripped = [line.strip() for line in search_lines]
+    loose = [s for s in starts if [line.strip() for line in lines[s:s + size]] == stripped]
+    if loose:
+        return nearest(loose), True
+
+    target = "\n".join(stripped)
+    best_start, best_ratio = -1, 0.0
+    for start in starts:
+        window = "\n".join(line.strip() for line in lines[start:start + size])
+        matcher = difflib.SequenceMatcher(None, window, target, autojunk=False)
+        if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+            continue
+        ratio = matcher.ratio()
+        if ratio > best_ratio or (ratio == best_ratio and hint is not None
+                                  and abs(start - hint) < abs(best_start - hint)):
+            best_start, best_ratio = start, ratio
+    if best_ratio >= threshold:
+        return best_start, True
+
+    preview = search_lines[0].strip() if search_lines else ""
+    raise PatchError(f"找不到要修改的代码: {preview[:60]}")
+
+
+def apply_edits(content: str, edits: List[Edit], threshold: float = FUZZY_THRESHOLD) -> str:
+    """把修改依次应用到文件内容
+
+    Args:
+        content: 原文件内容
+        edits: 修改列表
+        threshold: 模糊匹配的最低相似度
+
+    Returns:
+        修改后的内容
+
+    Raises:
+        PatchError: 某处修改无法定位
+    """
+    lines = content.splitlines()
+    offset = 0  # 之前的修改导致的行号偏移（用于修正 unified diff 的行号提示）
+    for edit in edits:
+        search_lines = edit.search.splitlines()
+        replace_lines = edit.replace.splitlines()
+        if not any(line.strip() for line in search_lines):
+            # 空的搜索内容表示追加到文件末尾
+            lines.extend(replace_lines)
+            continue
+        hint = edit.line_hint + offset if edit.line_hint is not None else None
+        start, reindent = _locate(lines, search_lines, hint, threshold)
+        end = start + len(search_lines)
+        if reindent:
+            replace_lines = _reindent(replace_lines, search_lines, lines[start:end])
+        lines[start:end] = replace_lines
+        offset += len(replace_lines) - len(search_lines)
+    return "\n".join(lines) + "\n"
+
+
+def apply_patch(content: str, response: str, threshold: float = FUZZY_THRESHOLD) -> str:
+    """解析模型响应中的补丁并应用
+
+    Args:
+        content: 原文件内容
+        response: 模型响应（搜索/替换块或 unified diff）
+        threshold: 模糊匹配的最低相似度
+
+    Returns:
+        修改后的内容
+
+    Raises:
+        PatchError: 补丁无法解析或应用
+    """
+    return apply_edits(content, parse_patch(response), threshold)
+
+
+class ProjectUpdater:
+    """按修改要求增量更新已生成项目中的文件"""
+
+    def __init__(self, ai_client: "AIClient", project_dir: Path):
+        """初始化更新器
+
+        Args:
+            ai_client: AI 客户端
+            project_dir: 项目目录
+        """
+        self.ai_client = ai_client
+        self.project_dir = Path(project_dir).resolve()
+        self.stats = {"patched": 0, "regenerated": 0, "failed": 0, "output_tokens": 0, "full_file_tokens": 0}
+
+    def _collect_context(self) -> Tuple[Dict[str, str], List[str]]:
+        """收集项目中的 Python 文件（用于导入验证和整文件重新生成）"""
+        created_files: Dict[str, str] = {}
+        project_structure: List[str] = []
+        root = self.project_dir.parent
+        for path in sorted(self.project_dir.rglob("*")):
+            rel_path = str(path.relative_to(root))
+            if any(part.startswith(".") for part in path.relative_to(self.project_dir).parts):
+                continue
+            if path.is_dir():
+                project_structure.append(f"目录: {rel_path}")
+            elif path.suffix == ".py":
+                content = read_file(path)
+                if content is not None:
+                    created_files[rel_path] = content
+                    project_structure.append(f"文件: {rel_path}")
+        return created_files, project_structure
+
+    def _validate(self, content: str, rel_path: str, created_files: Dict[str, str]) -> Tuple[bool, List[str]]:
+        if not rel_path.endswith(".py"):
+            return True, []
+        return validate_generated_code(content, rel_path, self.project_dir.parent, created_files)
+
+    def update_file(
+        self,
+        file_path: str,
+        change_request: str,
+        requirements: Optional[Dict[str, str]] = None,
+        full: bool = False
+    ) -> Dict[str, Any]:
+        """按修改要求更新一个文件
+
+        先请求补丁并在本地应用，补丁无法应用或验证失败时回退到整文件重新生成。
+
+        Args:
+            file_path: 文件路径（相对于项目目录）
+            change_request: 修改要求
+            requirements: 项目需求（可选，作为上下文）
+            full: 跳过补丁，直接整文件重新生成
+
+        Returns:
+            结果字典（success、mode、path，失败时包含 error）
+        """
+        if not validate_path(file_path):
+            return {"success": False, "mode": None, "path": file_path, "error": f"不安全的路径: {file_path}"}
+        target = self.project_dir / file_path
+        current = read_file(target)
+        if current is None:
+            return {"success": False, "mode": None, "path": file_path, "error": f"文件不存在: {file_path}"}
+
+        rel_path = f"{self.project_dir.name}/{file_path}"
+        requirements = requirements or {"project_name": self.project_dir.name}
+        created_files, project_structure = self._collect_context()
+        self.stats["full_file_tokens"] += estimate_tokens(current)
+
+        if not full:
+            response = self.ai_client.generate_code_edit(rel_path, current, change_request, requirements)
+            if response:
+                self.stats["output_tokens"] += estimate_tokens(response)
+                try:
+                    updated = apply_patch(current, response)
+                except PatchError as e:
+                    console.print(f"[yellow]补丁无法应用（{e}），改为整文件重新生成[/yellow]")
+                else:
+                    is_valid, issues = self._validate(updated, rel_path, created_files)
+                    if is_valid:
+                        return self._write(target, file_path, updated, "patch", issues)
+                    console.print("[yellow]应用补丁后的代码验证失败，改为整文件重新生成[/yellow]")
+                    for issue in issues:
+                        console.print(f"  {issue}")
+
+        regenerated = self.ai_client.generate_file_rewrite(
+            file_path=rel_path,
+            current_content=current,
+            change_request=change_request,
+            requirements=requirements,
+            created_files=created_files,
+            project_structure=project_structure,
+            stream=True
+        )
+        if not regenerated:
+            self.stats["failed"] += 1
+            return {"success": False, "mode": "regenerate", "path": file_path, "error": "重新生成失败"}
+        self.stats["output_tokens"] += estimate_tokens(regenerated)
+
+        is_valid, issues = self._validate(regenerated, rel_path, created_files)
+        if not is_valid:
+            self.stats["failed"] += 1
+            return {"success": False, "mode": "regenerate", "path": file_path, "error": "; ".join(issues)}
+        return self._write(target, file_path, regenerated, "regenerate", issues)
+
+    def _write(self, target: Path, file_path: str, content: str, mode: str, issues: List[str]) -> Dict[str, Any]:
+        if not create_file(target, content):
+            self.stats["failed"] += 1
+            return {"success": False, "mode": mode, "path": file_path, "error": "写入失败"}
+        self.stats["patched" if mode == "patch" else "regenerated"] += 1
+        return {"success": True, "mode": mode, "path": file_path, "issues": issues}
@@ -0,0 +1,141 @@
+"""
+性能画像模块
+
+对话中可选的性能画像（预期负载、数据量、延迟目标、负载类型）记录在需求中，并用于：
+
+- 推导模板变量：连接池大小、并行度、线程/进程、批大小、Worker 并发数
+- 补全未明确回答的布局选项：高负载默认使用生产配置，严格延迟目标默认启用缓存等
+- 生成写入规划和代码生成提示词的具体要求
+"""
+
+from typing import Dict, List, Tuple
+
+# 需求字段 -> (问题, [(选项, 说明)])
+PERFORMANCE_QUESTIONS: Dict[str, Tuple[str, List[Tuple[str, str]]]] = {
+    "expected_load": ("预期负载", [
+        ("低", "< 100 RPS，或偶尔运行"),
+        ("中", "100 - 1000 RPS"),
+        ("高", "> 1000 RPS"),
+    ]),
+    "data_volume": ("数据量", [
+        ("小", "MB 级"),
+        ("中", "GB 级"),
+        ("大", "TB 级，无法一次装入内存"),
+    ]),
+    "latency_slo": ("延迟目标", [
+        ("宽松", "秒级即可"),
+        ("一般", "p99 < 500ms"),
+        ("严格", "p99 < 100ms"),
+    ]),
+    "workload": ("负载类型", [
+        ("I/O 密集", "主要等待网络、磁盘或数据库"),
+        ("CPU 密集", "主要是计算"),
+        ("混合", "两者兼有"),
+    ]),
+}
+
+# 预期负载 -> (连接池大小, 连接池溢出上限)
+POOL_SIZES = {"低": (5, 10), "中": (10, 20), "高": (20, 40)}
+
+# 数据量 -> 并行处理时每块的记录数
+CHUNK_SIZES = {"小": 100, "中": 1000, "大": 10000}
+
+# 负载类型 -> (CLI 默认并行度（0 表示全部 CPU）, 是否默认使用线程池)
+PARALLELISM = {"I/O 密集": (8, True), "CPU 密集": (0, False), "混合": (1, False)}
+
+# 负载类型 -> 异步 Worker 每个阶段的默认并发数（CPU 密集时协程并发无益）
+WORKER_CONCURRENCY = {"I/O 密集": 32, "CPU 密集": 1, "混合": 4}
+
+
+def has_performance_profile(requirements: Dict[str, str]) -> bool:
+    """需求中是否包含性能画像"""
+    return any(requirements.get(key) for key in PERFORMANCE_QUESTIONS)
+
+
+def performance_variables(requirements: Dict[str, str]) -> Dict[str, str]:
+    """根据性能画像推导模板变量（没有画像时为默认值）
+
+    Args:
+        requirements: 需求字典
+
+    Returns:
+        模板变量字典
+    """
+    pool_size, max_overflow = POOL_SIZES.get(requirements.get("expected_load", ""), POOL_SIZES["低"])
+    jobs, threads = PARALLELISM.get(requirements.get("workload", ""), (1, False))
+    return {
+        "db_pool_size": str(pool_size),
+        "db_max_overflow": str(max_overflow),
+        "cli_jobs": str(jobs),
+        "cli_threads": str(threads),
+        "chunk_size": str(CHUNK_SIZES.get(requirements.get("data_volume", ""), CHUNK_SIZES["中"])),
+        "worker_concurrency": str(WORKER_CONCURRENCY.get(requirements.get("workload", ""), 4)),
+    }
+
+
+def apply_performance_defaults(requirements: Dict[str, str]) -> Dict[str, str]:
+    """用性能画像补全未明确回答的布局选项（已有的回答不会被覆盖）
+
+    - 高负载：使用生产配置（Gunicorn 多进程等）
+    - 高负载或严格延迟目标：启用响应缓存
+    - 中高负载：启用 Prometheus 指标
+
+    Args:
+        requirements: 需求字典
+
+    Returns:
+        补全后的新需求字典
+    """
+    result = dict(requirements)
+    load = requirements.get("expected_load")
+    if load == "高":
+        result.setdefault("server_profile", "生产")
+
+    features = []
+    if load == "高" or requirements.get("latency_slo") == "严格":
+        features.append("缓存")
+    if load in ("中", "高"):
+        features.append("指标")
+    if features:
+        result.setdefault("features", ", ".join(features))
+    return result
+
+
+def performance_guidance(requirements: Dict[str, str]) -> List[str]:
+    """把性能画像转换为代码生成的具体要求
+
+    Args:
+        requirements: 需求字典
+
+    Returns:
+        要求列表（没有画像时为空）
+    """
+    guidance = []
+    load = requirements.get("expected_load")
+    volume = requirements.get("data_volume")
+    slo = requirements.get("latency_slo")
+    workload = requirements.get("workload")
+
+    if workload == "I/O 密集":
+        guidance.append("I/O 密集：使用 async/await 或线程池并发等待 I/O，网络和数据库连接使用连接池复用")
+    elif workload == "CPU 密集":
+        guidance.append("CPU 密集：计算放到进程池（concurrent.futures.ProcessPoolExecutor）中并行，不要在事件循环中直接执行")
+    elif workload == "混合":
+        guidance.append("混合负载：I/O 使用 async/await，重计算部分放到进程池中执行")
+
+    if load == "高":
+        guidance.append("高负载：避免每个请求重复创建客户端和连接，热点读取加缓存，使用多进程部署")
+    elif load == "中":
+        guidance.append("中等负载：复用连接和客户端对象，为热点接口预留缓存")
+
+    if volume == "大":
+        guidance.append("大数据量：流式读取和输出（生成器、分页、StreamingResponse），按批写入，不要一次性加载到内存")
+    elif volume == "中":
+        guidance.append("中等数据量：列表接口分页，批量处理时按块读取")
+
+    if slo == "严格":
+        guidance.append("严格延迟目标：请求路径上避免阻塞调用和同步 I/O，慢操作异步化或放到后台任务")
+    elif slo == "一般":
+        guidance.append("延迟目标 p99 < 500ms：为外部调用设置超时")
+
+    return guidance
@@ -0,0 +1,278 @@
+"""
+任务清单相似度缓存模块
+
+为历史需求及其验证通过的任务清单建立本地索引。新需求的项目类型、数据库、
+Docker 选项完全一致，且用途描述的 TF-IDF 余弦相似度超过阈值时，
+直接复用历史任务清单（替换项目名称和变量），省去一次任务规划调用。
+"""
+
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import get_templates_dir
+from .task_generator import TaskList
+from .utils.template_loader import TemplateLoader, derive_template_variables, resolve_template_type
+
+# 任务参数中表示路径的字段（只改写这些字段中的项目目录和包目录）
+PATH_PARAMS = ("path", "cwd")
+
+
+# 必须完全一致的需求字段
+EXACT_MATCH_FIELDS = (
+    "project_type", "database", "docker", "server_profile", "features",
+    # 性能画像会补全布局选项（见 performance.apply_performance_defaults）
+    "expected_load", "latency_slo",
+)
+
+# 对区分项目没有帮助的通用词
+STOPWORDS = {
+    "a", "an", "the", "for", "to", "of", "and", "with", "that", "in", "on",
+    "cli", "tool", "tools", "app", "application", "api", "service", "project",
+    "simple", "python", "program", "command", "line",
+    "工具", "一个", "项目", "程序", "应用", "命令", "命令行", "简单", "服务",
+}
+
+
+def _stem(word: str) -> str:
+    """极简词干提取：去掉常见英文后缀"""
+    for suffix in ("ing", "ers", "er", "ed", "es", "s"):
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            word = word[:-len(suffix)]
+            break
+    # renam(e) -> renam
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """把用途描述切分为特征词
+
+    英文按单词切分并做词干提取，中文按相邻字符二元组切分。
+
+    Args:
+        text: 用途描述
+
+    Returns:
+        特征词列表
+    """
+    text = text.lower()
+    tokens: List[str] = []
+
+    for word in re.findall(r"[a-z0-9]+", text):
+        if word not in STOPWORDS:
+            tokens.append(_stem(word))
+
+    for segment in re.findall(r"[一-鿿]+", text):
+        for stopword in STOPWORDS:
+            if not stopword.isascii():
+                segment = segment.replace(stopword, " ")
+        for part in segment.split():
+            if len(part) == 1:
+                tokens.append(part)
+            tokens.extend(part[i:i + 2] for i in range(len(part) - 1))
+
+    return tokens
+
+
+def tfidf_similarity(query: List[str], documents: List[List[str]]) -> List[float]:
+    """计算查询与每个文档的 TF-IDF 余弦相似度
+
+    Args:
+        query: 查询特征词
+        documents: 文档特征词列表
+
+    Returns:
+        与每个文档的相似度
+    """
+    corpus = documents + [query]
+    doc_freq = Counter(token for doc in corpus for token in set(doc))
+    total = len(corpus)
+
+    def vectorize(tokens: List[str]) -> Dict[str, float]:
+        counts = Counter(tokens)
+        return {
+            token: count * (math.log((1 + total) / (1 + doc_freq[token])) + 1)
+            for token, count in counts.items()
+        }
+
+    def norm(vector: Dict[str, float]) -> float:
+        return math.sqrt(sum(v * v for v in vector.values()))
+
+    query_vector = vectorize(query)
+    query_norm = norm(query_vector)
+    scores = []
+    for doc in documents:
+        doc_vector = vectorize(doc)
+        denominator = query_norm * norm(doc_vector)
+        if not denominator:
+            scores.append(0.0)
+            continue
+        dot = sum(weight * doc_vector.get(token, 0.0) for token, weight in query_vector.items())
+        scores.append(dot / denominator)
+    return scores
+
+
+def _exact_key(requirements: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(str(requirements.get(field, "")).strip() for field in EXACT_MATCH_FIELDS)
+
+
+class PlanCache:
+    """任务清单相似度缓存"""
+
+    def __init__(self, cache_dir: Path, threshold: float = 0.6, max_entries: int = 200):
+        """初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            threshold: 复用所需的最低相似度（0-1）
+            max_entries: 最多保留的历史条目数（超出时淘汰最旧的）
+        """
+        self.index_file = Path(cache_dir) / "plans.json"
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> Dict:
+        """读取索引文件，损坏或不存在时返回空索引"""
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            data.setdefault("entries", [])
+            data.setdefault("stats", {"lookups": 0, "hits": 0, "reused": 0})
+            return data
+        except (OSError, ValueError):
+            return {"entries": [], "stats": {"lookups": 0, "hits": 0, "reused": 0}}
+
+    def _save(self):
+        """原子写入索引文件"""
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.index_file.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_file)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """查询统计（含命中率）"""
+        stats = dict(self._data["stats"])
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
+
+    def lookup(self, requirements: Dict[str, str]) -> Optional[Tuple[float, Dict]]:
+        """查找最相似的历史任务清单
+
+        Args:
+            requirements: 新需求
+
+        Returns:
+            (相似度, 历史条目)，没有超过阈值的条目时返回 None
+        """
+        with self._lock:
+            self._data["stats"]["lookups"] += 1
+            key = _exact_key(requirements)
+            candidates = [
+                entry for entry in self._data["entries"]
+                if _exact_key(entry["requirements"]) == key
+            ]
+
+            best = None
+            if candidates:
+                scores = tfidf_similarity(
+                    tokenize(requirements.get("purpose", "")),
+                    [tokenize(entry["requirements"].get("purpose", "")) for entry in candidates]
+                )
+                score, entry = max(zip(scores, candidates), key=lambda item: item[0])
+                if score >= self.threshold:
+                    best = (score, entry)
+                    self._data["stats"]["hits"] += 1
+
+            self._save()
+            return best
+
+    def record_reuse(self):
+        """记录一次缓存复用"""
+        with self._lock:
+            self._data["stats"]["reused"] += 1
+            self._save()
+
+    def add(self, requirements: Dict[str, str], task_list: TaskList):
+        """把验证通过的任务清单加入缓存
+
+        Args:
+            requirements: 需求
+            task_list: 执行成功的任务清单
+        """
+        with self._lock:
+            self._data["entries"].append({
+                "requirements": dict(requirements),
+                "task_list": task_list.model_dump(),
+                "created_at": time.time(),
+            })
+            self._data["entries"] = self._data["entries"][-self.max_entries:]
+            self._save()
+
+    @staticmethod
+    def adapt(entry: Dict, requirements: Dict[str, str]) -> TaskList:
+        """把历史任务清单改写为新需求的任务清单
+
+        只改写结构化字段：项目名称、路径开头的项目目录和包目录、模板变量。模板路径、任务描述和文件内容
+        保持不变（其中的 {{project_name}} 等占位符在执行时按新变量渲染）。
+
+        Args:
+            entry: 历史条目
+            requirements: 新需求
+
+        Returns:
+            改写后的任务清单
+        """
+        old_variables = derive_template_variables(entry["requirements"])
+        new_variables = derive_template_variables(requirements)
+        rename_module = _uses_module_dir(requirements)
+
+        def rename(path: str) -> str:
+            parts = path.split("/")
+            if parts[0] == old_variables["project_name"]:
+                parts[0] = new_variables["project_name"]
+            if rename_module and len(parts) > 1 and parts[1] == old_variables["module_name"]:
+                parts[1] = new_variables["module_name"]
+            return "/".join(parts)
+
+        data = json.loads(json.dumps(entry["task_list"]))
+        data["project_name"] = new_variables["project_name"]
+        for task in data["tasks"]:
+            params = task.get("params", {})
+            for item in [params, *params.get("files", [])]:
+                for key in PATH_PARAMS:
+                    if isinstance(item.get(key), str):
+                        item[key] = rename(item[key])
+                variables = item.get("variables")
+                if isinstance(variables, dict):
+                    for name, value in new_variables.items():
+                        if name in variables:
+                            variables[name] = value
+
+        return TaskList(**data)
+
+
+def _uses_module_dir(requirements: Dict[str, str]) -> bool:
+    """模板的包目录是否以模块名命名（如 FastAPI 模板的包目录固定为 app，不随项目名变化）"""
+    template_type = resolve_template_type(requirements)
+    template = TemplateLoader(get_templates_dir()).get_template(template_type) if template_type else None
+    if not template:
+        return True
+    return any("{{module_name}}" in entry.get("path", "") for entry in template.get("layout", []))
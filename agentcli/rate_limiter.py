@@ -0,0 +1,449 @@
+"""
+请求调控模块
+
+为同一进程内所有并发调用方提供共享的限流、退避和熔断能力：
+- 令牌桶限流（每分钟请求数 / 每分钟 token 数）
+- 带抖动的指数退避，优先遵循服务端返回的 Retry-After
+- 区分可重试的瞬时错误与不可重试的致命错误
+- 熔断器：端点持续失败时快速失败，避免重试风暴
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AuthenticationError,
+    BadRequestError,
+    InternalServerError,
+    NotFoundError,
+    PermissionDeniedError,
+    RateLimitError,
+    UnprocessableEntityError,
+)
+
+
+# 可重试的 HTTP 状态码
+TRANSIENT_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被快速拒绝"""
+    pass
+
+
+class TokenBucket:
+    """线程安全的令牌桶"""
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_per_second: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """初始化令牌桶
+
+        Args:
+            capacity: 桶容量（突发上限）
+            refill_per_second: 每秒补充的令牌数
+            clock: 时钟函数（便于测试注入）
+            sleep: 休眠函数（便于测试注入）
+        """
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._last_refill = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        """按时间流逝补充令牌"""
+        now = self._clock()
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+            self._last_refill = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """尝试获取令牌
+
+        Args:
+            amount: 需要的令牌数（超过容量时按容量计算）
+
+        Returns:
+            0 表示获取成功，否则为需要等待的秒数
+        """
+        amount = min(float(amount), self.capacity)
+        with self._lock:
+            self._refill()
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return 0.0
+            return (amount - self.tokens) / self.refill_per_second
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """阻塞直到获取令牌
+
+        Args:
+            amount: 需要的令牌数
+
+        Returns:
+            实际等待的总秒数
+        """
+        waited = 0.0
+        while True:
+            wait_time = self.try_acquire(amount)
+            if wait_time <= 0:
+                return waited
+            self._sleep(wait_time)
+            waited += wait_time
+
+
+class CircuitBreaker:
+    """熔断器
+
+    状态：closed（正常）→ open（快速失败）→ half_open（放行一个探测请求）
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """初始化熔断器
+
+        Args:
+            failure_threshold: 连续失败多少次后打开熔断
+            recovery_timeout: 熔断打开后多久允许探测（秒）
+            clock: 时钟函数（便于测试注入）
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._clock = clock
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """判断当前是否允许发出请求
+
+        Returns:
+            是否允许
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if self._clock() - self._opened_at >= self.recovery_timeout:
+                    self.state = self.HALF_OPEN
+                    self._probe_in_flight = True
+                    return True
+                return False
+            # half_open：只放行一个探测请求
+            if not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def retry_in(self) -> float:
+        """距离允许探测还需等待的秒数"""
+        with self._lock:
+            if self.state != self.OPEN:
+                return 0.0
+            return max(0.0, self.recovery_timeout - (self._clock() - self._opened_at))
+
+    def record_success(self):
+        """记录一次成功，关闭熔断"""
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """放弃正在进行的探测请求（请求因与端点无关的原因结束），不改变熔断状态"""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        """记录一次失败，必要时打开熔断"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if (
+                self.state == self.HALF_OPEN
+                or self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self._opened_at = self._clock()
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """获取异常中的 HTTP 状态码"""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        response = getattr(error, "response", None)
+        status_code = getattr(response, "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_transient_error(error: Exception) -> bool:
+    """判断错误是否为可重试的瞬时错误
+
+    认证失败、权限不足、请求格式错误等致命错误重试无意义，直接失败。
+
+    Args:
+        error: 异常对象
+
+    Returns:
+        是否可重试
+    """
+    fatal_types = (
+        AuthenticationError,
+        PermissionDeniedError,
+        BadRequestError,
+        NotFoundError,
+        UnprocessableEntityError,
+    )
+    if isinstance(error, fatal_types):
+        return False
+
+    transient_types = (
+        APIConnectionError,
+        APITimeoutError,
+        RateLimitError,
+        InternalServerError,
+        ConnectionError,
+        TimeoutError,
+    )
+    if isinstance(error, transient_types):
+        return True
+
+    status_code = get_status_code(error)
+    if status_code is not None:
+        return status_code in TRANSIENT_STATUS_CODES or status_code >= 500
+
+    return bool(getattr(error, "transient", False))
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """从异常的响应头中解析 Retry-After
+
+    支持 `retry-after-ms`、秒数形式的 `retry-after` 以及 HTTP 日期形式。
+
+    Args:
+        error: 异常对象
+
+    Returns:
+        建议等待的秒数，没有时返回 None
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(0.0, float(retry_after_ms) / 1000)
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(retry_after)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def compute_backoff(
+    attempt: int,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    retry_after: Optional[float] = None
+) -> float:
+    """计算退避等待时间（Full Jitter）
+
+    Args:
+        attempt: 当前重试序号（从 0 开始）
+        base_delay: 基础等待时间（秒）
+        max_delay: 最大等待时间（秒）
+        retry_after: 服务端建议的等待时间（秒）
+
+    Returns:
+        等待秒数
+    """
+    delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+    if retry_after is not None:
+        # 服务端明确要求的等待时间优先，加少量抖动避免同时醒来
+        delay = min(max_delay, retry_after) + random.uniform(0, base_delay)
+    return delay
+
+
+class RequestGovernor:
+    """请求调控器（同一端点的所有调用方共享）"""
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0
+    ):
+        """初始化请求调控器
+
+        Args:
+            requests_per_minute: 每分钟请求数上限（0 表示不限制）
+            tokens_per_minute: 每分钟 token 数上限（0 表示不限制）
+            failure_threshold: 熔断阈值（连续失败次数）
+            recovery_timeout: 熔断恢复时间（秒）
+            base_delay: 退避基础等待时间（秒）
+            max_delay: 退避最大等待时间（秒）
+        """
+        self.request_bucket = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60)
+            if requests_per_minute > 0 else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+            if tokens_per_minute > 0 else None
+        )
+        self.breaker = CircuitBreaker(failure_threshold, recovery_timeout)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.stats: Dict[str, float] = {
+            "requests": 0,
+            "retries": 0,
+            "fatal_errors": 0,
+            "transient_errors": 0,
+            "rejected": 0,
+            "throttled_seconds": 0.0,
+        }
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, amount: float = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def before_request(self, estimated_tokens: int = 0) -> float:
+        """请求发出前调用：检查熔断并等待限流令牌
+
+        Args:
+            estimated_tokens: 本次请求预估消耗的 token 数
+
+        Returns:
+            限流等待的秒数
+
+        Raises:
+            CircuitOpenError: 熔断器打开时
+        """
+        if not self.breaker.allow_request():
+            self._count("rejected")
+            raise CircuitOpenError(
+                f"端点连续失败 {self.breaker.consecutive_failures} 次，"
+                f"{self.breaker.retry_in():.0f} 秒后再试"
+            )
+
+        waited = 0.0
+        if self.request_bucket:
+            waited += self.request_bucket.acquire(1)
+        if self.token_bucket and estimated_tokens > 0:
+            waited += self.token_bucket.acquire(estimated_tokens)
+
+        self._count("requests")
+        if waited:
+            self._count("throttled_seconds", waited)
+        return waited
+
+    def record_success(self):
+        """记录请求成功"""
+        self.breaker.record_success()
+
+    def release(self):
+        """请求因程序错误等与端点无关的原因结束：不计入成功或失败，只释放半开探测名额"""
+        self.breaker.release_probe()
+
+    def record_failure(self, error: Exception) -> bool:
+        """记录请求失败
+
+        只有瞬时错误才计入熔断；致命错误说明端点本身可达。
+
+        Args:
+            error: 异常对象
+
+        Returns:
+            该错误是否可重试
+        """
+        transient = is_transient_error(error)
+        if transient:
+            self._count("transient_errors")
+            self.breaker.record_failure()
+        else:
+            self._count("fatal_errors")
+            self.breaker.record_success()
+        return transient
+
+    def backoff_delay(self, attempt: int, error: Optional[Exception] = None) -> float:
+        """计算下一次重试前的等待时间
+
+        Args:
+            attempt: 当前重试序号（从 0 开始）
+            error: 触发重试的异常
+
+        Returns:
+            等待秒数
+        """
+        self._count("retries")
+        retry_after = get_retry_after(error) if error is not None else None
+        return compute_backoff(attempt, self.base_delay, self.max_delay, retry_after)
+
+
+_governors: Dict[str, RequestGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_governor(key: str, **kwargs) -> RequestGovernor:
+    """获取（或创建）指定端点的共享请求调控器
+
+    Args:
+        key: 端点标识（通常为 base_url）
+        **kwargs: 首次创建时传给 RequestGovernor 的参数
+
+    Returns:
+        请求调控器
+    """
+    with _governors_lock:
+        governor = _governors.get(key)
+        if governor is None:
+            governor = RequestGovernor(**kwargs)
+            _governors[key] = governor
+        return governor
+
+
+def reset_governors():
+    """清空所有共享的请求调控器（主要用于测试）"""
+    with _governors_lock:
+        _governors.clear()
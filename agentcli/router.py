@@ -0,0 +1,68 @@
+"""
+端点路由模块
+
+根据滑动平均延迟和健康状态，为每次调用挑选最快的可用端点，失败时自动切换。
+"""
+
+import threading
+from typing import Dict, List
+
+from .config import RouteEndpoint
+from .rate_limiter import CircuitBreaker, RequestGovernor
+
+
+class EndpointRouter:
+    """延迟感知的端点路由器"""
+
+    def __init__(self, smoothing: float = 0.3):
+        """初始化路由器
+
+        Args:
+            smoothing: 指数滑动平均系数（越大越偏向最近的观测）
+        """
+        self.smoothing = smoothing
+        self.latencies: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record_latency(self, endpoint: RouteEndpoint, latency: float):
+        """记录一次成功调用的延迟
+
+        Args:
+            endpoint: 端点
+            latency: 延迟（秒）
+        """
+        with self._lock:
+            previous = self.latencies.get(endpoint.key)
+            if previous is None:
+                self.latencies[endpoint.key] = latency
+            else:
+                self.latencies[endpoint.key] = (
+                    self.smoothing * latency + (1 - self.smoothing) * previous
+                )
+
+    def order(
+        self,
+        endpoints: List[RouteEndpoint],
+        governors: Dict[str, RequestGovernor]
+    ) -> List[RouteEndpoint]:
+        """按优先级排列候选端点
+
+        健康端点在前、熔断中的端点在后；同类端点按滑动平均延迟升序排列，
+        尚无延迟数据的端点视为最快（以便探测），延迟相同时保持配置顺序。
+
+        Args:
+            endpoints: 候选端点（按配置优先级排列）
+            governors: 端点 base_url -> 请求调控器
+
+        Returns:
+            排序后的端点列表
+        """
+        def sort_key(item):
+            index, endpoint = item
+            governor = governors.get(endpoint.base_url)
+            unhealthy = governor is not None and governor.breaker.state == CircuitBreaker.OPEN
+            with self._lock:
+                latency = self.latencies.get(endpoint.key, 0.0)
+            return (unhealthy, latency, index)
+
+        return [endpoint for _, endpoint in sorted(enumerate(endpoints), key=sort_key)]
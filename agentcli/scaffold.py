@@ -0,0 +1,174 @@
+"""
+非交互式项目生成模块
+
+Scaffolder 持有预热的配置、系统提示词、模板注册表和 AI 客户端（含连接池），
+按需求字典直接规划并生成项目，供守护进程、批量任务等非交互场景复用。
+"""
+
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .ai_client import AIClient
+from .config import Config, get_templates_dir
+from .task_executor import TaskExecutor
+from .task_generator import TaskGenerator, TaskList
+from .utils.template_loader import TemplateLoader
+
+
+class Scaffolder:
+    """非交互式项目生成器（可在多个线程中共享）"""
+
+    def __init__(self, config: Config):
+        """初始化生成器，预先加载所有可复用的资源
+
+        Args:
+            config: 配置对象
+        """
+        self.config = config
+        self.templates_dir = get_templates_dir(config)
+        self.template_loader = TemplateLoader(self.templates_dir)
+        self.ai_client = AIClient(config)
+
+        self.plan_cache = None
+        if config.plan_cache_enabled:
+            from .plan_cache import PlanCache
+            self.plan_cache = PlanCache(config.cache_dir, config.plan_cache_threshold)
+
+        self.artifact_store = None
+        if config.artifact_cache_enabled:
+            from .artifact_store import ArtifactStore
+            self.artifact_store = ArtifactStore(config.cache_dir / "artifacts", config.artifact_link_mode)
+
+    def _make_executor(
+        self,
+        requirements: Dict[str, str],
+        output_dir: Path,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> TaskExecutor:
+        return TaskExecutor(
+            self.templates_dir,
+            output_dir,
+            ai_client=self.ai_client,
+            requirements=requirements,
+            artifact_store=self.artifact_store,
+            on_event=on_event
+        )
+
+    def plan(
+        self,
+        requirements: Dict[str, str],
+        offline: bool = False,
+        confirm_reuse: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Optional[TaskList]:
+        """生成任务清单
+
+        Args:
+            requirements: 需求字典
+            offline: 是否直接从模板生成（不调用 AI）
+            confirm_reuse: 命中相似需求的缓存任务清单时询问是否复用，为 None 时直接复用
+
+        Returns:
+            任务清单，失败返回 None
+        """
+        if offline:
+            return TaskGenerator().generate_offline_tasks(requirements, self.template_loader)
+
+        task_generator = TaskGenerator(self.ai_client, plan_cache=self.plan_cache)
+        return task_generator.generate_tasks(
+            requirements, [],
+            auto_reuse=confirm_reuse is None,
+            confirm_reuse=confirm_reuse
+        )
+
+    def execute(
+        self,
+        requirements: Dict[str, str],
+        task_list: TaskList,
+        output_dir: Path,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """执行任务清单
+
+        Args:
+            requirements: 需求字典
+            task_list: 任务清单
+            output_dir: 输出目录
+            on_event: 进度事件回调
+
+        Returns:
+            执行结果（success、project_name、project_path、elapsed）
+        """
+        started_at = time.perf_counter()
+        output_dir = Path(output_dir).resolve()
+        task_executor = self._make_executor(requirements, output_dir, on_event)
+
+        success = task_executor.execute(task_list)
+        if success and self.plan_cache:
+            self.plan_cache.add(requirements, task_list)
+
+        project_name = task_executor.project_name or task_list.project_name
+        result = {
+            "success": success,
+            "project_name": project_name,
+            "project_path": str(output_dir / project_name),
+            "cached": False,
+            "elapsed": time.perf_counter() - started_at,
+        }
+        if not success:
+            result["error"] = "项目创建失败"
+        return result
+
+    def run(
+        self,
+        requirements: Dict[str, str],
+        output_dir: Path,
+        offline: bool = False,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """规划并生成项目（产物缓存命中时直接恢复）
+
+        Args:
+            requirements: 需求字典
+            output_dir: 输出目录
+            offline: 是否直接从模板生成（不调用 AI）
+            on_event: 进度事件回调（任务进度和 AI 流式输出的 token 增量）
+
+        Returns:
+            执行结果（success、project_name、project_path、cached、elapsed）
+        """
+        self.ai_client.set_event_listener(on_event)
+        try:
+            return self._run(requirements, Path(output_dir).resolve(), offline, on_event)
+        finally:
+            self.ai_client.set_event_listener(None)
+
+    def _run(
+        self,
+        requirements: Dict[str, str],
+        output_dir: Path,
+        offline: bool,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]]
+    ) -> Dict[str, Any]:
+        started_at = time.perf_counter()
+        cached_project = self._make_executor(requirements, output_dir, on_event).restore_cached_project()
+        if cached_project:
+            return {
+                "success": True,
+                "project_name": cached_project,
+                "project_path": str(output_dir / cached_project),
+                "cached": True,
+                "elapsed": time.perf_counter() - started_at,
+            }
+
+        if on_event:
+            on_event("planning", {"offline": offline})
+        task_list = self.plan(requirements, offline=offline)
+        if not task_list:
+            return {"success": False, "error": "任务清单生成失败", "elapsed": time.perf_counter() - started_at}
+        if on_event:
+            on_event("planned", {"project_name": task_list.project_name, "tasks": len(task_list.tasks)})
+
+        result = self.execute(requirements, task_list, output_dir, on_event)
+        result["elapsed"] = time.perf_counter() - started_at
+        return result
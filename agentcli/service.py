@@ -0,0 +1,424 @@
+"""
+HTTP 服务模块
+
+`agentcli service` 提供项目生成的 HTTP API：提交需求 JSON 后排队，由有界的工作线程池
+执行规划和生成，进度事件和 AI 的 token 增量通过 Server-Sent Events 推送，
+完成后可以下载 zip 压缩包。
+
+接口：
+    POST /jobs                    提交任务 {"requirements": {...}, "offline": false}
+    GET  /jobs/<id>               查询任务状态
+    GET  /jobs/<id>/events        SSE 事件流（支持 Last-Event-ID 续传）
+    GET  /jobs/<id>/archive       下载生成的项目（zip）
+    GET  /healthz                 健康检查与队列状态
+"""
+
+import bisect
+import json
+import queue
+import re
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+from . import __version__
+from .output import console
+
+if TYPE_CHECKING:
+    from .scaffold import Scaffolder
+
+
+# 需求中必须包含的字段
+REQUIRED_FIELDS = ("project_type", "purpose", "project_name")
+
+# SSE 心跳间隔（秒），防止代理断开空闲连接
+HEARTBEAT_SECONDS = 15
+
+
+class QueueFullError(Exception):
+    """任务队列已满"""
+    pass
+
+
+class Job:
+    """一个项目生成任务"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+    def __init__(self, requirements: Dict[str, str], offline: bool = False):
+        self.id = uuid.uuid4().hex[:12]
+        self.requirements = requirements
+        self.offline = offline
+        self.status = self.QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.archive_path: Optional[Path] = None
+        self.events: List[Dict[str, Any]] = []
+        self._last_seq = 0
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def emit(self, kind: str, data: Dict[str, Any]):
+        """追加一个事件并唤醒等待中的 SSE 连接"""
+        with self._cond:
+            self._last_seq += 1
+            self.events.append({"seq": self._last_seq, "event": kind, "data": data})
+            self._cond.notify_all()
+
+    def drop_token_events(self):
+        """丢弃 token 增量事件（任务结束后调用）
+
+        已完成的任务会保留一段时间供查询和续传，token 事件的总量与输出长度成正比，
+        只保留状态和文件事件。事件序号不变，已连接的客户端按 Last-Event-ID 继续读取。
+        """
+        with self._cond:
+            self.events = [event for event in self.events if event["event"] != "token"]
+
+    def set_status(self, status: str, **data):
+        """更新状态并发出 status 事件"""
+        self.status = status
+        self.emit("status", {"status": status, **data})
+
+    def wait_events(self, after: int, timeout: float) -> List[Dict[str, Any]]:
+        """获取序号大于 after 的事件，没有新事件时最多等待 timeout 秒
+
+        Args:
+            after: 已收到的最后一个事件序号
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            新事件列表
+        """
+        with self._cond:
+            if self._last_seq <= after and not self.finished:
+                self._cond.wait(timeout)
+            # 丢弃 token 事件后序号不再连续，按序号而不是下标定位
+            start = bisect.bisect_right(self.events, after, key=lambda event: event["seq"])
+            return self.events[start:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "project_name": self.requirements.get("project_name"),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "archive": f"/jobs/{self.id}/archive" if self.archive_path else None,
+        }
+
+
+class JobManager:
+    """任务队列与有界工作线程池"""
+
+    def __init__(
+        self,
+        scaffolder: "Scaffolder",
+        workspace: Path,
+        workers: int = 4,
+        max_queue: int = 64,
+        retain_jobs: int = 200
+    ):
+        """初始化任务管理器
+
+        Args:
+            scaffolder: 预热的项目生成器（各工作线程共享）
+            workspace: 工作目录（每个任务一个子目录）
+            workers: 工作线程数（同时执行的任务数上限）
+            max_queue: 排队任务数上限，超出时拒绝提交
+            retain_jobs: 保留的已完成任务数，超出时删除最早的任务及其产物
+        """
+        self.scaffolder = scaffolder
+        self.workspace = Path(workspace)
+        self.workers = workers
+        self.retain_jobs = retain_jobs
+        self.jobs: Dict[str, Job] = {}
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        """启动工作线程"""
+        self.workspace.mkdir(parents=True, exist_ok=True)
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"agentcli-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """停止工作线程（等待正在执行的任务完成）"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def submit(self, requirements: Dict[str, str], offline: bool = False) -> Job:
+        """提交任务
+
+        Args:
+            requirements: 需求字典
+            offline: 是否直接从模板生成
+
+        Returns:
+            任务对象
+
+        Raises:
+            QueueFullError: 排队任务数已达上限
+        """
+        job = Job(requirements, offline)
+        with self._lock:
+            self.jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self.jobs[job.id]
+            raise QueueFullError("任务队列已满，请稍后重试")
+        job.emit("status", {"status": Job.QUEUED, "position": self._queue.qsize()})
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        """队列与任务状态统计"""
+        with self._lock:
+            counts = {status: 0 for status in (Job.QUEUED, Job.RUNNING, Job.SUCCEEDED, Job.FAILED)}
+            for job in self.jobs.values():
+                counts[job.status] += 1
+        return {"workers": self.workers, "queue_size": self._queue.qsize(), **counts}
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                self._evict()
+
+    def _run(self, job: Job):
+        """执行一个任务"""
+        job.started_at = time.time()
+        job.set_status(Job.RUNNING)
+        output_dir = self.workspace / job.id
+
+        try:
+            result = self.scaffolder.run(job.requirements, output_dir, offline=job.offline, on_event=job.emit)
+            if result["success"]:
+                job.archive_path = self._archive(output_dir, job.id)
+            job.result = result
+            job.error = result.get("error")
+        except Exception as e:
+            job.result = None
+            job.error = str(e)
+
+        job.finished_at = time.time()
+        if job.error:
+            job.set_status(Job.FAILED, error=job.error)
+        else:
+            job.set_status(Job.SUCCEEDED, archive=f"/jobs/{job.id}/archive")
+        job.drop_token_events()
+
+    def _archive(self, output_dir: Path, job_id: str) -> Path:
+        """把任务输出目录打包为 zip（先写临时文件再替换）"""
+        archive_path = self.workspace / f"{job_id}.zip"
+        tmp_path = archive_path.with_suffix(".zip.tmp")
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for path in sorted(output_dir.rglob("*")):
+                if path.is_file() and "__pycache__" not in path.parts:
+                    archive.write(path, path.relative_to(output_dir).as_posix())
+        tmp_path.replace(archive_path)
+        return archive_path
+
+    def _evict(self):
+        """删除超出保留数量的最早已完成任务及其产物"""
+        with self._lock:
+            finished = sorted(
+                (job for job in self.jobs.values() if job.finished),
+                key=lambda job: job.finished_at
+            )
+            expired = finished[:max(0, len(finished) - self.retain_jobs)]
+            for job in expired:
+                del self.jobs[job.id]
+
+        for job in expired:
+            shutil.rmtree(self.workspace / job.id, ignore_errors=True)
+            if job.archive_path and job.archive_path.exists():
+                job.archive_path.unlink()
+
+
+class ServiceRequestHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理"""
+
+    server_version = f"AgentCLI/{__version__}"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # 访问日志只在调试时输出，避免淹没生成过程的输出
+        if self.server.verbose:
+            console.print(f"[dim]{self.address_string()} {format % args}[/dim]")
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _get_job(self, job_id: str) -> Optional[Job]:
+        job = self.server.job_manager.get(job_id)
+        if not job:
+            self._send_json(404, {"error": f"任务不存在: {job_id}"})
+        return job
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            self._send_json(404, {"error": "未知接口"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(payload, dict):
+                raise ValueError("请求体必须是 JSON 对象")
+            requirements = payload.get("requirements")
+            if not isinstance(requirements, dict):
+                raise ValueError("缺少 requirements")
+            missing = [field for field in REQUIRED_FIELDS if not requirements.get(field)]
+            if missing:
+                raise ValueError(f"需求缺少字段: {', '.join(missing)}")
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            job = self.server.job_manager.submit(
+                {k: str(v) for k, v in requirements.items()},
+                offline=bool(payload.get("offline"))
+            )
+        except QueueFullError as e:
+            self._send_json(429, {"error": str(e)}, headers={"Retry-After": "5"})
+            return
+
+        self._send_json(202, {
+            "id": job.id,
+            "status": job.status,
+            "events": f"/jobs/{job.id}/events",
+            "self": f"/jobs/{job.id}",
+        })
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+
+        if path == "/healthz":
+            self._send_json(200, {"ok": True, "version": __version__, **self.server.job_manager.stats()})
+            return
+
+        match = re.fullmatch(r"/jobs/([0-9a-f]+)(/events|/archive)?", path)
+        if not match:
+            self._send_json(404, {"error": "未知接口"})
+            return
+
+        job = self._get_job(match.group(1))
+        if not job:
+            return
+
+        if match.group(2) == "/events":
+            self._stream_events(job)
+        elif match.group(2) == "/archive":
+            self._send_archive(job)
+        else:
+            self._send_json(200, job.to_dict())
+
+    def _stream_events(self, job: Job):
+        """以 SSE 推送任务事件，直到任务结束"""
+        try:
+            after = int(self.headers.get("Last-Event-ID", 0))
+        except ValueError:
+            after = 0
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        try:
+            while True:
+                events = job.wait_events(after, HEARTBEAT_SECONDS)
+                if not events:
+                    if job.finished:
+                        break
+                    self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+                    continue
+                for event in events:
+                    data = json.dumps(event["data"], ensure_ascii=False)
+                    self.wfile.write(f"id: {event['seq']}\nevent: {event['event']}\ndata: {data}\n\n".encode("utf-8"))
+                    after = event["seq"]
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端断开，任务继续执行，可以用 Last-Event-ID 续传
+            pass
+
+    def _send_archive(self, job: Job):
+        """发送项目压缩包"""
+        if not job.finished:
+            self._send_json(409, {"error": "任务尚未完成", "status": job.status})
+            return
+        if not job.archive_path or not job.archive_path.exists():
+            self._send_json(404, {"error": "任务没有可下载的产物", "status": job.status})
+            return
+
+        filename = f"{job.result['project_name']}.zip"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.send_header("Content-Length", str(job.archive_path.stat().st_size))
+        self.end_headers()
+        with open(job.archive_path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+
+class ScaffoldService(ThreadingHTTPServer):
+    """项目生成 HTTP 服务"""
+
+    daemon_threads = True
+    # 默认的监听队列只有 5，并发连接超出时客户端要等 SYN 重传（约 1 秒）
+    request_queue_size = 128
+
+    def __init__(self, address, job_manager: JobManager, verbose: bool = False):
+        """初始化服务
+
+        Args:
+            address: 监听地址 (host, port)
+            job_manager: 任务管理器
+            verbose: 是否输出访问日志
+        """
+        self.job_manager = job_manager
+        self.verbose = verbose
+        super().__init__(address, ServiceRequestHandler)
@@ -6,15 +6,12 @@
 
 import os
 import subprocess
+import time
 from pathlib import Path
-from typing import List, Optional, Dict, Tuple
-
-from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn
-from rich.panel import Panel
+from typing import Any, Callable, List, Optional, Dict, Tuple, TYPE_CHECKING
 
+from .output import console, progress_bar
 from .task_generator import Task, TaskList
-from .ai_client import AIClient
 from .utils.file_ops import (
     create_directory,
     create_file,
@@ -25,8 +22,12 @@ from .utils.code_validator import (
     validate_generated_code,
     check_package_structure
 )
+from .performance import performance_variables
+from .utils.template_loader import database_variables
 
-console = Console()
+if TYPE_CHECKING:
+    from .ai_client import AIClient
+    from .artifact_store import ArtifactStore
 
 
 class TaskExecutor:
@@ -36,9 +37,11 @@ class TaskExecutor:
         self,
         templates_dir: Path,
         output_dir: Path = Path("."),
-        ai_client: Optional[AIClient] = None,
+        ai_client: Optional["AIClient"] = None,
         requirements: Optional[Dict[str, str]] = None,
-        conversation_history: Optional[List[Dict[str, str]]] = None
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        artifact_store: Optional["ArtifactStore"] = None,
+        on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
     ):
         """初始化任务执行器
         
@@ -48,6 +51,8 @@ class TaskExecutor:
             ai_client: AI 客户端（用于生成代码文件内容）
             requirements: 需求信息字典（用于代码生成）
             conversation_history: 对话历史（用于代码生成）
+            artifact_store: 项目产物缓存（为 None 时不使用缓存）
+            on_event: 进度事件回调 (事件类型, 数据)，用于服务模式推送进度
         """
         self.templates_dir = templates_dir
         self.output_dir = output_dir
@@ -58,6 +63,13 @@ class TaskExecutor:
         self.created_paths: List[Path] = []
         self.project_name: Optional[str] = None
         self.project_variables: Dict[str, str] = {}
+        self.artifact_store = artifact_store
+        self.on_event = on_event
+    
+    def _emit(self, kind: str, **data):
+        """通知进度事件回调"""
+        if self.on_event:
+            self.on_event(kind, data)
     
     def replace_variables(self, text: str, variables: Dict[str, str]) -> str:
         """替换文本中的变量
@@ -104,7 +116,10 @@ class TaskExecutor:
                 "module_name": module_name or "my_project",
                 "description": self.project_variables.get("description", "项目描述"),
                 "author_name": self.project_variables.get("author_name", "开发者"),
-                "author_email": self.project_variables.get("author_email", "developer@example.com")
+                "author_email": self.project_variables.get("author_email", "developer@example.com"),
+                **database_variables(self.project_variables.get("database_type", "不需要"), project_name or "my-project"),
+                "server_profile": "development",
+                **performance_variables({})
             }
             
             # 合并项目变量
@@ -247,11 +262,27 @@ class TaskExecutor:
         Returns:
             是否成功
         """
+        # 批量创建文件：params.files 中的每一项都是一个独立的文件参数，共享任务级变量
+        files = task.params.get("files")
+        if files:
+            shared_variables = task.params.get("variables", {})
+            for file_params in files:
+                params = dict(file_params)
+                params["variables"] = {**shared_variables, **params.get("variables", {})}
+                if not self.execute_create_file(task.model_copy(update={"params": params})):
+                    return False
+            return True
+        
+        variables = task.params.get("variables", {})
         path_str = task.params.get("path", "")
         if not path_str:
             console.print(f"[red]任务 {task.id} 缺少 path 参数[/red]")
             return False
         
+        # 路径中也可以包含变量（如 {{project_name}}/README.md）
+        if variables:
+            path_str = self.replace_variables(path_str, variables)
+        
         # 验证路径
         if not validate_path(path_str):
             console.print(f"[red]无效的路径: {path_str}[/red]")
@@ -265,7 +296,6 @@ class TaskExecutor:
             content = task.params.get("content")
         
         template = task.params.get("template")
-        variables = task.params.get("variables", {})
         
         if content:
             # 直接使用提供的内容或生成的代码内容
@@ -287,6 +317,7 @@ class TaskExecutor:
         success = create_file(full_path, content)
         if success:
             self.created_paths.append(full_path)
+            self._emit("file_written", path=path_str)
         
         return success
     
@@ -312,6 +343,80 @@ class TaskExecutor:
         
         return execute_command(command, cwd)
     
+    def _use_chunked_generation(self, task: Task) -> bool:
+        """是否对该代码文件使用分块生成（先骨架、后并行填充函数体）"""
+        if not task.params.get("path", "").endswith(".py"):
+            return False
+        mode = getattr(self.ai_client.config, "chunked_generation", "off")
+        return mode == "always" or (mode == "auto" and bool(task.params.get("chunked")))
+    
+    def generate_and_write(self, task: Task) -> bool:
+        """生成单个代码文件，验证通过后立即写入磁盘
+        
+        上下文每次从磁盘上已写入的文件重新收集，内存中只保留当前正在生成的文件。
+        
+        Args:
+            task: 代码文件任务
+            
+        Returns:
+            是否成功
+        """
+        path_str = task.params.get("path", "")
+        code_description = task.params.get("code_description", task.description)
+        
+        # 收集已创建的文件内容和项目结构
+        created_files, project_structure = self._collect_project_context()
+        
+        generated_content = None
+        if self._use_chunked_generation(task):
+            from .chunked import ChunkedGenerator
+            generated_content = ChunkedGenerator(self.ai_client, self.ai_client.config.chunk_workers).generate(
+                path_str, task.description, code_description, self.requirements, created_files, project_structure
+            )
+            if not generated_content:
+                console.print(f"[yellow]分块生成失败，改为整文件生成: {path_str}[/yellow]")
+        
+        if not generated_content:
+            generated_content = self.ai_client.generate_code_content(
+                file_path=path_str,
+                task_description=task.description,
+                code_description=code_description,
+                requirements=self.requirements,
+                conversation_history=self.conversation_history,
+                created_files=created_files,
+                project_structure=project_structure,
+                stream=True
+            )
+        
+        if not generated_content:
+            console.print(f"[red]✗[/red] 生成代码失败: {path_str}")
+            return False
+        
+        # 验证生成的代码
+        is_valid, issues = validate_generated_code(
+            generated_content,
+            path_str,
+            self.output_dir,
+            created_files
+        )
+        self._emit("file_validated", path=path_str, valid=is_valid, issues=issues)
+        
+        if issues:
+            console.print(f"[yellow]代码验证警告 ({path_str}):[/yellow]")
+            for issue in issues:
+                console.print(f"  {issue}")
+        
+        if not is_valid:
+            console.print(f"[red]✗[/red] 生成的代码验证失败: {path_str}")
+            console.print("[yellow]请检查代码语法错误[/yellow]")
+            return False
+        
+        if not self.execute_create_file(task, generated_content):
+            console.print(f"[red]✗[/red] {task.name} - 创建失败")
+            return False
+        
+        return True
+    
     def execute_single_task(self, task: Task, generated_content: Optional[str] = None) -> bool:
         """执行单个任务
         
@@ -332,15 +437,55 @@ class TaskExecutor:
             console.print(f"[red]未知的任务类型: {task.type}[/red]")
             return False
     
+    def _fingerprint(self) -> Optional[str]:
+        """当前需求的指纹（未启用产物缓存或没有需求时为 None）"""
+        if not self.artifact_store or not self.requirements:
+            return None
+        from .artifact_store import requirements_fingerprint
+        return requirements_fingerprint(self.requirements, self.templates_dir)
+    
+    def restore_cached_project(self) -> Optional[str]:
+        """从产物缓存中恢复相同需求的已验证项目
+        
+        Returns:
+            恢复的项目名称，未命中时返回 None
+        """
+        fingerprint = self._fingerprint()
+        if not fingerprint:
+            return None
+        
+        manifest = self.artifact_store.lookup(fingerprint)
+        if not manifest:
+            return None
+        
+        started_at = time.perf_counter()
+        counts = self.artifact_store.materialize(manifest, self.output_dir)
+        if counts is None:
+            return None
+        
+        self.project_name = manifest["project_name"]
+        self._emit("cache_restored", project_name=self.project_name, files=len(manifest["files"]))
+        methods = "、".join(f"{name} {count}" for name, count in counts.items() if count)
+        console.print(
+            f"[green]✓[/green] 命中项目产物缓存，已恢复 {len(manifest['files'])} 个文件"
+            f"（{methods}，耗时 {(time.perf_counter() - started_at) * 1000:.0f}ms）"
+        )
+        return self.project_name
+    
     def execute(self, task_list: TaskList) -> bool:
         """执行任务清单
         
+        相同需求和模板版本的项目已成功生成过时，直接从产物缓存恢复。
+        
         Args:
             task_list: 任务清单对象
             
         Returns:
             是否全部成功
         """
+        if self.restore_cached_project():
+            return True
+        
         # 设置项目信息，用于变量替换
         self.project_name = task_list.project_name
         # 从任务中提取变量信息
@@ -369,13 +514,7 @@ class TaskExecutor:
         total_non_code = len(non_code_tasks)
         success_count = 0
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-            console=console
-        ) as progress:
+        with progress_bar() as progress:
             
             task_progress = progress.add_task(
                 "[cyan]执行非代码任务",
@@ -388,14 +527,17 @@ class TaskExecutor:
                     description=f"[cyan]正在执行: {task.name}"
                 )
                 
+                self._emit("task_started", id=task.id, name=task.name)
                 success = self.execute_single_task(task)
                 
                 if success:
                     console.print(f"[green]✓[/green] {task.name}")
                     success_count += 1
                     self.executed_tasks.append(task)
+                    self._emit("task_completed", id=task.id, name=task.name)
                 else:
                     console.print(f"[red]✗[/red] {task.name} - 执行失败")
+                    self._emit("task_failed", id=task.id, name=task.name)
                     console.print(f"[yellow]任务执行中止（已完成 {success_count}/{total_non_code} 个非代码任务）[/yellow]")
                     return False
                 
@@ -403,109 +545,30 @@ class TaskExecutor:
         
         console.print(f"\n[green]非代码任务执行完成！（{success_count}/{total_non_code}）[/green]\n")
         
-        # 第二阶段：批量生成所有代码文件内容
+        # 第二阶段：逐个生成、验证并写入代码文件（流水线，生成一个写一个）
         if code_file_tasks:
-            console.print("[bold yellow]阶段 2: 生成代码文件内容[/bold yellow]\n")
-            
-            # 收集已创建的文件内容和项目结构
-            created_files, project_structure = self._collect_project_context()
-            
-            # 批量生成所有代码文件内容
-            code_contents: Dict[int, str] = {}  # task.id -> generated content
+            console.print("[bold yellow]阶段 2: 生成并写入代码文件[/bold yellow]\n")
             
-            for task in code_file_tasks:
-                path_str = task.params.get("path", "")
-                task_description = task.description
-                code_description = task.params.get("code_description", task_description)
-                
-                if not self.ai_client:
-                    console.print(f"[red]错误: 无法生成代码文件 {path_str}，缺少 AI 客户端[/red]")
-                    return False
-                
-                # 生成代码内容
-                generated_content = self.ai_client.generate_code_content(
-                    file_path=path_str,
-                    task_description=task_description,
-                    code_description=code_description,
-                    requirements=self.requirements,
-                    conversation_history=self.conversation_history,
-                    created_files=created_files,
-                    project_structure=project_structure,
-                    stream=True
-                )
-                
-                if generated_content:
-                    # 验证生成的代码
-                    is_valid, issues = validate_generated_code(
-                        generated_content,
-                        path_str,
-                        self.output_dir,
-                        created_files
-                    )
-                    
-                    if issues:
-                        console.print(f"[yellow]代码验证警告 ({path_str}):[/yellow]")
-                        for issue in issues:
-                            console.print(f"  {issue}")
-                    
-                    if not is_valid:
-                        console.print(f"[red]✗[/red] 生成的代码验证失败: {path_str}")
-                        console.print("[yellow]请检查代码语法错误[/yellow]")
-                        return False
-                    
-                    code_contents[task.id] = generated_content
-                    # 更新已创建的文件列表（用于后续代码生成）
-                    created_files[path_str] = generated_content
-                else:
-                    console.print(f"[red]✗[/red] 生成代码失败: {path_str}")
-                    return False
-            
-            console.print(f"\n[green]代码生成完成！（{len(code_contents)}/{len(code_file_tasks)}）[/green]\n")
-            
-            # 第三阶段：创建所有代码文件
-            console.print("[bold yellow]阶段 3: 创建代码文件[/bold yellow]\n")
+            if not self.ai_client:
+                console.print("[red]错误: 无法生成代码文件，缺少 AI 客户端[/red]")
+                return False
             
             total_code = len(code_file_tasks)
             code_success_count = 0
             
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                BarColumn(),
-                TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-                console=console
-            ) as progress:
-                
-                task_progress = progress.add_task(
-                    "[cyan]创建代码文件",
-                    total=total_code
-                )
+            for task in code_file_tasks:
+                self._emit("task_started", id=task.id, name=task.name)
+                if not self.generate_and_write(task):
+                    self._emit("task_failed", id=task.id, name=task.name)
+                    console.print(f"[yellow]任务执行中止（已完成 {code_success_count}/{total_code} 个代码文件）[/yellow]")
+                    return False
                 
-                for task in code_file_tasks:
-                    progress.update(
-                        task_progress,
-                        description=f"[cyan]正在创建: {task.name}"
-                    )
-                    
-                    generated_content = code_contents.get(task.id)
-                    if generated_content:
-                        success = self.execute_create_file(task, generated_content)
-                        
-                        if success:
-                            console.print(f"[green]✓[/green] {task.name}")
-                            code_success_count += 1
-                            self.executed_tasks.append(task)
-                        else:
-                            console.print(f"[red]✗[/red] {task.name} - 创建失败")
-                            console.print(f"[yellow]任务执行中止（已完成 {code_success_count}/{total_code} 个代码文件）[/yellow]")
-                            return False
-                    else:
-                        console.print(f"[red]✗[/red] {task.name} - 缺少生成的代码内容")
-                        return False
-                    
-                    progress.update(task_progress, advance=1)
+                console.print(f"[green]✓[/green] {task.name}")
+                code_success_count += 1
+                self.executed_tasks.append(task)
+                self._emit("task_completed", id=task.id, name=task.name)
             
-            console.print(f"\n[green]代码文件创建完成！（{code_success_count}/{total_code}）[/green]\n")
+            console.print(f"\n[green]代码文件生成完成！（{code_success_count}/{total_code}）[/green]\n")
         
         total_tasks = len(task_list.tasks)
         total_success = len(self.executed_tasks)
@@ -525,6 +588,14 @@ class TaskExecutor:
                     console.print(f"  - {missing}")
                 console.print("[dim]提示: 这些文件可能需要手动创建或在下一次生成时添加[/dim]")
         
+        # 存入产物缓存，供相同需求的下一次运行直接恢复
+        fingerprint = self._fingerprint()
+        if fingerprint and self.project_name and (self.output_dir / self.project_name).is_dir():
+            try:
+                self.artifact_store.ingest(fingerprint, self.output_dir, self.project_name)
+            except OSError as e:
+                console.print(f"[yellow]警告: 写入项目产物缓存失败: {e}[/yellow]")
+        
         return True
     
     def show_next_steps(self, task_list: TaskList):
@@ -553,6 +624,7 @@ class TaskExecutor:
 4. 开始开发！
 """
         
+        from rich.panel import Panel
         console.print(Panel(next_steps, border_style="green"))
     
     def rollback(self):
@@ -6,16 +6,21 @@
 
 import json
 import re
-from typing import List, Dict, Optional
+from typing import Any, Callable, List, Dict, Optional, TYPE_CHECKING
 
 from pydantic import BaseModel, Field, validator
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
 
-from .ai_client import AIClient
+from .output import console, is_headless
+from .performance import apply_performance_defaults
+from .utils.template_loader import (
+    TemplateLoader,
+    derive_template_variables,
+    resolve_template_type
+)
 
-console = Console()
+if TYPE_CHECKING:
+    from .ai_client import AIClient
+    from .plan_cache import PlanCache
 
 
 class Task(BaseModel):
@@ -51,16 +56,52 @@ class TaskList(BaseModel):
         return v
 
 
+def show_cached_plan(summary: Dict[str, Any]):
+    """显示命中的缓存任务清单
+
+    Args:
+        summary: 命中信息（score、purpose、hit_rate）
+    """
+    from rich.panel import Panel
+    console.print(Panel.fit(
+        f"[bold]相似度:[/bold] {summary['score']:.2f}\n"
+        f"[bold]历史需求:[/bold] {summary['purpose']}\n"
+        f"[bold]缓存命中率:[/bold] {summary['hit_rate']:.0%}",
+        title="[bold cyan]发现相似项目的任务清单[/bold cyan]",
+        border_style="cyan"
+    ))
+
+
+def ask_reuse_cached_plan(summary: Dict[str, Any]) -> bool:
+    """显示命中的缓存任务清单并询问是否复用
+
+    Args:
+        summary: 命中信息（score、purpose、hit_rate）
+
+    Returns:
+        用户是否选择复用
+    """
+    from rich.prompt import Confirm
+    show_cached_plan(summary)
+    return Confirm.ask("复用该任务清单（跳过 AI 任务规划）？", default=True)
+
+
 class TaskGenerator:
     """任务生成器"""
     
-    def __init__(self, ai_client: AIClient):
+    def __init__(
+        self,
+        ai_client: Optional["AIClient"] = None,
+        plan_cache: Optional["PlanCache"] = None
+    ):
         """初始化任务生成器
         
         Args:
-            ai_client: AI 客户端
+            ai_client: AI 客户端（离线模式下为 None）
+            plan_cache: 任务清单相似度缓存（为 None 时不使用缓存）
         """
         self.ai_client = ai_client
+        self.plan_cache = plan_cache
     
     def extract_task_list_json(self, response: str) -> Optional[str]:
         """从响应中提取任务清单 JSON
@@ -103,20 +144,81 @@ class TaskGenerator:
             return parts[0].strip()
         return ""
     
+    def find_cached_tasks(
+        self,
+        requirements: Dict[str, str],
+        auto_reuse: bool = False,
+        confirm_reuse: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Optional[TaskList]:
+        """在缓存中查找相似需求的任务清单，并询问是否复用
+        
+        Args:
+            requirements: 需求字典
+            auto_reuse: 命中时直接复用，不再询问
+            confirm_reuse: 由调用方决定是否复用（参数为 score、purpose、hit_rate），
+                守护进程用它把选择转交给客户端；为 None 时在本地终端询问
+            
+        Returns:
+            改写后的任务清单，未命中或用户拒绝时返回 None
+        """
+        if not self.plan_cache:
+            return None
+        
+        match = self.plan_cache.lookup(requirements)
+        stats = self.plan_cache.stats
+        if not match:
+            console.print(f"[dim]任务清单缓存未命中（命中率 {stats['hit_rate']:.0%}）[/dim]")
+            return None
+        
+        score, entry = match
+        summary = {
+            "score": score,
+            "purpose": entry["requirements"].get("purpose", ""),
+            "hit_rate": stats["hit_rate"],
+        }
+        if auto_reuse:
+            if not is_headless():
+                show_cached_plan(summary)
+        elif confirm_reuse is not None:
+            if not confirm_reuse(summary):
+                return None
+        elif not ask_reuse_cached_plan(summary):
+            return None
+        
+        try:
+            task_list = self.plan_cache.adapt(entry, requirements)
+        except Exception as e:
+            console.print(f"[yellow]缓存的任务清单无法复用: {e}[/yellow]")
+            return None
+        
+        self.plan_cache.record_reuse()
+        console.print("[green]✓[/green] 已复用缓存的任务清单")
+        return task_list
+    
     def generate_tasks(
         self,
         requirements: Dict[str, str],
-        conversation_history: List[Dict[str, str]]
+        conversation_history: List[Dict[str, str]],
+        auto_reuse: bool = False,
+        confirm_reuse: Optional[Callable[[Dict[str, Any]], bool]] = None
     ) -> Optional[TaskList]:
         """生成任务清单
         
+        优先复用相似需求的缓存任务清单，未命中时调用 AI 生成。
+        
         Args:
             requirements: 需求字典
             conversation_history: 对话历史
+            auto_reuse: 缓存命中时直接复用，不再询问
+            confirm_reuse: 缓存命中时由调用方决定是否复用（见 find_cached_tasks）
             
         Returns:
             任务清单对象，失败返回 None
         """
+        cached = self.find_cached_tasks(requirements, auto_reuse, confirm_reuse)
+        if cached:
+            return cached
+        
         console.print("\n[bold cyan]🤖 AI 正在分析需求并生成任务清单...[/bold cyan]\n")
         console.print("[dim]（以下内容为 AI 实时推理过程）[/dim]\n")
         
@@ -170,12 +272,95 @@ class TaskGenerator:
             
             return None
     
+    def generate_offline_tasks(
+        self,
+        requirements: Dict[str, str],
+        template_loader: TemplateLoader
+    ) -> Optional[TaskList]:
+        """根据模板布局确定性地生成任务清单（不调用 AI）
+        
+        所有文件都从模板渲染，按类别合并为少量批量任务。未明确回答的布局选项按性能画像补全。
+        
+        Args:
+            requirements: 需求字典
+            template_loader: 模板加载器
+            
+        Returns:
+            任务清单对象，找不到模板或模板没有布局时返回 None
+        """
+        requirements = apply_performance_defaults(requirements)
+        template_type = resolve_template_type(requirements)
+        template = template_loader.get_template(template_type) if template_type else None
+        if not template:
+            console.print(f"[red]找不到项目类型对应的模板: {requirements.get('project_type')}[/red]")
+            return None
+        
+        layout = template_loader.get_layout(template_type, requirements)
+        if not layout:
+            console.print(f"[red]模板 {template_type} 没有定义离线布局（template.yaml 中的 layout）[/red]")
+            return None
+        
+        variables = derive_template_variables(requirements)
+        project_name = variables["project_name"]
+        
+        # 需要 __init__.py 的包目录
+        packages = list(template.get("packages", []))
+        for entry in layout:
+            if entry.get("package") and entry["package"] not in packages:
+                packages.append(entry["package"])
+        
+        package_files = [
+            {"path": f"{project_name}/{package}/__init__.py", "content": f'"""\n{package.replace("/", ".")} 包\n"""\n'}
+            for package in packages
+        ]
+        groups: Dict[str, List[Dict]] = {"source": [], "tests": [], "other": []}
+        for entry in layout:
+            path = entry["path"]
+            if not path.endswith(".py"):
+                group = "other"
+            elif "/tests/" in path:
+                group = "tests"
+            else:
+                group = "source"
+            groups[group].append({"path": path, "template": f"{template_type}/{entry['file']}"})
+        
+        tasks = [Task(
+            id=1,
+            name="创建项目目录",
+            description=f"创建项目根目录 {project_name}",
+            type="create_directory",
+            params={"path": project_name}
+        )]
+        for name, description, files in [
+            ("创建包结构", "创建各个包目录的 __init__.py", package_files),
+            ("渲染源代码文件", "从模板渲染应用源代码", groups["source"]),
+            ("渲染测试文件", "从模板渲染测试代码", groups["tests"]),
+            ("渲染配置与文档", "从模板渲染 README、依赖和部署配置", groups["other"]),
+        ]:
+            if files:
+                tasks.append(Task(
+                    id=len(tasks) + 1,
+                    name=name,
+                    description=description,
+                    type="create_file",
+                    params={"files": files, "variables": variables}
+                ))
+        
+        return TaskList(
+            reasoning=f"离线模式：根据模板 {template['name']} 的布局确定性生成，不调用 AI",
+            project_name=project_name,
+            tasks=tasks
+        )
+    
     def show_task_list(self, task_list: TaskList):
         """显示任务清单
         
         Args:
             task_list: 任务清单对象
         """
+        from rich.panel import Panel
+        from rich.table import Table
+        
         console.print("\n")
         console.print(Panel.fit(
             f"[bold]项目名称:[/bold] {task_list.project_name}\n"
@@ -226,11 +411,11 @@ class TaskGenerator:
 if __name__ == "__main__":
     # 测试任务生成器
     from .config import load_config
-    from .ai_client import AIClient
+    from . import ai_client as ai_client_module
     
     try:
         config = load_config()
-        ai_client = AIClient(config)
+        ai_client = ai_client_module.AIClient(config)
         generator = TaskGenerator(ai_client)
         
         # 测试数据
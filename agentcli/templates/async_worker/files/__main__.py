@@ -0,0 +1,8 @@
+"""
+支持通过 python -m {{module_name}} 运行
+"""
+
+from .worker import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+配置管理模块
+
+所有配置都可以通过环境变量覆盖，命令行参数优先于环境变量。
+"""
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def _env_float(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+@dataclass
+class WorkerSettings:
+    """Worker 配置"""
+
+    # 每个阶段的默认并发数，可用 WORKER_<阶段名>_CONCURRENCY 单独覆盖（如 WORKER_ENRICH_CONCURRENCY）
+    concurrency: int = field(default_factory=lambda: _env_int("WORKER_CONCURRENCY", {{worker_concurrency}}))
+    # 阶段之间队列的容量：队列满时上游阻塞（背压），内存占用有上限
+    queue_size: int = field(default_factory=lambda: _env_int("WORKER_QUEUE_SIZE", 1000))
+    # 批量写入：凑满 batch_size 条或距离批次第一条超过 flush_interval 秒时写出
+    batch_size: int = field(default_factory=lambda: _env_int("WORKER_BATCH_SIZE", 100))
+    flush_interval: float = field(default_factory=lambda: _env_float("WORKER_FLUSH_INTERVAL", 0.5))
+    # 收到 SIGTERM 后等待在途数据处理完成的最长时间（秒），应小于编排系统的强制终止宽限期
+    drain_timeout: float = field(default_factory=lambda: _env_float("WORKER_DRAIN_TIMEOUT", 25.0))
+    # 命令行指定的单阶段并发数
+    stage_overrides: Dict[str, int] = field(default_factory=dict)
+
+    def stage_concurrency(self, stage: str) -> int:
+        """获取阶段的并发数
+
+        Args:
+            stage: 阶段名
+
+        Returns:
+            并发数（至少为 1）
+        """
+        if stage in self.stage_overrides:
+            value = self.stage_overrides[stage]
+        else:
+            value = _env_int(f"WORKER_{stage.upper()}_CONCURRENCY", self.concurrency)
+        return max(1, value)
+
+
+def get_settings() -> WorkerSettings:
+    """从环境变量读取配置"""
+    return WorkerSettings()
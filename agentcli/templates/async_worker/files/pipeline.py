@@ -0,0 +1,245 @@
+"""
+异步流水线模块
+
+数据流：source -> 队列 -> 阶段 1（N 个协程） -> 队列 -> ... -> 队列 -> 批量写入 sink
+
+- 背压：阶段之间是有界的 asyncio.Queue，下游处理不过来时上游的 put 会阻塞，直到数据源停止读取
+- 并发：每个阶段由 concurrency 个协程同时消费自己的输入队列
+- 批量写入：sink 每次收到一批数据，摊薄写数据库、发消息等操作的往返开销
+- 优雅退出：request_stop() 后停止读取数据源，已经读入的数据按阶段顺序处理并写出后 run() 才返回
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# 阶段处理函数：返回 None 表示丢弃该条数据
+Handler = Callable[[Any], Awaitable[Optional[Any]]]
+Sink = Callable[[List[Any]], Awaitable[None]]
+
+
+@dataclass
+class Stage:
+    """流水线阶段"""
+
+    name: str
+    handler: Handler
+    concurrency: int = 1
+
+
+@dataclass
+class PipelineStats:
+    """运行统计"""
+
+    received: int = 0
+    written: int = 0
+    dropped: int = 0
+    failed: int = 0
+    batches: int = 0
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: Optional[float] = None
+
+    @property
+    def elapsed(self) -> float:
+        """运行时长（秒）"""
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def throughput(self) -> float:
+        """每秒写出的条数"""
+        return self.written / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class Pipeline:
+    """由有界队列串联的多阶段异步流水线"""
+
+    def __init__(
+        self,
+        source: AsyncIterable[Any],
+        stages: Sequence[Stage],
+        sink: Sink,
+        queue_size: int = 1000,
+        batch_size: int = 100,
+        flush_interval: float = 0.5,
+        drain_timeout: Optional[float] = None
+    ):
+        """初始化流水线
+
+        Args:
+            source: 数据源（异步可迭代对象）
+            stages: 处理阶段（按顺序执行）
+            sink: 批量写入函数
+            queue_size: 每个队列的容量
+            batch_size: 每批最多写出的条数
+            flush_interval: 不满一批时最多等待的秒数
+            drain_timeout: 停止后等待在途数据处理完成的最长秒数（None 表示一直等待）
+        """
+        self.source = source
+        self.stages = list(stages)
+        self.sink = sink
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.drain_timeout = drain_timeout
+        self.stats = PipelineStats()
+        # queues[i] 是第 i 个阶段的输入，最后一个是批量写入的输入
+        self.queues: List[asyncio.Queue] = [
+            asyncio.Queue(maxsize=queue_size) for _ in range(len(self.stages) + 1)
+        ]
+        self._producer: Optional[asyncio.Task] = None
+        self._flush_now = asyncio.Event()
+        self._stopping = False
+
+    def request_stop(self):
+        """停止读取数据源，处理完已读入的数据后退出（可以在信号处理函数中调用）"""
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info("停止读取数据源，等待在途数据处理完成")
+        if self._producer is not None:
+            self._producer.cancel()
+
+    @property
+    def in_flight(self) -> int:
+        """已读入、尚未写出的条数（不含正在被处理的数据）"""
+        return sum(queue.qsize() for queue in self.queues)
+
+    async def run(self) -> PipelineStats:
+        """运行流水线，直到数据源耗尽或 request_stop() 后在途数据全部写出
+
+        数据源抛出异常时取消所有阶段并向上抛出。
+
+        Returns:
+            运行统计
+        """
+        self.stats = PipelineStats()
+        workers = [
+            [
+                asyncio.create_task(self._work(stage, self.queues[i], self.queues[i + 1]))
+                for _ in range(max(1, stage.concurrency))
+            ]
+            for i, stage in enumerate(self.stages)
+        ]
+        writer = asyncio.create_task(self._write_batches(self.queues[-1]))
+        self._producer = asyncio.create_task(self._produce(self.queues[0]))
+        if self._stopping:
+            self._producer.cancel()
+
+        try:
+            try:
+                await self._producer
+            except asyncio.CancelledError:
+                # 只吞掉 request_stop() 引起的取消，run() 本身被取消时继续向上传播
+                if not self._stopping:
+                    raise
+            try:
+                await asyncio.wait_for(self._drain(workers), self._drain_deadline())
+            except asyncio.TimeoutError:
+                logger.warning("等待超时，放弃 %d 条未处理的数据", self.in_flight)
+        finally:
+            tasks = [self._producer, writer, *(task for group in workers for task in group)]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.stats.finished_at = time.perf_counter()
+        return self.stats
+
+    def _drain_deadline(self) -> Optional[float]:
+        # 数据源正常耗尽时一直等待；被要求停止时受 drain_timeout 限制
+        return self.drain_timeout if self._stopping else None
+
+    async def _produce(self, outbox: asyncio.Queue):
+        iterator = self.source.__aiter__()
+        try:
+            async for item in iterator:
+                # 停止时正阻塞在 put 上的这一条不计入统计：它没有进入流水线，消息队列中应不予确认
+                await outbox.put(item)
+                self.stats.received += 1
+        finally:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def _drain(self, workers: List[List[asyncio.Task]]):
+        # 按阶段顺序等待：第 i 个队列清空且已全部处理（task_done）后，数据都已进入下一个队列
+        for queue, group in zip(self.queues, workers):
+            await queue.join()
+            for task in group:
+                task.cancel()
+        # 最后一批不必等到 flush_interval
+        self._flush_now.set()
+        await self.queues[-1].join()
+
+    async def _work(self, stage: Stage, inbox: asyncio.Queue, outbox: asyncio.Queue):
+        while True:
+            item = await inbox.get()
+            try:
+                result = await stage.handler(item)
+            except Exception:
+                self.stats.failed += 1
+                logger.exception("阶段 %s 处理失败: %r", stage.name, item)
+            else:
+                if result is None:
+                    self.stats.dropped += 1
+                else:
+                    # 放入下一个队列后才 task_done，join() 返回时数据一定已经交给下游
+                    await outbox.put(result)
+            finally:
+                inbox.task_done()
+
+    async def _write_batches(self, inbox: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        batch: List[Any] = []
+        deadline = 0.0
+        getter: Optional[asyncio.Future] = None
+        flush_waiter = asyncio.ensure_future(self._flush_now.wait())
+        try:
+            while True:
+                if getter is None:
+                    getter = asyncio.ensure_future(inbox.get())
+                # 排空阶段不再等待凑满一批
+                draining = flush_waiter.done()
+                if not batch:
+                    timeout = None
+                elif draining:
+                    timeout = 0.0
+                else:
+                    timeout = max(0.0, deadline - loop.time())
+                # 超时后未完成的 getter 留到下一轮继续等待，不会丢数据
+                done, _ = await asyncio.wait(
+                    {getter} if draining else {getter, flush_waiter},
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if getter in done:
+                    if not batch:
+                        deadline = loop.time() + self.flush_interval
+                    batch.append(getter.result())
+                    getter = None
+                    while len(batch) < self.batch_size and not inbox.empty():
+                        batch.append(inbox.get_nowait())
+                    if len(batch) < self.batch_size and not draining:
+                        continue
+                if batch:
+                    await self._flush(inbox, batch)
+                    batch = []
+        finally:
+            flush_waiter.cancel()
+            if getter is not None:
+                getter.cancel()
+
+    async def _flush(self, inbox: asyncio.Queue, batch: List[Any]):
+        try:
+            await self.sink(batch)
+        except Exception:
+            self.stats.failed += len(batch)
+            logger.exception("批量写入失败，丢弃 %d 条数据", len(batch))
+        else:
+            self.stats.written += len(batch)
+            self.stats.batches += 1
+        finally:
+            for _ in batch:
+                inbox.task_done()
@@ -0,0 +1,208 @@
+"""
+流水线测试
+"""
+
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from {{module_name}}.pipeline import Pipeline, Stage
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# 基准测试的吞吐量下限（条/秒），空处理函数下衡量的是流水线本身的调度开销
+THROUGHPUT_FLOOR = 20000
+
+
+async def numbers(n: int):
+    for i in range(n):
+        yield i
+
+
+async def identity(item):
+    return item
+
+
+class ListSink:
+    """把每批数据记录到列表中的 sink"""
+
+    def __init__(self, delay: float = 0.0):
+        self.batches = []
+        self.delay = delay
+
+    async def __call__(self, batch):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.batches.append(list(batch))
+
+    @property
+    def items(self):
+        return [item for batch in self.batches for item in batch]
+
+
+def run_pipeline(source, stages, sink, **options):
+    async def run():
+        return await Pipeline(source, stages, sink, **options).run()
+
+    return asyncio.run(run())
+
+
+def test_all_items_written_once():
+    """测试每条数据恰好写出一次，被丢弃的数据计入统计"""
+    async def double(item):
+        return item * 2
+
+    async def drop_odd(item):
+        return item if item % 4 == 0 else None
+
+    sink = ListSink()
+    stats = run_pipeline(
+        numbers(1000),
+        [Stage("double", double, 4), Stage("filter", drop_odd, 2)],
+        sink,
+        queue_size=10,
+        batch_size=32
+    )
+    assert sorted(sink.items) == [i * 2 for i in range(0, 1000, 2)]
+    assert stats.received == 1000
+    assert stats.written == 500
+    assert stats.dropped == 500
+    assert all(len(batch) <= 32 for batch in sink.batches)
+
+
+def test_partial_batch_flushed_after_interval():
+    """测试不满一批的数据在 flush_interval 后写出，而不是等到数据源结束"""
+    flushed = []
+
+    async def source():
+        for i in range(3):
+            yield i
+        await asyncio.sleep(0.3)
+        flushed.extend(sink.items)
+
+    sink = ListSink()
+    run_pipeline(source(), [], sink, batch_size=100, flush_interval=0.05)
+    assert flushed == [0, 1, 2]
+
+
+def test_stage_concurrency():
+    """测试每个阶段同时处理的数据量等于它的并发数"""
+    active = 0
+    peak = 0
+
+    async def slow(item):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return item
+
+    sink = ListSink()
+    run_pipeline(numbers(50), [Stage("slow", slow, 5)], sink)
+    assert peak == 5
+    assert sorted(sink.items) == list(range(50))
+
+
+def test_backpressure_bounds_in_flight():
+    """测试下游慢时数据源被阻塞，读入但未写出的数据量有上限"""
+    queue_size, batch_size = 5, 4
+    produced = 0
+    max_in_flight = 0
+    sink = ListSink(delay=0.005)
+
+    async def source():
+        nonlocal produced, max_in_flight
+        for i in range(200):
+            max_in_flight = max(max_in_flight, produced - len(sink.items))
+            produced += 1
+            yield i
+
+    run_pipeline(source(), [Stage("pass", identity, 2)], sink, queue_size=queue_size, batch_size=batch_size)
+    # 两个队列 + 阶段中正在处理的 2 条 + 正在写出的一批
+    assert max_in_flight <= 2 * queue_size + 2 + batch_size
+    assert len(sink.items) == 200
+
+
+def test_handler_errors_do_not_stop_pipeline():
+    """测试单条数据处理失败只计入统计，不影响其他数据"""
+    async def fail_on_seven(item):
+        if item == 7:
+            raise ValueError("bad item")
+        return item
+
+    sink = ListSink()
+    stats = run_pipeline(numbers(20), [Stage("check", fail_on_seven, 3)], sink)
+    assert stats.failed == 1
+    assert sorted(sink.items) == [i for i in range(20) if i != 7]
+
+
+def test_request_stop_drains_in_flight_items():
+    """测试停止后不再读取数据源，已读入的数据全部写出"""
+    async def endless():
+        i = 0
+        while True:
+            yield i
+            i += 1
+
+    async def slow(item):
+        await asyncio.sleep(0.001)
+        return item
+
+    sink = ListSink()
+
+    async def run():
+        pipeline = Pipeline(endless(), [Stage("slow", slow, 4)], sink, queue_size=20, batch_size=8)
+        asyncio.get_running_loop().call_later(0.1, pipeline.request_stop)
+        return await asyncio.wait_for(pipeline.run(), 5)
+
+    stats = asyncio.run(run())
+    assert stats.received > 0
+    assert stats.written == stats.received
+    assert sorted(sink.items) == list(range(stats.received))
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="需要 POSIX 信号")
+def test_sigterm_drains_and_exits_cleanly():
+    """测试进程收到 SIGTERM 后写出已读入的数据并正常退出"""
+    env = {**os.environ, "WORKER_FLUSH_INTERVAL": "10"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "{{module_name}}"],
+        cwd=PROJECT_ROOT, env=env, text=True,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        process.stdin.write("".join(f"line {i}\n" for i in range(10)))
+        process.stdin.flush()
+        # 数据已读入但批次未满、未到 flush_interval，只有排空才会写出
+        time.sleep(1.0)
+        process.send_signal(signal.SIGTERM)
+        stdout, stderr = process.communicate(timeout=10)
+    finally:
+        process.kill()
+    assert process.returncode == 0, stderr
+    assert len(stdout.splitlines()) == 10
+
+
+def test_throughput_benchmark():
+    """基准测试：两个阶段 + 批量写入的吞吐量不低于下限（取多轮中的最好成绩以排除抖动）"""
+    n = 20000
+    best = 0.0
+    for _ in range(3):
+        sink = ListSink()
+        stats = run_pipeline(
+            numbers(n),
+            [Stage("a", identity, 4), Stage("b", identity, 4)],
+            sink,
+            queue_size=1000,
+            batch_size=500
+        )
+        assert stats.written == n
+        best = max(best, stats.throughput)
+    print(f"\n吞吐量: {best:.0f} 条/秒")
+    assert best >= THROUGHPUT_FLOOR, f"吞吐量 {best:.0f} 条/秒低于下限 {THROUGHPUT_FLOOR}"
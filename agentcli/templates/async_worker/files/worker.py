@@ -0,0 +1,204 @@
+"""
+Worker 入口模块
+
+{{description}}
+
+在这里实现业务逻辑：read_source 产出待处理的数据，parse、enrich 是处理阶段，write_batch 批量写出结果。
+接入消息队列时把 read_source 换成消费者的异步迭代器，把 write_batch 换成批量写库或批量发送。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import signal
+import sys
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from . import __version__
+from .config import WorkerSettings, get_settings
+from .pipeline import Pipeline, PipelineStats, Sink, Stage
+
+logger = logging.getLogger(__name__)
+
+
+async def read_source(path: Optional[str] = None) -> AsyncIterator[str]:
+    """逐行读取输入（未指定文件时读取标准输入）
+
+    Args:
+        path: 输入文件路径
+
+    Yields:
+        去掉换行符的每一行
+    """
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\n")
+        return
+
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    try:
+        transport, _ = await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    except (ValueError, OSError):
+        # 标准输入重定向自普通文件时不能注册到事件循环，直接读取（普通文件不会长时间阻塞）
+        for line in sys.stdin:
+            yield line.rstrip("\n")
+        return
+    try:
+        async for line in reader:
+            yield line.decode("utf-8").rstrip("\n")
+    finally:
+        transport.close()
+
+
+async def parse(line: str) -> Optional[Dict[str, Any]]:
+    """解析阶段：把一行输入转换为记录，返回 None 表示丢弃
+
+    Args:
+        line: 输入行
+
+    Returns:
+        记录字典
+    """
+    # TODO: 在这里实现解析逻辑
+    text = line.strip()
+    if not text:
+        return None
+    return {"text": text}
+
+
+async def enrich(record: Dict[str, Any]) -> Dict[str, Any]:
+    """处理阶段：补充记录内容（调用外部服务等 I/O 操作放在这里，按阶段并发执行）
+
+    Args:
+        record: 解析后的记录
+
+    Returns:
+        处理后的记录
+    """
+    # TODO: 在这里实现处理逻辑
+    record["length"] = len(record["text"])
+    return record
+
+
+def stdout_sink() -> Sink:
+    """创建把每批记录以 JSON Lines 写到标准输出的 sink"""
+    async def write_batch(batch: List[Dict[str, Any]]):
+        # TODO: 替换为批量写库或批量发送
+        sys.stdout.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in batch))
+        sys.stdout.flush()
+
+    return write_batch
+
+
+def build_pipeline(source, sink: Sink, settings: Optional[WorkerSettings] = None) -> Pipeline:
+    """按配置组装流水线
+
+    Args:
+        source: 数据源
+        sink: 批量写入函数
+        settings: 配置（默认从环境变量读取）
+
+    Returns:
+        流水线
+    """
+    settings = settings or get_settings()
+    stages = [
+        Stage("parse", parse, settings.stage_concurrency("parse")),
+        Stage("enrich", enrich, settings.stage_concurrency("enrich")),
+    ]
+    return Pipeline(
+        source,
+        stages,
+        sink,
+        queue_size=settings.queue_size,
+        batch_size=settings.batch_size,
+        flush_interval=settings.flush_interval,
+        drain_timeout=settings.drain_timeout
+    )
+
+
+def install_signal_handlers(pipeline: Pipeline):
+    """SIGTERM/SIGINT 时优雅退出：停止读取并处理完在途数据
+
+    Args:
+        pipeline: 流水线
+    """
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, pipeline.request_stop)
+        except (NotImplementedError, RuntimeError):
+            # Windows 的事件循环不支持信号处理函数，Ctrl+C 会直接中断
+            pass
+
+
+async def serve(pipeline: Pipeline) -> PipelineStats:
+    """运行流水线直到数据源耗尽或收到终止信号
+
+    Args:
+        pipeline: 流水线
+
+    Returns:
+        运行统计
+    """
+    install_signal_handlers(pipeline)
+    return await pipeline.run()
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(prog="{{project_name}}", description="异步流水线 Worker")
+    parser.add_argument("input", nargs="?", help="输入文件（默认读取标准输入）")
+    parser.add_argument("--concurrency", "-c", type=int, help="每个阶段的并发数")
+    parser.add_argument(
+        "--stage", action="append", default=[], metavar="NAME=N",
+        help="单个阶段的并发数，如 --stage enrich=32（可重复）"
+    )
+    parser.add_argument("--queue-size", type=int, help="阶段之间队列的容量")
+    parser.add_argument("--batch-size", type=int, help="每批写出的最大条数")
+    parser.add_argument("--flush-interval", type=float, help="不满一批时最多等待的秒数")
+    parser.add_argument("--verbose", "-v", action="store_true", help="输出运行日志和统计")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    return parser.parse_args(argv)
+
+
+def settings_from_args(args: argparse.Namespace) -> WorkerSettings:
+    """用命令行参数覆盖环境变量中的配置"""
+    settings = get_settings()
+    for name in ("concurrency", "queue_size", "batch_size", "flush_interval"):
+        value = getattr(args, name)
+        if value is not None:
+            setattr(settings, name, value)
+    for item in args.stage:
+        name, _, value = item.partition("=")
+        settings.stage_overrides[name.strip()] = int(value)
+    return settings
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """命令行入口"""
+    args = parse_args(argv)
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        stream=sys.stderr
+    )
+    settings = settings_from_args(args)
+
+    async def run() -> PipelineStats:
+        # 队列和事件需要在事件循环中创建
+        pipeline = build_pipeline(read_source(args.input), stdout_sink(), settings)
+        return await serve(pipeline)
+
+    stats = asyncio.run(run())
+    logger.info(
+        "完成: 读入 %d 条，写出 %d 条（%d 批），丢弃 %d 条，失败 %d 条，%.0f 条/秒",
+        stats.received, stats.written, stats.batches, stats.dropped, stats.failed, stats.throughput
+    )
+
+
+if __name__ == '__main__':
+    main()
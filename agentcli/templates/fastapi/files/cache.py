@@ -0,0 +1,179 @@
+"""
+响应缓存模块
+
+- `cached`: GET 路由的缓存装饰器，缓存序列化后的响应体并附带 ETag，
+  请求头 If-None-Match 命中时直接返回 304
+- `invalidate`: 写操作后让某个命名空间的缓存全部失效（递增版本号，旧条目随 TTL/LRU 淘汰）
+- 缓存后端只需实现 Redis 客户端的 get/set/incr 三个方法：默认使用进程内的 InMemoryRedis
+  （TTL + LRU），配置 CACHE_URL 后使用 Redis（需安装 redis 包）
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Protocol, Tuple
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+
+from .core.config import settings
+
+
+class CacheBackend(Protocol):
+    """缓存后端接口（redis.asyncio.Redis 的子集）"""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None) -> Any:
+        ...
+
+    async def incr(self, key: str) -> int:
+        ...
+
+
+class InMemoryRedis:
+    """进程内的 Redis 兼容缓存（TTL + LRU）
+
+    只在单个事件循环中使用，不需要加锁。没有过期时间的键（如命名空间版本号）单独保存，
+    不参与 LRU 淘汰，避免版本号被淘汰后旧缓存重新生效。
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._persistent: Dict[str, bytes] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if key in self._persistent:
+            return self._persistent[key]
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        if isinstance(value, str):
+            value = value.encode()
+        if ex is None:
+            self._data.pop(key, None)
+            self._persistent[key] = value
+            return True
+        self._persistent.pop(key, None)
+        self._data[key] = (value, time.monotonic() + ex)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return True
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        self._persistent[key] = str(value).encode()
+        return value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_backend: Optional[CacheBackend] = None
+
+
+def get_backend() -> CacheBackend:
+    """获取缓存后端（首次调用时按配置创建）"""
+    global _backend
+    if _backend is None:
+        if settings.cache_url:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:
+                raise RuntimeError("CACHE_URL 需要安装 redis 包: pip install redis") from e
+            _backend = redis.from_url(settings.cache_url)
+        else:
+            _backend = InMemoryRedis(settings.cache_max_entries)
+    return _backend
+
+
+def set_backend(backend: Optional[CacheBackend]):
+    """替换缓存后端（为 None 时下次使用前按配置重新创建）"""
+    global _backend
+    _backend = backend
+
+
+def _version_key(namespace: str) -> str:
+    return f"cache:{namespace}:version"
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _build_response(body: bytes, etag: str, request: Request) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def invalidate(namespace: str):
+    """让命名空间下的所有缓存失效"""
+    await get_backend().incr(_version_key(namespace))
+
+
+def cached(namespace: str, ttl: Optional[int] = None) -> Callable:
+    """GET 路由的响应缓存装饰器（放在路由装饰器下面）
+
+    缓存键由命名空间版本号、路径和查询参数组成；路由抛出的异常（如 404）不会被缓存。
+
+    Args:
+        namespace: 缓存命名空间，写操作通过 invalidate(namespace) 使其失效
+        ttl: 过期时间（秒），默认使用配置中的 cache_ttl
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+        wants_request = "request" in signature.parameters
+        parameters = list(signature.parameters.values())
+        if not wants_request:
+            # 注入 Request 参数，FastAPI 会按新签名传入
+            parameters.append(inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request))
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs["request"] if wants_request else kwargs.pop("request")
+            backend = get_backend()
+            version = int(await backend.get(_version_key(namespace)) or 0)
+            query = "&".join(sorted(f"{k}={v}" for k, v in request.query_params.multi_items()))
+            key = f"cache:{namespace}:{version}:{request.url.path}?{query}"
+
+            entry = await backend.get(key)
+            if entry is not None:
+                etag, body = entry.split(b"\n", 1)
+                return _build_response(body, etag.decode(), request)
+
+            if inspect.iscoroutinefunction(func):
+                result = await func(*args, **kwargs)
+            else:
+                result = await run_in_threadpool(func, *args, **kwargs)
+            if isinstance(result, Response):
+                return result
+
+            body = json.dumps(jsonable_encoder(result), ensure_ascii=False, separators=(",", ":")).encode()
+            etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+            await backend.set(key, etag.encode() + b"\n" + body, ex=ttl or settings.cache_ttl)
+            return _build_response(body, etag, request)
+
+        wrapper.__signature__ = signature.replace(parameters=parameters)
+        return wrapper
+
+    return decorator
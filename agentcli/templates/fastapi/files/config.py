@@ -13,12 +13,29 @@ class Settings(BaseModel):
     app_name: str = "{{project_name}}"
     debug: bool = os.getenv("DEBUG", "false").lower() == "true"
     
+    # 运行配置：development 或 production（启用 GZip 压缩）
+    server_profile: str = os.getenv("SERVER_PROFILE", "{{server_profile}}")
+    gzip_minimum_size: int = int(os.getenv("GZIP_MINIMUM_SIZE", "1000"))  # 字节，过小的响应压缩得不偿失
+    
     # 数据库配置
-    database_url: str = os.getenv("DATABASE_URL", "sqlite:///./{{project_name}}.db")
+    database_url: str = os.getenv("DATABASE_URL", "{{database_url}}")
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", "{{db_pool_size}}"))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", "{{db_max_overflow}}"))
+    db_pool_pre_ping: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    db_pool_recycle: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # 秒，应小于数据库的空闲连接超时
     
     # API 配置
     api_prefix: str = "/api/v1"
     
+    # 分页配置
+    default_page_size: int = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+    max_page_size: int = int(os.getenv("MAX_PAGE_SIZE", "500"))
+    
+    # 响应缓存（CACHE_URL 为空时使用进程内缓存，如 redis://localhost:6379/0）
+    cache_url: str = os.getenv("CACHE_URL", "")
+    cache_ttl: int = int(os.getenv("CACHE_TTL", "30"))
+    cache_max_entries: int = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+    
     # CORS
     cors_origins: list = ["*"]
 
@@ -1,42 +1,60 @@
 """
 数据库连接和配置
+
+使用 SQLAlchemy 异步引擎，查询不会阻塞事件循环。
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from typing import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+
+from ..core.config import settings
+
+
+def build_engine(database_url: str = settings.database_url) -> AsyncEngine:
+    """按配置创建异步数据库引擎"""
+    options = {
+        "echo": settings.debug,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "pool_recycle": settings.db_pool_recycle,
+    }
+    # 连接池大小只对服务端数据库有意义（SQLite 内存数据库使用的 StaticPool 也不接受这些参数）
+    if not database_url.startswith("sqlite"):
+        options["pool_size"] = settings.db_pool_size
+        options["max_overflow"] = settings.db_max_overflow
+    return create_async_engine(database_url, **options)
 
-from .core.config import settings
 
 # 创建数据库引擎
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
+engine = build_engine()
 
 # 创建会话
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
 # 创建基类
 Base = declarative_base()
 
 
-def get_db():
+async def get_db() -> AsyncIterator[AsyncSession]:
     """获取数据库会话
-    
+
     用法:
-        @app.get("/items")
-        def get_items(db: Session = Depends(get_db)):
+        @router.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_db)):
+            result = await db.execute(select(Item))
             ...
     """
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    async with SessionLocal() as session:
+        yield session
 
 
-def init_db():
+async def init_db():
     """初始化数据库表"""
-    Base.metadata.create_all(bind=engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
 
+async def close_db():
+    """释放连接池中的所有连接"""
+    await engine.dispose()
@@ -0,0 +1,42 @@
+"""
+Gunicorn 生产环境配置
+
+用法:
+    gunicorn -c gunicorn_conf.py app.main:app
+
+使用 UvicornWorker 运行 ASGI 应用；安装了 uvloop 和 httptools 时 worker 会自动使用它们。
+所有参数都可以通过环境变量覆盖。
+"""
+
+import multiprocessing
+import os
+
+
+def _cpu_count() -> int:
+    """可用的 CPU 数（容器中按 CPU 亲和性计算）"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+# 异步 worker 每个进程即可并发处理大量连接，进程数按 CPU 核数配置
+_default_workers = max(2, _cpu_count())
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = min(int(os.getenv("WEB_CONCURRENCY", str(_default_workers))), int(os.getenv("MAX_WORKERS", "16")))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# 超时与连接保持
+timeout = int(os.getenv("TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("KEEP_ALIVE", "5"))
+
+# 定期重启 worker，避免长时间运行后的内存增长（加随机抖动，避免同时重启）
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# 日志输出到标准输出，由容器收集
+accesslog = os.getenv("ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
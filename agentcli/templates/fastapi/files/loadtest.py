@@ -0,0 +1,252 @@
+"""
+负载测试工具
+
+用 asyncio + httpx 以指定并发逐个压测各路由，统计 RPS 与延迟分位数，并与基线比较。
+
+- inprocess: 通过 ASGITransport 直接调用应用（不经过网络，结果稳定，适合 CI）
+- uvicorn: 在本机随机端口启动 uvicorn，经过真实的 HTTP 协议栈
+- --base-url: 压测已经在运行的服务
+
+用法:
+    python -m tests.loadtest --mode uvicorn --concurrency 20 --requests 1000
+    python -m tests.loadtest --update-baseline    # 用本次结果更新基线
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+BASELINE_PATH = Path(__file__).parent / "perf_baseline.json"
+
+# (方法, 路径, 请求体)，路径中的 {item_id} 会替换为预先创建的项目 ID
+ROUTES: List[Tuple[str, str, Optional[dict]]] = [
+    ("GET", "/health", None),
+    ("GET", "/api/v1/items?limit=50", None),
+    ("GET", "/api/v1/items/{item_id}", None),
+    ("POST", "/api/v1/items", {"name": "load test", "description": "created by loadtest"}),
+]
+
+
+@dataclass
+class RouteStats:
+    """单个路由的压测结果"""
+    route: str
+    requests: int
+    errors: int
+    elapsed: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩法计算分位数（输入需已排序）"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def drive_route(
+    client: httpx.AsyncClient,
+    method: str,
+    path: str,
+    body: Optional[dict],
+    total: int,
+    concurrency: int
+) -> RouteStats:
+    """以固定并发向一个路由发送 total 个请求"""
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return RouteStats(
+        route=f"{method} {path}",
+        requests=total,
+        errors=errors,
+        elapsed=round(elapsed, 3),
+        rps=round(total / elapsed, 1) if elapsed else 0.0,
+        p50_ms=round(percentile(latencies, 0.50) * 1000, 2),
+        p95_ms=round(percentile(latencies, 0.95) * 1000, 2),
+        p99_ms=round(percentile(latencies, 0.99) * 1000, 2),
+    )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def open_client(mode: str = "inprocess", base_url: Optional[str] = None) -> AsyncIterator[httpx.AsyncClient]:
+    """按模式创建压测客户端（inprocess/uvicorn，指定 base_url 时直接连接该服务）"""
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    if base_url:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+            yield client
+        return
+
+    from app.main import app
+
+    if mode == "inprocess":
+        transport = httpx.ASGITransport(app=app)
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+                yield client
+        return
+
+    import uvicorn
+
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("uvicorn 启动失败")
+            await asyncio.sleep(0.02)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            yield client
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+
+async def run_load(
+    mode: str = "inprocess",
+    concurrency: int = 10,
+    requests: int = 200,
+    base_url: Optional[str] = None,
+    routes: List[Tuple[str, str, Optional[dict]]] = ROUTES
+) -> Dict[str, RouteStats]:
+    """依次压测各路由
+
+    Args:
+        mode: inprocess 或 uvicorn
+        concurrency: 并发请求数
+        requests: 每个路由的请求数
+        base_url: 已运行服务的地址（指定时忽略 mode）
+        routes: 要压测的路由
+
+    Returns:
+        路由 -> 压测结果
+    """
+    results: Dict[str, RouteStats] = {}
+    async with open_client(mode, base_url) as client:
+        seed = await client.post("/api/v1/items", json={"name": "loadtest seed"})
+        seed.raise_for_status()
+        item_id = seed.json()["id"]
+
+        for method, path, body in routes:
+            # 预热，避免首个请求的初始化开销计入结果
+            await client.request(method, path.format(item_id=item_id), json=body)
+            stats = await drive_route(client, method, path.format(item_id=item_id), body, requests, concurrency)
+            stats.route = f"{method} {path}"
+            results[stats.route] = stats
+    return results
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict:
+    """读取基线"""
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def compare(results: Dict[str, RouteStats], baseline: dict) -> List[str]:
+    """与基线比较
+
+    RPS 低于基线的 (1 - tolerance) 倍、p99 延迟高于基线的 (1 + tolerance) 倍或出现错误响应时视为退化。
+
+    Returns:
+        退化说明列表（为空表示没有退化）
+    """
+    tolerance = baseline.get("tolerance", 0.3)
+    regressions = []
+    for route, expected in baseline["routes"].items():
+        stats = results.get(route)
+        if stats is None:
+            regressions.append(f"{route}: 没有压测结果")
+            continue
+        if stats.errors:
+            regressions.append(f"{route}: {stats.errors}/{stats.requests} 个请求失败")
+        min_rps = expected["rps"] * (1 - tolerance)
+        if stats.rps < min_rps:
+            regressions.append(f"{route}: RPS {stats.rps} 低于基线下限 {min_rps:.1f}")
+        max_p99 = expected["p99_ms"] * (1 + tolerance)
+        if stats.p99_ms > max_p99:
+            regressions.append(f"{route}: p99 {stats.p99_ms}ms 高于基线上限 {max_p99:.1f}ms")
+    return regressions
+
+
+def write_baseline(results: Dict[str, RouteStats], path: Path = BASELINE_PATH, tolerance: float = 0.3):
+    """用压测结果更新基线"""
+    baseline = {
+        "tolerance": tolerance,
+        "routes": {route: {"rps": s.rps, "p99_ms": s.p99_ms} for route, s in results.items()},
+    }
+    path.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="负载测试")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn"], default=os.getenv("LOADTEST_MODE", "inprocess"))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("LOADTEST_CONCURRENCY", "10")))
+    parser.add_argument("--requests", type=int, default=int(os.getenv("LOADTEST_REQUESTS", "200")))
+    parser.add_argument("--base-url", help="压测已运行的服务（如 http://localhost:8000）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果更新基线")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_load(args.mode, args.concurrency, args.requests, args.base_url))
+
+    if args.json:
+        print(json.dumps({route: asdict(s) for route, s in results.items()}, indent=2, ensure_ascii=False))
+    else:
+        print(f"{'路由':<36}{'RPS':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'错误':>6}")
+        for s in results.values():
+            print(f"{s.route:<36}{s.rps:>10}{s.p50_ms:>10}{s.p95_ms:>10}{s.p99_ms:>10}{s.errors:>6}")
+
+    if args.update_baseline:
+        write_baseline(results)
+        print(f"基线已更新: {BASELINE_PATH}")
+        return
+
+    if BASELINE_PATH.exists():
+        regressions = compare(results, load_baseline())
+        for message in regressions:
+            print(f"退化: {message}")
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,54 @@
 FastAPI 应用主入口
 """
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 
 from .api.routes import router
 from .core.config import settings
 
+try:
+    from .db.database import close_db, init_db
+except ModuleNotFoundError as e:
+    # 未选择数据库时不生成 app/db
+    if e.name != f"{__package__}.db":
+        raise
+    init_db = close_db = None
+
+try:
+    from .metrics import setup_metrics
+except ModuleNotFoundError as e:
+    # 未选择指标功能时不生成 app/metrics.py
+    if e.name != f"{__package__}.metrics":
+        raise
+    setup_metrics = None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时建表，关闭时释放数据库连接池"""
+    if init_db:
+        await init_db()
+    yield
+    if close_db:
+        await close_db()
+
+
+production = settings.server_profile == "production"
+
 app = FastAPI(
     title="{{project_name}}",
     description="{{description}}",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
+if production:
+    app.add_middleware(GZipMiddleware, minimum_size=settings.gzip_minimum_size)
+
 # CORS 配置
 app.add_middleware(
     CORSMiddleware,
@@ -24,7 +60,11 @@ app.add_middleware(
 )
 
 # 注册路由
-app.include_router(router, prefix="/api/v1")
+app.include_router(router)
+
+# Prometheus 指标（最后添加，作为最外层中间件计入完整的请求耗时）
+if setup_metrics:
+    setup_metrics(app)
 
 
 @app.get("/")
@@ -49,6 +89,6 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
-        reload=True
+        reload=not production
     )
 
@@ -0,0 +1,231 @@
+"""
+Prometheus 指标模块
+
+纯 ASGI 中间件记录每个请求的指标，在 /metrics 以 Prometheus 文本格式输出：
+
+- http_request_duration_seconds: 请求延迟直方图（按方法和路由模板，不按原始路径，避免标签基数膨胀）
+- http_requests_total: 请求数（按方法、路由模板和状态码）
+- http_requests_in_flight: 正在处理的请求数
+- http_response_size_bytes: 响应体大小直方图
+- db_pool_checkout_seconds: 数据库连接池取连接耗时直方图（项目使用数据库时）
+
+指标保存在进程内，只在事件循环线程中更新，不需要加锁；Gunicorn 多进程部署时每个 worker
+各自计数，由 Prometheus 分别抓取或在网关层汇总。
+"""
+
+import bisect
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from fastapi import FastAPI
+from starlette.requests import Request
+from starlette.responses import Response
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """计数器"""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Gauge:
+    """仪表（无标签）"""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+
+    def inc(self):
+        self.value += 1
+
+    def dec(self):
+        self.value -= 1
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} gauge", f"{self.name} {self.value}"]
+
+
+class Histogram:
+    """直方图
+
+    observe 只做一次二分查找和两次加法；各桶保存非累积计数，输出时再累加。
+    """
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float], labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        # 标签值 -> [各桶计数（最后一个为 +Inf）, 总和]
+        self.series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self.series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    LATENCY_BUCKETS, ("method", "route")
+)
+REQUESTS = Counter("http_requests_total", "HTTP requests by route template and status.", ("method", "route", "status"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "HTTP response body size by route template.",
+    SIZE_BUCKETS, ("method", "route")
+)
+DB_POOL_CHECKOUT = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a database connection from the pool.",
+    LATENCY_BUCKETS
+)
+
+REGISTRY = [REQUEST_LATENCY, REQUESTS, IN_FLIGHT, RESPONSE_SIZE, DB_POOL_CHECKOUT]
+
+
+def render_metrics() -> str:
+    """以 Prometheus 文本格式输出所有指标"""
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """记录请求指标的 ASGI 中间件"""
+
+    def __init__(self, app, exclude_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            IN_FLIGHT.dec()
+            route = route_template(scope)
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method, route)
+            RESPONSE_SIZE.observe(size, method, route)
+            REQUESTS.inc(method, route, str(status))
+
+
+def route_template(scope) -> str:
+    """请求匹配到的路由模板（如 /api/v1/items/{item_id}），未匹配的请求归为一类
+
+    路由匹配后 Starlette 把路由对象写入 scope。include_router(prefix=...) 的前缀在不同 FastAPI 版本中
+    可能拼进路由的 path，也可能既不在 path 也不在 root_path 中，因此 API 前缀放在 APIRouter(prefix=...)
+    上（见 api/routes.py），路由的 path 在所有版本中都是完整的模板。
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    if path is None:
+        return "unmatched"
+    return path
+
+
+def instrument_engine(engine):
+    """记录连接池取连接的耗时
+
+    SQLAlchemy 只在取到连接之后触发 checkout 事件，因此直接包装连接池的 connect 方法计时。
+    engine.dispose() 会重建连接池，之后需要重新调用。
+
+    Args:
+        engine: SQLAlchemy 引擎（同步或异步）
+    """
+    pool = getattr(engine, "sync_engine", engine).pool
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            DB_POOL_CHECKOUT.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Prometheus 抓取端点"""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
+def setup_metrics(app: FastAPI):
+    """注册指标中间件和 /metrics 端点，项目使用数据库时同时记录连接池指标"""
+    app.add_middleware(MetricsMiddleware)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+    try:
+        from .db.database import engine
+    except ModuleNotFoundError as e:
+        # 未选择数据库时不生成 app/db
+        if e.name != f"{__package__}.db":
+            raise
+    else:
+        instrument_engine(engine)
@@ -5,7 +5,7 @@
 from sqlalchemy import Column, Integer, String, DateTime
 from datetime import datetime
 
-from .db.database import Base
+from ..db.database import Base
 
 
 class Item(Base):
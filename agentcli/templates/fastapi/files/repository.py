@@ -0,0 +1,110 @@
+"""
+数据仓储层
+
+项目保存在以 ID 为键的字典中，按 ID 查找、更新、删除都是 O(1)；
+ID 由单调递增的计数器分配，删除后不会被复用。
+列表使用游标分页：游标是上一页最后一条记录的 ID，在有序 ID 列表中二分定位下一页的起点。
+"""
+
+import bisect
+import itertools
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class InMemoryItemRepository:
+    """内存项目仓储（线程安全）"""
+
+    def __init__(self):
+        self._items: Dict[int, dict] = {}
+        # ID 单调递增，追加即有序；删除只从字典中移除，列表中的失效 ID 在过半时统一清理
+        self._ids: List[int] = []
+        self._stale = 0
+        self._next_id = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, item_id: int) -> Optional[dict]:
+        """按 ID 获取项目，不存在时返回 None"""
+        item = self._items.get(item_id)
+        return dict(item) if item else None
+
+    def list_page(self, cursor: Optional[int] = None, limit: int = 50) -> Tuple[List[dict], Optional[int]]:
+        """获取一页项目（按 ID 升序）
+
+        Args:
+            cursor: 上一页返回的游标（为 None 时从头开始）
+            limit: 每页数量
+
+        Returns:
+            (本页项目, 下一页游标)，没有下一页时游标为 None
+        """
+        with self._lock:
+            start = bisect.bisect_right(self._ids, cursor) if cursor is not None else 0
+            items = []
+            # 多取一条用于判断是否还有下一页
+            for item_id in itertools.islice(self._ids, start, None):
+                item = self._items.get(item_id)
+                if item is None:
+                    continue
+                items.append(dict(item))
+                if len(items) > limit:
+                    break
+
+        if len(items) > limit:
+            items = items[:limit]
+            return items, items[-1]["id"]
+        return items, None
+
+    def iter_batches(self, batch_size: int = 500) -> Iterator[List[dict]]:
+        """按批遍历所有项目，每批单独加锁，遍历期间不会阻塞写入"""
+        cursor = None
+        while True:
+            items, cursor = self.list_page(cursor, batch_size)
+            if items:
+                yield items
+            if cursor is None:
+                return
+
+    def create(self, data: dict) -> dict:
+        """创建项目并分配 ID"""
+        with self._lock:
+            item_id = next(self._next_id)
+            item = {**data, "id": item_id}
+            self._items[item_id] = item
+            self._ids.append(item_id)
+        return dict(item)
+
+    def update(self, item_id: int, data: dict) -> Optional[dict]:
+        """更新项目，不存在时返回 None"""
+        with self._lock:
+            if item_id not in self._items:
+                return None
+            item = {**data, "id": item_id}
+            self._items[item_id] = item
+        return dict(item)
+
+    def delete(self, item_id: int) -> bool:
+        """删除项目
+
+        Returns:
+            项目是否存在
+        """
+        with self._lock:
+            if self._items.pop(item_id, None) is None:
+                return False
+            self._stale += 1
+            if self._stale > len(self._items):
+                self._ids = [i for i in self._ids if i in self._items]
+                self._stale = 0
+        return True
+
+
+item_repository = InMemoryItemRepository()
+
+
+def get_repository() -> InMemoryItemRepository:
+    """路由依赖：获取项目仓储（测试中可通过 app.dependency_overrides 替换）"""
+    return item_repository
@@ -2,80 +2,116 @@
 API 路由定义
 """
 
-from fastapi import APIRouter, HTTPException
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List
 
-router = APIRouter()
+from ..core.config import settings
+from ..repository import InMemoryItemRepository, get_repository
+
+try:
+    from ..cache import cached, invalidate
+except ModuleNotFoundError as e:
+    # 未选择缓存功能时不生成 app/cache.py
+    if e.name != f"{__package__.rsplit('.', 1)[0]}.cache":
+        raise
+
+    def cached(namespace: str, ttl: Optional[int] = None):
+        return lambda func: func
+
+    async def invalidate(namespace: str):
+        pass
+
+# 前缀放在路由器上，每个路由的 path 都是完整模板（如 /api/v1/items/{item_id}）
+router = APIRouter(prefix=settings.api_prefix)
 
 
 # 数据模型示例
 class Item(BaseModel):
     """项目模型"""
-    id: int = None
+    id: int
     name: str
-    description: str = None
+    description: Optional[str] = None
 
 
 class ItemCreate(BaseModel):
     """创建项目模型"""
     name: str
-    description: str = None
+    description: Optional[str] = None
 
 
-# 模拟数据库
-items_db = []
+class ItemPage(BaseModel):
+    """分页结果"""
+    items: List[Item]
+    next_cursor: Optional[int] = None
 
 
-@router.get("/items", response_model=List[Item])
-async def get_items():
-    """获取所有项目"""
-    return items_db
+@router.get("/items", response_model=ItemPage)
+@cached("items")
+async def get_items(
+    cursor: Optional[int] = Query(None, description="上一页返回的 next_cursor"),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size),
+    repository: InMemoryItemRepository = Depends(get_repository)
+):
+    """分页获取项目列表"""
+    items, next_cursor = repository.list_page(cursor, limit)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+@router.get("/items/stream")
+async def stream_items(repository: InMemoryItemRepository = Depends(get_repository)):
+    """以流式 JSON 数组返回所有项目（适合导出大量数据）"""
+    def generate():
+        yield "["
+        first = True
+        for batch in repository.iter_batches(settings.max_page_size):
+            for item in batch:
+                yield ("" if first else ",") + json.dumps(item, ensure_ascii=False)
+                first = False
+        yield "]"
+
+    return StreamingResponse(generate(), media_type="application/json")
 
 
 @router.get("/items/{item_id}", response_model=Item)
-async def get_item(item_id: int):
+@cached("items")
+async def get_item(item_id: int, repository: InMemoryItemRepository = Depends(get_repository)):
     """获取单个项目"""
-    for item in items_db:
-        if item["id"] == item_id:
-            return item
-    raise HTTPException(status_code=404, detail="Item not found")
+    item = repository.get(item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return item
 
 
 @router.post("/items", response_model=Item, status_code=201)
-async def create_item(item: ItemCreate):
+async def create_item(item: ItemCreate, repository: InMemoryItemRepository = Depends(get_repository)):
     """创建项目"""
-    item_id = len(items_db) + 1
-    new_item = {
-        "id": item_id,
-        "name": item.name,
-        "description": item.description
-    }
-    items_db.append(new_item)
-    return new_item
+    created_item = repository.create(item.model_dump())
+    await invalidate("items")
+    return created_item
 
 
 @router.put("/items/{item_id}", response_model=Item)
-async def update_item(item_id: int, item: ItemCreate):
+async def update_item(
+    item_id: int,
+    item: ItemCreate,
+    repository: InMemoryItemRepository = Depends(get_repository)
+):
     """更新项目"""
-    for idx, existing_item in enumerate(items_db):
-        if existing_item["id"] == item_id:
-            updated_item = {
-                "id": item_id,
-                "name": item.name,
-                "description": item.description
-            }
-            items_db[idx] = updated_item
-            return updated_item
-    raise HTTPException(status_code=404, detail="Item not found")
+    updated_item = repository.update(item_id, item.model_dump())
+    if updated_item is None:
+        raise HTTPException(status_code=404, detail="Item not found")
+    await invalidate("items")
+    return updated_item
 
 
 @router.delete("/items/{item_id}")
-async def delete_item(item_id: int):
+async def delete_item(item_id: int, repository: InMemoryItemRepository = Depends(get_repository)):
     """删除项目"""
-    for idx, item in enumerate(items_db):
-        if item["id"] == item_id:
-            items_db.pop(idx)
-            return {"message": "Item deleted"}
-    raise HTTPException(status_code=404, detail="Item not found")
-
+    if not repository.delete(item_id):
+        raise HTTPException(status_code=404, detail="Item not found")
+    await invalidate("items")
+    return {"message": "Item deleted"}
@@ -26,7 +26,55 @@ def test_get_items():
     """测试获取项目列表"""
     response = client.get("/api/v1/items")
     assert response.status_code == 200
-    assert isinstance(response.json(), list)
+    data = response.json()
+    assert isinstance(data["items"], list)
+    assert "next_cursor" in data
+
+
+def test_items_pagination():
+    """测试游标分页：逐页遍历不重复、不遗漏"""
+    created = [client.post("/api/v1/items", json={"name": f"Item {i}"}).json()["id"] for i in range(5)]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor is not None:
+            params["cursor"] = cursor
+        data = client.get("/api/v1/items", params=params).json()
+        assert len(data["items"]) <= 2
+        seen.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(set(seen))
+    assert set(created) <= set(seen)
+
+
+def test_items_limit_bounds():
+    """测试分页大小超出范围时返回 422"""
+    assert client.get("/api/v1/items", params={"limit": 0}).status_code == 422
+    assert client.get("/api/v1/items", params={"limit": 100000}).status_code == 422
+
+
+def test_item_ids_not_reused_after_delete():
+    """测试删除后新建的项目不会复用 ID"""
+    first = client.post("/api/v1/items", json={"name": "first"}).json()
+    assert client.delete(f"/api/v1/items/{first['id']}").status_code == 200
+    second = client.post("/api/v1/items", json={"name": "second"}).json()
+    assert second["id"] != first["id"]
+    assert client.get(f"/api/v1/items/{first['id']}").status_code == 404
+
+
+def test_stream_items():
+    """测试流式导出"""
+    client.post("/api/v1/items", json={"name": "streamed"})
+    response = client.get("/api/v1/items/stream")
+    assert response.status_code == 200
+    items = response.json()
+    assert isinstance(items, list)
+    assert any(item["name"] == "streamed" for item in items)
 
 
 def test_create_item():
@@ -0,0 +1,72 @@
+"""
+响应缓存测试
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.cache import InMemoryRedis, get_backend, set_backend
+from app.main import app
+
+client = TestClient(app)
+
+
+def setup_function():
+    set_backend(InMemoryRedis(maxsize=64))
+
+
+def test_etag_and_not_modified():
+    """测试 ETag 与 If-None-Match 条件请求"""
+    response = client.get("/api/v1/items")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    cached = client.get("/api/v1/items", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_write_invalidates_cache():
+    """测试写操作使缓存失效"""
+    etag = client.get("/api/v1/items").headers["etag"]
+    created = client.post("/api/v1/items", json={"name": "cached"}).json()
+
+    response = client.get("/api/v1/items", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    item_etag = client.get(f"/api/v1/items/{created['id']}").headers["etag"]
+    client.put(f"/api/v1/items/{created['id']}", json={"name": "renamed"})
+    response = client.get(f"/api/v1/items/{created['id']}", headers={"If-None-Match": item_etag})
+    assert response.status_code == 200
+    assert response.json()["name"] == "renamed"
+
+
+def test_not_found_is_not_cached():
+    """测试异常响应不会被缓存"""
+    assert client.get("/api/v1/items/999999").status_code == 404
+    assert len(get_backend()) == 0
+
+
+def test_in_memory_backend_ttl_and_lru():
+    """测试进程内后端的过期与 LRU 淘汰"""
+    async def scenario():
+        backend = InMemoryRedis(maxsize=2)
+        await backend.set("a", b"1", ex=60)
+        await backend.set("b", b"2", ex=60)
+        await backend.get("a")
+        await backend.set("c", b"3", ex=60)
+        assert await backend.get("b") is None
+        assert await backend.get("a") == b"1"
+
+        await backend.set("expired", b"x", ex=-1)
+        assert await backend.get("expired") is None
+
+        # 版本号不参与 LRU 淘汰
+        assert await backend.incr("version") == 1
+        for i in range(5):
+            await backend.set(f"key{i}", b"v", ex=60)
+        assert await backend.incr("version") == 2
+
+    asyncio.run(scenario())
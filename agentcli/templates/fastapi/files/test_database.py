@@ -0,0 +1,38 @@
+"""
+数据库测试
+
+使用 aiosqlite 内存数据库，不依赖配置中的数据库。
+"""
+
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.db.database import Base, build_engine
+from app.models.models import Item
+
+
+async def _create_and_query():
+    engine = build_engine("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_factory() as session:
+            session.add(Item(name="Test Item", description="Test Description"))
+            await session.commit()
+
+        async with session_factory() as session:
+            result = await session.execute(select(Item).where(Item.name == "Test Item"))
+            return result.scalar_one()
+    finally:
+        await engine.dispose()
+
+
+def test_create_and_query_item():
+    """测试通过 AsyncSession 写入和查询"""
+    item = asyncio.run(_create_and_query())
+    assert item.id is not None
+    assert item.description == "Test Description"
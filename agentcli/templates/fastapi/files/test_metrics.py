@@ -0,0 +1,79 @@
+"""
+指标测试
+"""
+
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics import REQUEST_LATENCY, MetricsMiddleware
+
+client = TestClient(app)
+
+# 中间件每个请求的额外开销上限（秒）
+OVERHEAD_BUDGET = 50e-6
+
+
+def test_metrics_endpoint():
+    """测试 /metrics 输出按路由模板聚合的指标"""
+    created = client.post("/api/v1/items", json={"name": "metrics"}).json()
+    item_path = f"/api/v1/items/{created['id']}"
+    client.get(item_path)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/v1/items/{item_id}",le="+Inf"}' in body
+    assert 'http_requests_total{method="POST",route="/api/v1/items",status="201"}' in body
+    assert "http_requests_in_flight 0" in body
+    assert "http_response_size_bytes_count" in body
+    assert f'route="{item_path}"' not in body
+
+
+def test_unmatched_routes_share_one_series():
+    """测试未匹配的路径不会产生新的标签值"""
+    before = REQUEST_LATENCY.count("GET", "unmatched")
+    client.get("/no-such-path-1")
+    client.get("/no-such-path-2")
+    assert REQUEST_LATENCY.count("GET", "unmatched") == before + 2
+
+
+async def _bare_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _send(message):
+    pass
+
+
+async def _time_requests(asgi_app, n: int) -> float:
+    scope = {"type": "http", "method": "GET", "path": "/bench", "headers": []}
+    started = time.perf_counter()
+    for _ in range(n):
+        await asgi_app(dict(scope), _receive, _send)
+    return time.perf_counter() - started
+
+
+def test_middleware_overhead_within_budget():
+    """测试中间件每个请求的额外开销不超过预算（取多轮中的最小值以排除调度抖动）"""
+    n = 2000
+    wrapped = MetricsMiddleware(_bare_app)
+
+    async def measure():
+        overheads = []
+        for _ in range(5):
+            bare = await _time_requests(_bare_app, n)
+            instrumented = await _time_requests(wrapped, n)
+            overheads.append((instrumented - bare) / n)
+        return min(overheads)
+
+    overhead = asyncio.run(measure())
+    assert overhead < OVERHEAD_BUDGET, f"每个请求额外开销 {overhead * 1e6:.1f}µs 超出预算"
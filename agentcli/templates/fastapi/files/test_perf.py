@@ -0,0 +1,57 @@
+"""
+性能回归测试
+
+默认不运行，使用 `pytest -m perf` 运行。以进程内模式压测各路由，与 tests/perf_baseline.json 比较；
+LOADTEST_MODE=uvicorn 时经过真实的 HTTP 协议栈。与 test_database.py 一样使用 aiosqlite 内存数据库，
+不依赖配置中的数据库。硬件变化后用 `python -m tests.loadtest --update-baseline` 重新生成基线。
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from tests.loadtest import compare, load_baseline, run_load
+
+pytestmark = pytest.mark.perf
+
+BASELINE = load_baseline()
+
+
+@pytest.fixture(scope="module")
+def in_memory_database():
+    """把应用的数据库引擎换成 aiosqlite 内存数据库（应用启动时会连接数据库建表）"""
+    try:
+        from app.db import database
+    except ModuleNotFoundError as e:
+        # 未选择数据库时不生成 app/db
+        if e.name != "app.db":
+            raise
+        yield
+        return
+
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    original = database.engine, database.SessionLocal
+    database.engine = database.build_engine("sqlite+aiosqlite://")
+    database.SessionLocal = async_sessionmaker(database.engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        yield
+    finally:
+        database.engine, database.SessionLocal = original
+
+
+@pytest.fixture(scope="module")
+def results(in_memory_database):
+    return asyncio.run(run_load(
+        mode=os.getenv("LOADTEST_MODE", "inprocess"),
+        concurrency=int(os.getenv("LOADTEST_CONCURRENCY", "10")),
+        requests=int(os.getenv("LOADTEST_REQUESTS", "200"))
+    ))
+
+
+@pytest.mark.parametrize("route", list(BASELINE["routes"]))
+def test_route_within_baseline(results, route):
+    """测试路由的 RPS 和 p99 延迟没有超出基线容差"""
+    regressions = compare(results, {**BASELINE, "routes": {route: BASELINE["routes"][route]}})
+    assert not regressions, "\n".join(regressions)
@@ -1,37 +1,62 @@
 """
 命令行界面模块
+
+子命令在首次调用时才导入（登记在 LAZY_COMMANDS 中），`--help`、`--version` 不会导入子命令模块
+及其依赖，启动时间不会随着子命令和依赖的增加而变长。
+新增子命令：在 commands/ 下新建模块，再把它登记到 LAZY_COMMANDS。
 """
 
+import importlib
+from typing import Dict, Optional, Tuple
+
 import click
-from . import __version__
-from .core import main_function
 
+from . import __version__
 
-@click.group()
+# 子命令名 -> (相对模块路径:命令对象, 帮助摘要)
+LAZY_COMMANDS: Dict[str, Tuple[str, str]] = {
+    "run": (".commands.run:run", "逐行处理输入（支持 --jobs 并行）"),
+    "info": (".commands.info:info", "显示程序信息"),
+}
+
+
+class LazyGroup(click.Group):
+    """按需导入子命令的命令组"""
+
+    def __init__(self, *args, lazy_commands: Optional[Dict[str, Tuple[str, str]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            import_path, _ = self.lazy_commands[cmd_name]
+            module_name, attr = import_path.split(":")
+            module = importlib.import_module(module_name, __package__)
+            self.add_command(getattr(module, attr), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+    def format_commands(self, ctx, formatter):
+        # 使用登记的帮助摘要，显示帮助时不导入子命令模块
+        rows = []
+        for name in self.list_commands(ctx):
+            if name in self.commands:
+                rows.append((name, self.commands[name].get_short_help_str()))
+            else:
+                rows.append((name, self.lazy_commands[name][1]))
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
+@click.group(cls=LazyGroup, lazy_commands=LAZY_COMMANDS)
 @click.version_option(version=__version__)
 def cli():
     """{{description}}"""
     pass
 
 
-@cli.command()
-@click.option('--verbose', '-v', is_flag=True, help='显示详细输出')
-def run(verbose):
-    """运行主程序"""
-    if verbose:
-        click.echo('详细模式已启用')
-    
-    result = main_function()
-    click.echo(f'执行结果: {result}')
-
-
-@cli.command()
-def info():
-    """显示程序信息"""
-    click.echo(f'{{project_name}} v{__version__}')
-    click.echo('{{description}}')
-
-
 if __name__ == '__main__':
     cli()
-
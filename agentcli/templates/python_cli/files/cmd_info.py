@@ -0,0 +1,14 @@
+"""
+info 子命令
+"""
+
+import click
+
+from .. import __version__
+
+
+@click.command()
+def info():
+    """显示程序信息"""
+    click.echo(f'{{project_name}} v{__version__}')
+    click.echo('{{description}}')
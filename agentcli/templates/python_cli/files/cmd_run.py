@@ -0,0 +1,32 @@
+"""
+run 子命令
+"""
+
+import os
+
+import click
+
+from ..core import read_records, run_pipeline
+
+
+@click.command()
+@click.argument("files", nargs=-1, type=click.Path(exists=True, dir_okay=False))
+@click.option("--jobs", "-j", default={{cli_jobs}}, show_default=True, help="并行度（0 表示使用全部 CPU）")
+@click.option("--chunk-size", default={{chunk_size}}, show_default=True, help="并行时每个任务处理的记录数")
+@click.option("--threads/--processes", default={{cli_threads}}, show_default=True,
+              help="使用线程池（适合 I/O 密集）还是进程池（适合 CPU 密集）")
+@click.option("--verbose", "-v", is_flag=True, help="显示详细输出")
+def run(files, jobs, chunk_size, threads, verbose):
+    """逐行处理输入文件（未指定文件时读取标准输入）"""
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    if verbose:
+        click.echo(f"并行度: {jobs}（{'线程' if threads else '进程'}），每块 {chunk_size} 条", err=True)
+
+    count = 0
+    for result in run_pipeline(read_records(files), jobs=jobs, chunk_size=chunk_size, use_threads=threads):
+        click.echo(result)
+        count += 1
+
+    if verbose:
+        click.echo(f"处理完成: {count} 条记录", err=True)
@@ -1,31 +1,95 @@
 """
 核心业务逻辑模块
+
+处理流程由生成器串联：read_records 逐行读取输入，run_pipeline 逐条（或按块并行）处理并按输入顺序
+产出结果，任何时刻只有有限的数据在内存中，可以处理任意大的输入。
 """
 
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Sequence
+
+
+def process_record(record: str) -> str:
+    """处理单条记录
+
+    Args:
+        record: 输入记录（一行文本）
 
-def main_function():
-    """主要功能函数
-    
     Returns:
         处理结果
     """
     # TODO: 在这里实现你的核心逻辑
-    result = "处理完成"
-    return result
+    return record.strip()
 
 
-def helper_function(data):
-    """辅助函数示例
-    
+def process_chunk(chunk: Sequence[str]) -> List[str]:
+    """处理一块记录（在工作进程中执行，必须是模块级函数以便序列化）"""
+    return [process_record(record) for record in chunk]
+
+
+def read_records(paths: Sequence[str] = ()) -> Iterator[str]:
+    """逐行读取输入文件，未指定文件时读取标准输入
+
     Args:
-        data: 输入数据
-        
-    Returns:
-        处理后的数据
+        paths: 输入文件路径
+
+    Yields:
+        去掉换行符的每一行
     """
-    # TODO: 实现辅助功能
-    return data
+    if not paths:
+        for line in sys.stdin:
+            yield line.rstrip("\n")
+        return
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+
+def chunked(records: Iterable[str], size: int) -> Iterator[List[str]]:
+    """把记录流切分为固定大小的块"""
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_pipeline(
+    records: Iterable[str],
+    jobs: int = 1,
+    chunk_size: int = 1000,
+    use_threads: bool = False
+) -> Iterator[str]:
+    """处理记录流，按输入顺序产出结果
 
+    jobs > 1 时把记录按块分发到进程池（或线程池）并行处理。同时在途的块数限制为 jobs 的两倍，
+    输入再大内存占用也保持稳定；按块分发摊薄了进程间传输的开销。
 
-# 更多功能函数...
+    Args:
+        records: 输入记录
+        jobs: 并行度（1 表示在当前进程中逐条处理）
+        chunk_size: 每块的记录数
+        use_threads: 使用线程池（适合 I/O 密集的处理）
+
+    Yields:
+        处理结果
+    """
+    if jobs <= 1:
+        for record in records:
+            yield process_record(record)
+        return
 
+    pool_class = ThreadPoolExecutor if use_threads else ProcessPoolExecutor
+    with pool_class(max_workers=jobs) as executor:
+        pending = deque()
+        for chunk in chunked(records, chunk_size):
+            pending.append(executor.submit(process_chunk, chunk))
+            if len(pending) >= jobs * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
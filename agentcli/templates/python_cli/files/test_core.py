@@ -2,23 +2,72 @@
 核心模块测试
 """
 
+import itertools
+import subprocess
+import sys
+import time
+from pathlib import Path
+
 import pytest
-from {{module_name}}.core import main_function, helper_function
+from {{module_name}}.core import chunked, process_record, run_pipeline
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# `--help` 相对于空解释器启动的额外耗时上限（秒）
+STARTUP_BUDGET = 0.3
+
+
+def test_process_record():
+    """测试单条记录处理"""
+    assert process_record("  hello  ") == "hello"
+
+
+def test_chunked():
+    """测试分块"""
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunked([], 3)) == []
+
+
+@pytest.mark.parametrize("use_threads", [False, True])
+def test_parallel_matches_serial(use_threads):
+    """测试并行处理的结果与串行一致且保持输入顺序"""
+    records = [f" record {i} " for i in range(500)]
+    serial = list(run_pipeline(records))
+    parallel = list(run_pipeline(records, jobs=2, chunk_size=37, use_threads=use_threads))
+    assert parallel == serial
+
+
+def test_pipeline_is_lazy():
+    """测试流水线按需处理，可以消费无限输入的前几条"""
+    records = (str(i) for i in itertools.count())
+    assert list(itertools.islice(run_pipeline(records), 3)) == ["0", "1", "2"]
 
+    records = (str(i) for i in itertools.count())
+    assert list(itertools.islice(run_pipeline(records, jobs=2, chunk_size=10, use_threads=True), 3)) == ["0", "1", "2"]
 
-def test_main_function():
-    """测试主函数"""
-    result = main_function()
-    assert result is not None
-    assert isinstance(result, str)
 
+def _run(*args: str) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=PROJECT_ROOT, check=True, capture_output=True)
+    return time.perf_counter() - started
 
-def test_helper_function():
-    """测试辅助函数"""
-    test_data = "test"
-    result = helper_function(test_data)
-    assert result == test_data
 
+def test_help_does_not_import_subcommands():
+    """测试显示帮助时不导入子命令和业务模块"""
+    code = (
+        "import sys\n"
+        "from {{module_name}}.cli import cli\n"
+        "cli.main(['--help'], standalone_mode=False)\n"
+        "print(','.join(sorted(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True, capture_output=True, text=True)
+    modules = result.stdout.strip().splitlines()[-1].split(",")
+    assert "{{module_name}}.core" not in modules
+    assert not any(m.startswith("{{module_name}}.commands.") for m in modules)
 
-# 更多测试用例...
 
+def test_startup_time_within_budget():
+    """测试启动耗时不超过预算（取多次运行的最小值以排除抖动）"""
+    baseline = min(_run("-c", "pass") for _ in range(3))
+    startup = min(_run("-m", "{{module_name}}", "--help") for _ in range(3))
+    assert startup - baseline < STARTUP_BUDGET, f"启动耗时 {startup - baseline:.3f}s 超出预算"
@@ -9,9 +9,7 @@ import re
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 
-from rich.console import Console
-
-console = Console()
+from ..output import console
 
 
 class CodeValidationError(Exception):
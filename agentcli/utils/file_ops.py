@@ -7,12 +7,11 @@
 import os
 import re
 import subprocess
+import tempfile
 from pathlib import Path
 from typing import Optional
 
-from rich.console import Console
-
-console = Console()
+from ..output import console
 
 
 def validate_path(path_str: str) -> bool:
@@ -60,6 +59,8 @@ def create_directory(path: Path) -> bool:
 def create_file(path: Path, content: str) -> bool:
     """创建文件
     
+    先写入同目录下的临时文件再原子替换，编辑器和文件监听工具不会看到写了一半的文件。
+    
     Args:
         path: 文件路径
         content: 文件内容
@@ -67,16 +68,22 @@ def create_file(path: Path, content: str) -> bool:
     Returns:
         是否成功
     """
+    tmp_path = None
     try:
         # 确保父目录存在
         path.parent.mkdir(parents=True, exist_ok=True)
         
-        # 写入文件
-        with open(path, "w", encoding="utf-8") as f:
+        # 写入临时文件后原子替换
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
             f.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
         
         return True
     except Exception as e:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
         console.print(f"[red]创建文件失败 {path}: {e}[/red]")
         return False
 
@@ -0,0 +1,38 @@
+"""
+Token 估算工具模块
+
+在不依赖 tokenizer 的情况下粗略估算文本的 token 数量。
+"""
+
+from typing import Dict, List
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数量
+
+    CJK 字符约 1 个 token/字，其余字符约 4 个字符/token。
+
+    Args:
+        text: 文本内容
+
+    Returns:
+        估算的 token 数
+    """
+    if not text:
+        return 0
+
+    cjk_count = sum(1 for char in text if "一" <= char <= "鿿")
+    other_count = len(text) - cjk_count
+    return cjk_count + (other_count + 3) // 4
+
+
+def estimate_messages_tokens(messages: List[Dict[str, str]]) -> int:
+    """估算消息列表的 token 数量（含每条消息的固定开销）
+
+    Args:
+        messages: 消息列表
+
+    Returns:
+        估算的 token 数
+    """
+    return sum(estimate_tokens(m.get("content") or "") + 4 for m in messages)
@@ -0,0 +1,154 @@
+"""
+工作进程模块
+
+`agentcli worker` 从持久化任务队列中领取任务，用 Scaffolder 执行规划和生成。
+执行期间定期心跳续约；项目先生成到暂存目录，成功后再原子地移动到输出目录，
+租约被其他工作进程接管时，过期工作进程的产物会被丢弃而不会覆盖输出。
+"""
+
+import os
+import shutil
+import socket
+import threading
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
+
+from .job_queue import DEAD, JobQueue, LeasedJob
+from .output import console
+
+if TYPE_CHECKING:
+    from .scaffold import Scaffolder
+
+
+class Worker:
+    """队列工作进程（可以在同一进程中用多个线程并行运行）"""
+
+    def __init__(
+        self,
+        job_queue: JobQueue,
+        scaffolder: "Scaffolder",
+        output_dir: Path,
+        worker_id: Optional[str] = None,
+        visibility_timeout: float = 300,
+        retry_delay: float = 30,
+        poll_interval: float = 1.0
+    ):
+        """初始化工作进程
+
+        Args:
+            job_queue: 任务队列
+            scaffolder: 预热的项目生成器
+            output_dir: 输出目录（每个项目输出到 output_dir/<project_name>）
+            worker_id: 工作进程标识（默认为 主机名-进程号-线程号）
+            visibility_timeout: 租约时长（秒），工作进程失联超过该时长后任务重新可见
+            retry_delay: 首次重试延迟（秒），之后按尝试次数指数增长
+            poll_interval: 队列为空时的轮询间隔（秒）
+        """
+        self.job_queue = job_queue
+        self.scaffolder = scaffolder
+        self.output_dir = Path(output_dir).resolve()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{threading.get_ident()}"
+        self.visibility_timeout = visibility_timeout
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.processed = 0
+
+    def _heartbeat(self, job: LeasedJob, done: threading.Event, lost: threading.Event):
+        """每 1/3 租约时长续约一次，直到任务结束或租约丢失"""
+        while not done.wait(self.visibility_timeout / 3):
+            if not self.job_queue.heartbeat(job.id, job.lease_token, self.visibility_timeout):
+                lost.set()
+                return
+
+    def _publish(self, staging_dir: Path, project_name: str) -> Path:
+        """把暂存目录中的项目移动到输出目录（替换已有的同名项目）"""
+        target = self.output_dir / project_name
+        if target.exists():
+            trash = self.output_dir / f".{project_name}.old-{os.getpid()}-{threading.get_ident()}"
+            os.replace(target, trash)
+            os.replace(staging_dir / project_name, target)
+            shutil.rmtree(trash, ignore_errors=True)
+        else:
+            os.replace(staging_dir / project_name, target)
+        return target
+
+    def process(self, job: LeasedJob):
+        """执行一个已领取的任务"""
+        requirements = job.payload.get("requirements", {})
+        console.print(
+            f"[cyan]▶ 任务 #{job.id}（第 {job.attempts}/{job.max_attempts} 次尝试）: "
+            f"{requirements.get('project_name', '?')}[/cyan]"
+        )
+
+        staging_dir = self.output_dir / ".staging" / f"{job.id}-{job.lease_token}"
+        done, lost = threading.Event(), threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, done, lost), daemon=True)
+        heartbeat.start()
+
+        try:
+            result = self.scaffolder.run(requirements, staging_dir, offline=bool(job.payload.get("offline")))
+            error = result.get("error") if not result.get("success") else None
+        except Exception as e:
+            result, error = {}, str(e)
+        finally:
+            done.set()
+            heartbeat.join()
+
+        try:
+            if lost.is_set():
+                console.print(f"[yellow]任务 #{job.id} 的租约已被接管，丢弃本次结果[/yellow]")
+                return
+
+            if error:
+                delay = self.retry_delay * (2 ** (job.attempts - 1))
+                status = self.job_queue.fail(job.id, job.lease_token, error, delay)
+                if status == DEAD:
+                    console.print(f"[red]✗ 任务 #{job.id} 已进入死信: {error}[/red]")
+                else:
+                    console.print(f"[yellow]任务 #{job.id} 失败，{delay:.0f}s 后重试: {error}[/yellow]")
+                return
+
+            # 发布前再续约一次：续约成功后的整个租约时长内不会被接管，移动目录远快于租约时长；
+            # 续约失败说明心跳间隙中租约已被接管，丢弃结果
+            if not self.job_queue.heartbeat(job.id, job.lease_token, self.visibility_timeout):
+                console.print(f"[yellow]任务 #{job.id} 的租约已被接管，丢弃本次结果[/yellow]")
+                return
+
+            project_path = self._publish(staging_dir, result["project_name"])
+            result["project_path"] = str(project_path)
+            if self.job_queue.complete(job.id, job.lease_token, result):
+                console.print(f"[green]✓ 任务 #{job.id} 完成: {project_path}（{result['elapsed']:.1f}s）[/green]")
+            else:
+                console.print(f"[yellow]任务 #{job.id} 完成时租约已失效[/yellow]")
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            self.processed += 1
+
+    def run_once(self) -> bool:
+        """领取并执行一个任务
+
+        Returns:
+            是否领取到了任务
+        """
+        job = self.job_queue.lease(self.worker_id, self.visibility_timeout)
+        if job is None:
+            return False
+        self.process(job)
+        return True
+
+    def run(self, max_jobs: Optional[int] = None, burst: bool = False, stop: Optional[threading.Event] = None):
+        """持续处理任务
+
+        Args:
+            max_jobs: 最多处理的任务数（为 None 时不限制）
+            burst: 队列为空时立即退出（适合定时批处理）
+            stop: 停止信号
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if max_jobs is not None and self.processed >= max_jobs:
+                return
+            if not self.run_once():
+                if burst:
+                    return
+                stop.wait(self.poll_interval)
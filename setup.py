@@ -30,7 +30,7 @@ setup(
     install_requires=requirements,
     entry_points={
         "console_scripts": [
-            "agentcli=agentcli.main:cli",
+            "agentcli=agentcli.main:main",
         ],
     },
     include_package_data=True,
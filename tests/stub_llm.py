@@ -0,0 +1,145 @@
+"""
+本地替身 LLM 服务
+
+实现 OpenAI 兼容的 /chat/completions 接口（含流式 SSE），用于服务模式的功能测试和压测：
+任务规划请求返回一个最小的任务清单，代码生成请求返回一段合法的 Python 代码。
+
+也可以单独运行，配合 DEEPSEEK_BASE_URL 对 agentcli service 做压测：
+    python -m tests.stub_llm --port 9000 --latency 0.5
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def build_task_list(prompt: str) -> str:
+    """根据规划提示词中的需求总结构造任务清单"""
+    match = re.search(r"^- project_name: (.+)$", prompt, re.MULTILINE)
+    project_name = match.group(1).strip() if match else "demo-project"
+    module_name = project_name.replace("-", "_")
+    task_list = {
+        "reasoning": "替身服务生成的任务清单",
+        "project_name": project_name,
+        "tasks": [
+            {"id": 1, "name": "创建项目目录", "description": "创建项目目录", "type": "create_directory",
+             "params": {"path": f"{project_name}/{module_name}"}},
+            {"id": 2, "name": "创建包初始化文件", "description": "包初始化", "type": "create_file",
+             "params": {"path": f"{project_name}/{module_name}/__init__.py", "content": '__version__ = "0.1.0"\n'}},
+            {"id": 3, "name": "生成核心模块", "description": "核心逻辑", "type": "create_file",
+             "params": {"path": f"{project_name}/{module_name}/core.py", "code_description": "核心逻辑"}},
+        ],
+    }
+    return f"好的，任务清单如下：\n[TASK_LIST_START]\n{json.dumps(task_list, ensure_ascii=False)}\n[TASK_LIST_END]\n"
+
+
+CODE_RESPONSE = '''"""核心模块"""
+
+
+def run(value: str) -> str:
+    """处理输入"""
+    return value.strip()
+'''
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """处理 /chat/completions 请求"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length))
+        prompt = request["messages"][-1]["content"]
+        content = build_task_list(prompt) if "[TASK_LIST_START]" in prompt else CODE_RESPONSE
+
+        with self.server.lock:
+            self.server.requests += 1
+        time.sleep(self.server.latency)
+
+        if request.get("stream"):
+            self._stream(content, request.get("model", "stub"))
+        else:
+            self._complete(content, request.get("model", "stub"))
+
+    def _complete(self, content: str, model: str):
+        body = json.dumps({
+            "id": "stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, content: str, model: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        chunk_size = max(1, len(content) // self.server.chunks)
+        for start in range(0, len(content), chunk_size):
+            chunk = {
+                "id": "stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "delta": {"content": content[start:start + chunk_size]}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(self.server.token_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    """替身 LLM 服务"""
+
+    daemon_threads = True
+    # 默认的监听队列只有 5，并发连接超出时客户端要等 SYN 重传（约 1 秒）
+    request_queue_size = 128
+
+    def __init__(self, port: int = 0, latency: float = 0.0, token_delay: float = 0.0, chunks: int = 8):
+        """初始化替身服务
+
+        Args:
+            port: 监听端口（0 为随机端口）
+            latency: 首 token 延迟（秒）
+            token_delay: 每个片段之间的延迟（秒）
+            chunks: 流式响应拆分的片段数
+        """
+        self.latency = latency
+        self.token_delay = token_delay
+        self.chunks = chunks
+        self.requests = 0
+        self.lock = threading.Lock()
+        super().__init__(("127.0.0.1", port), StubLLMHandler)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "StubLLMServer":
+        """在后台线程中运行"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地替身 LLM 服务")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", type=float, default=0.5, help="首 token 延迟（秒）")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="片段间隔（秒）")
+    args = parser.parse_args()
+
+    server = StubLLMServer(args.port, args.latency, args.token_delay)
+    print(f"替身 LLM 服务已启动: {server.base_url}")
+    server.serve_forever()
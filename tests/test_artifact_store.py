@@ -0,0 +1,101 @@
+"""
+项目产物缓存测试
+"""
+
+import os
+import pytest
+from pathlib import Path
+
+from agentcli import artifact_store
+from agentcli.artifact_store import ArtifactStore, requirements_fingerprint
+from agentcli.config import get_templates_dir
+from agentcli.task_executor import TaskExecutor
+from agentcli.task_generator import TaskGenerator
+from agentcli.utils.template_loader import TemplateLoader
+
+
+REQUIREMENTS = {
+    "project_type": "Python CLI 工具",
+    "purpose": "文件批量重命名工具",
+    "project_name": "file-renamer",
+}
+
+
+def make_project(root: Path) -> Path:
+    """构造一个小项目"""
+    project_dir = root / "demo"
+    (project_dir / "pkg").mkdir(parents=True)
+    (project_dir / "pkg" / "__init__.py").write_text('"""demo"""\n')
+    (project_dir / "run.sh").write_text("#!/bin/sh\necho hi\n")
+    os.chmod(project_dir / "run.sh", 0o755)
+    (project_dir / "pkg" / "__pycache__").mkdir()
+    (project_dir / "pkg" / "__pycache__" / "x.pyc").write_bytes(b"\x00")
+    return project_dir
+
+
+def test_fingerprint_ignores_key_order():
+    """测试需求指纹与字段顺序无关，内容变化时改变"""
+    templates_dir = get_templates_dir()
+    reordered = dict(reversed(list(REQUIREMENTS.items())))
+    changed = dict(REQUIREMENTS, purpose="日志分析工具")
+
+    assert requirements_fingerprint(REQUIREMENTS, templates_dir) == requirements_fingerprint(reordered, templates_dir)
+    assert requirements_fingerprint(REQUIREMENTS, templates_dir) != requirements_fingerprint(changed, templates_dir)
+
+
+@pytest.mark.parametrize("link_mode", ["copy", "hardlink"])
+def test_ingest_and_materialize(tmp_path, monkeypatch, link_mode):
+    """测试存入并物化项目"""
+    def no_reflink(src, dst):
+        raise OSError("reflink not supported")
+
+    # 在支持 reflink 的文件系统上也走硬链接分支
+    monkeypatch.setattr(artifact_store, "_reflink", no_reflink)
+    make_project(tmp_path / "src")
+    store = ArtifactStore(tmp_path / "store", link_mode)
+    manifest = store.ingest("fp", tmp_path / "src", "demo")
+
+    assert all("__pycache__" not in entry["path"] for entry in manifest["files"])
+
+    counts = store.materialize(store.lookup("fp"), tmp_path / "out")
+    assert counts is not None
+    assert sum(counts.values()) == 2
+    if link_mode == "copy":
+        assert counts["copy"] == 2
+    else:
+        # 0644 和 0755 的文件都能硬链接到同权限的 blob
+        assert counts["hardlink"] == 2
+
+    restored = tmp_path / "out" / "demo"
+    assert (restored / "pkg" / "__init__.py").read_text() == '"""demo"""\n'
+    assert os.access(restored / "run.sh", os.X_OK)
+
+
+def test_corrupted_blob_is_rejected(tmp_path):
+    """测试 blob 被修改后缓存失效"""
+    make_project(tmp_path / "src")
+    store = ArtifactStore(tmp_path / "store", "copy")
+    manifest = store.ingest("fp", tmp_path / "src", "demo")
+
+    entry = manifest["files"][0]
+    blob = store._blob_path(entry["hash"], entry["mode"])
+    blob.write_text("tampered")
+
+    assert store.materialize(manifest, tmp_path / "out") is None
+
+
+def test_executor_restores_cached_project(tmp_path):
+    """测试执行成功后再次执行相同需求直接从缓存恢复"""
+    templates_dir = get_templates_dir()
+    task_list = TaskGenerator().generate_offline_tasks(REQUIREMENTS, TemplateLoader(templates_dir))
+    store = ArtifactStore(tmp_path / "store", "copy")
+
+    first = TaskExecutor(templates_dir, tmp_path / "first", requirements=REQUIREMENTS, artifact_store=store)
+    assert first.execute(task_list) == True
+
+    second = TaskExecutor(templates_dir, tmp_path / "second", requirements=REQUIREMENTS, artifact_store=store)
+    assert second.restore_cached_project() == task_list.project_name
+
+    original = sorted(p.relative_to(tmp_path / "first") for p in (tmp_path / "first").rglob("*") if p.is_file())
+    restored = sorted(p.relative_to(tmp_path / "second") for p in (tmp_path / "second").rglob("*") if p.is_file())
+    assert restored == original
@@ -0,0 +1,110 @@
+"""
+分块代码生成测试
+"""
+
+import ast
+import threading
+from unittest.mock import Mock
+
+from agentcli.chunked import ChunkedGenerator, extract_body, find_stubs, splice
+
+
+SKELETON = '''"""库存管理"""
+
+from typing import Dict, overload
+
+
+class Inventory:
+    """库存"""
+
+    def __init__(self):
+        self.items: Dict[str, int] = {}
+
+    def add(self, name: str, count: int = 1) -> int:
+        """增加库存，返回新数量"""
+        ...
+
+    async def remove(self, name: str) -> None:
+        """删除商品"""
+        ...
+
+    @overload
+    def get(self, name: str) -> int: ...
+
+
+def total(inventory: Inventory) -> int: ...
+'''
+
+BODIES = {
+    "Inventory.add": '''def add(self, name: str, count: int = 1) -> int:
+    """增加库存，返回新数量"""
+    self.items[name] = self.items.get(name, 0) + count
+    return self.items[name]
+''',
+    "Inventory.remove": '''async def remove(self, name: str) -> None:
+    self.items.pop(name, None)
+''',
+    "total": "def total(inventory: Inventory) -> int: return sum(inventory.items.values())",
+}
+
+
+def test_find_stubs():
+    """测试定位待实现的函数（跳过 overload 和已实现的函数）"""
+    stubs = find_stubs(SKELETON)
+    assert [stub.qualname for stub in stubs] == ["Inventory.add", "Inventory.remove", "total"]
+    assert stubs[0].indent == " " * 8 and stubs[0].has_docstring
+    assert stubs[2].prefix == "def total(inventory: Inventory) -> int:"
+
+
+def test_extract_body_drops_duplicate_docstring():
+    """测试取出函数体并去掉重复的文档字符串"""
+    assert extract_body(BODIES["Inventory.add"], "add") == [
+        "self.items[name] = self.items.get(name, 0) + count",
+        "return self.items[name]",
+    ]
+    assert extract_body(BODIES["total"], "total") == ["return sum(inventory.items.values())"]
+
+
+def test_splice_produces_valid_module():
+    """测试按位置拼接后的代码合法且行为正确"""
+    stubs = find_stubs(SKELETON)
+    bodies = [extract_body(BODIES[stub.qualname], stub.qualname.split(".")[-1]) for stub in stubs]
+    code = splice(SKELETON, stubs, bodies)
+
+    ast.parse(code)
+    namespace = {}
+    exec(code, namespace)
+    inventory = namespace["Inventory"]()
+    assert inventory.add("apple", 3) == 3
+    assert namespace["total"](inventory) == 3
+    assert '"""增加库存，返回新数量"""' in code
+
+
+def test_generator_fills_functions_in_parallel():
+    """测试函数体并行生成（三个请求同时在途）"""
+    barrier = threading.Barrier(3, timeout=5)
+
+    def fill(file_path, skeleton, qualname, requirements):
+        barrier.wait()
+        return BODIES[qualname]
+
+    ai_client = Mock()
+    ai_client.generate_code_skeleton.return_value = SKELETON
+    ai_client.generate_function_body.side_effect = fill
+
+    code = ChunkedGenerator(ai_client, max_workers=4).generate("demo/inventory.py", "", "", {}, {}, [])
+    assert code is not None
+    assert "self.items.pop(name, None)" in code
+    assert ai_client.generate_function_body.call_count == 3
+
+
+def test_generator_gives_up_on_bad_skeleton_or_body():
+    """测试骨架语法错误或函数体反复无法解析时返回 None"""
+    ai_client = Mock()
+    ai_client.generate_code_skeleton.return_value = "def broken(:\n    ..."
+    assert ChunkedGenerator(ai_client).generate("x.py", "", "", {}, {}, []) is None
+
+    ai_client.generate_code_skeleton.return_value = SKELETON
+    ai_client.generate_function_body.return_value = "这不是代码("
+    assert ChunkedGenerator(ai_client).generate("x.py", "", "", {}, {}, []) is None
+    assert ai_client.generate_function_body.call_count == 3 * 2
@@ -42,3 +42,63 @@ def test_project_name_edge_cases():
     # 空格
     assert sanitize_project_name("my project name") == "my-project-name"
 
+
+
+PROMPT_FILE = Path(__file__).resolve().parent.parent / "systemprompt.md"
+
+
+def test_build_phase_prompts_slims_code_generation():
+    """测试代码生成阶段的提示词只包含需要的部分"""
+    from agentcli.config import build_phase_prompts, strip_section_tags
+    from agentcli.utils.tokens import estimate_tokens
+
+    content = PROMPT_FILE.read_text(encoding="utf-8")
+    full = strip_section_tags(content)
+    prompts = build_phase_prompts(content)
+
+    assert set(prompts) == {"requirements", "planning", "code_generation", "repair"}
+    assert "[TASK_LIST_START]" in prompts["planning"]
+    assert "[TASK_LIST_START]" not in prompts["code_generation"]
+    assert estimate_tokens(prompts["code_generation"]) < estimate_tokens(full) * 0.4
+    assert "<!--" not in full
+    assert all("<!--" not in prompt for prompt in prompts.values())
+
+
+def test_build_phase_prompts_sections():
+    """测试标记前的内容所有阶段共用，未知阶段报错"""
+    from agentcli.config import build_phase_prompts
+
+    content = "# 标题\n<!-- phases: planning -->\n## 规划\n<!-- phases: code_generation, repair -->\n## 代码\n"
+    prompts = build_phase_prompts(content)
+    assert prompts["planning"] == "# 标题\n\n## 规划"
+    assert prompts["repair"] == "# 标题\n\n## 代码"
+    assert prompts["requirements"] == "# 标题"
+    assert build_phase_prompts("无标记") == {}
+
+    with pytest.raises(ValueError):
+        build_phase_prompts("<!-- phases: unknown -->\n内容")
+
+
+def test_get_system_prompt_falls_back_to_full_prompt():
+    """测试没有阶段提示词时使用完整提示词"""
+    from agentcli.config import Config
+
+    config = Config(deepseek_api_key="sk-test", system_prompt="完整", project_root=Path("."),
+                    phase_prompts={"planning": "规划"})
+    assert config.get_system_prompt("planning") == "规划"
+    assert config.get_system_prompt("repair") == "完整"
+
+
+def test_invalid_modes_fall_back_to_defaults():
+    """测试枚举类配置取值无效时使用默认值"""
+    from agentcli.config import Config
+
+    config = Config(deepseek_api_key="sk-test", system_prompt="完整", project_root=Path("."),
+                    continuation_mode="prefx", chunked_generation="on", artifact_link_mode="symlink")
+    assert config.continuation_mode == "prompt"
+    assert config.chunked_generation == "auto"
+    assert config.artifact_link_mode == "auto"
+
+    config = Config(deepseek_api_key="sk-test", system_prompt="完整", project_root=Path("."),
+                    continuation_mode="off")
+    assert config.continuation_mode == "off"
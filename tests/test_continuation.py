@@ -0,0 +1,195 @@
+"""
+截断续写测试
+"""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from openai import OpenAIError
+
+from agentcli.ai_client import AIClient
+from agentcli.config import Config
+from agentcli.continuation import build_continuation_messages, stitch
+
+
+def test_stitch_removes_repeated_prefix():
+    """测试续写内容与已收到内容的重叠部分只保留一份"""
+    partial = "def run(value):\n    result = value.strip()\n    retu"
+    # 从被截断的行重新开始
+    assert stitch(partial, "    return result\n") == "def run(value):\n    result = value.strip()\n    return result\n"
+    # 重复了前面完整的几行
+    assert stitch(partial, "    result = value.strip()\n    return result\n").count("result = value") == 1
+    # 直接接着输出
+    assert stitch(partial, "rn result\n").endswith("    return result\n")
+    # 从头重新输出
+    assert stitch("import os\n", "import os\nimport sys\n") == "import os\nimport sys\n"
+
+
+def test_stitch_drops_duplicate_fence():
+    """测试未闭合代码块中续写开头多余的 ``` 标记被去掉"""
+    partial = "```python\nimport os\n"
+    assert stitch(partial, "```python\nimport sys\n```") == "```python\nimport os\nimport sys\n```"
+
+
+def test_build_continuation_messages():
+    """测试两种续写方式的消息格式"""
+    messages = [{"role": "user", "content": "写代码"}]
+    prefix = build_continuation_messages(messages, "import os", "prefix")
+    assert prefix[-1] == {"role": "assistant", "content": "import os", "prefix": True}
+    prompt = build_continuation_messages(messages, "import os", "prompt")
+    assert prompt[-2]["role"] == "assistant" and prompt[-1]["role"] == "user"
+    assert messages == [{"role": "user", "content": "写代码"}]
+
+
+def make_chunk(text, finish_reason=None):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text), finish_reason=finish_reason)])
+
+
+def make_completion(text, finish_reason):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text), finish_reason=finish_reason)])
+
+
+class BrokenStream:
+    """输出若干片段后连接断开"""
+
+    def __init__(self, pieces):
+        self.pieces = pieces
+
+    def __iter__(self):
+        for piece in self.pieces:
+            yield make_chunk(piece)
+        raise ConnectionError("connection reset")
+
+    def close(self):
+        pass
+
+
+class BuggyStream(BrokenStream):
+    """输出若干片段后因程序错误中止（不是网络问题）"""
+
+    def __iter__(self):
+        for piece in self.pieces:
+            yield make_chunk(piece)
+        raise TypeError("unsupported operand")
+
+
+class FakeBadRequest(OpenAIError):
+    status_code = 400
+
+
+class FakeCompletions:
+    """依次返回预设的响应（异常实例会被抛出），并记录请求消息"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs["messages"])
+        response = self.responses[len(self.requests) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def make_client(responses, **overrides):
+    config = Config(
+        deepseek_api_key="sk-test",
+        deepseek_base_url=f"https://continuation-{len(responses)}.test",
+        system_prompt="test",
+        project_root=Path("."),
+        hedge_ttft_seconds=0,
+        hedge_gap_seconds=0,
+        **overrides
+    )
+    client = AIClient(config)
+    completions = FakeCompletions(responses)
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    client._get_client = lambda endpoint: fake
+    return client, completions
+
+
+def test_length_truncation_is_continued():
+    """测试 finish_reason 为 length 时用 assistant 前缀续写"""
+    client, completions = make_client([
+        make_completion("import os\n\n\ndef main():\n    print(os.", "length"),
+        make_completion("    print(os.getcwd())\n", "stop"),
+    ], continuation_mode="prefix")
+    result = client.chat([{"role": "user", "content": "写代码"}], phase="code_generation")
+
+    assert result == "import os\n\n\ndef main():\n    print(os.getcwd())\n"
+    assert completions.requests[1][-1] == {
+        "role": "assistant", "content": "import os\n\n\ndef main():\n    print(os.", "prefix": True
+    }
+    assert client.get_run_stats()["continuations"] == 1
+
+
+def test_interrupted_stream_resumes_from_partial():
+    """测试流式连接中断后只续写缺失的部分，监听器收到的内容也已去重"""
+    client, completions = make_client([
+        BrokenStream(["def run():\n", "    va"]),
+        [make_chunk("    value = 1\n"), make_chunk("    return value\n", "stop")],
+    ])
+    received = []
+
+    def listener(kind, data):
+        if kind == "token":
+            received.append(data["text"])
+        elif kind == "token_reset":
+            text = "".join(received)
+            received[:] = [text[:len(text) - data["discarded"]]]
+
+    client.set_event_listener(listener)
+    result = client.chat([{"role": "user", "content": "写代码"}], stream=True, phase="code_generation")
+
+    assert result == "def run():\n    value = 1\n    return value\n"
+    assert "".join(received) == result
+    assert len(completions.requests) == 2
+
+
+def test_programming_error_in_stream_is_not_continued():
+    """测试流式读取中的程序错误不被当作流中断：不续写、不重试，也不计入熔断"""
+    client, completions = make_client([
+        BuggyStream(["def run():\n", "    va"]),
+        [make_chunk("    value = 1\n", "stop")],
+    ])
+    result = client.chat([{"role": "user", "content": "写代码"}], stream=True, phase="code_generation")
+
+    assert result is None
+    assert len(completions.requests) == 1
+    stats = client.get_run_stats()
+    assert stats["transient_errors"] == 0 and stats["continuations"] == 0
+    governor = client._get_governor(client.config.get_routes("code_generation")[0])
+    assert governor.breaker.consecutive_failures == 0
+
+
+def test_default_mode_continues_with_prompt():
+    """测试默认的续写方式不依赖 assistant 前缀（默认端点不是 /beta）"""
+    client, completions = make_client([
+        make_completion("第一部分，", "length"),
+        make_completion("第二部分。", "stop"),
+    ])
+    result = client.chat([{"role": "user", "content": "写文档"}])
+
+    assert result == "第一部分，第二部分。"
+    assert len(completions.requests) == 2
+    assert completions.requests[1][-1]["role"] == "user"
+    assert "prefix" not in completions.requests[1][-2]
+
+
+def test_prefix_unsupported_falls_back_to_prompt():
+    """测试端点拒绝 assistant 前缀时改用追加用户消息的方式续写，且不计入端点失败"""
+    client, completions = make_client([
+        make_completion("第一部分，", "length"),
+        FakeBadRequest("prefix is not supported"),
+        make_completion("第二部分。", "stop"),
+    ], continuation_mode="prefix")
+    result = client.chat([{"role": "user", "content": "写文档"}])
+
+    assert result == "第一部分，第二部分。"
+    assert completions.requests[2][-1]["role"] == "user"
+    assert "prefix" not in completions.requests[2][-2]
+    stats = client.get_run_stats()
+    assert stats["fatal_errors"] == 0 and stats["transient_errors"] == 0
+    governor = client._get_governor(client.config.get_routes("requirements")[0])
+    assert governor.breaker.consecutive_failures == 0
@@ -0,0 +1,162 @@
+"""
+守护进程测试
+"""
+
+import os
+import stat
+import threading
+import pytest
+from pathlib import Path
+
+from agentcli.config import Config
+from agentcli.daemon import DaemonClient, DaemonError, ScaffoldDaemon
+from agentcli.scaffold import Scaffolder
+from agentcli.task_generator import TaskList
+
+from .stub_llm import StubLLMServer
+
+
+REQUIREMENTS = {
+    "project_type": "Python CLI 工具",
+    "purpose": "文件批量重命名工具",
+    "project_name": "file-renamer",
+}
+
+
+@pytest.fixture(scope="module")
+def stub():
+    """替身 LLM 服务（测试之间共享，按请求数的增量断言）"""
+    server = StubLLMServer().start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def daemon(tmp_path, stub):
+    """在后台线程中运行守护进程"""
+    config = Config(
+        deepseek_api_key="sk-test",
+        deepseek_base_url=stub.base_url,
+        system_prompt="test",
+        project_root=Path("."),
+        cache_dir=tmp_path / "cache"
+    )
+    server = ScaffoldDaemon(tmp_path / "agentcli.sock", Scaffolder(config))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_connect_without_daemon(tmp_path):
+    """测试守护进程未运行时客户端返回 None"""
+    assert DaemonClient.connect(tmp_path / "missing.sock") is None
+
+
+def test_daemon_scaffold_and_cache(daemon, tmp_path):
+    """测试通过守护进程生成项目，第二次命中产物缓存"""
+    client = DaemonClient.connect(daemon.socket_path)
+    assert client is not None
+
+    first = client.request("scaffold", requirements=REQUIREMENTS,
+                           output_dir=str(tmp_path / "a"), offline=True)
+    assert first["cached"] == False
+    assert (Path(first["project_path"]) / "file_renamer" / "cli.py").exists()
+
+    second = client.request("scaffold", requirements=REQUIREMENTS,
+                            output_dir=str(tmp_path / "b"), offline=True)
+    assert second["cached"] == True
+    assert (tmp_path / "b" / "file-renamer" / "file_renamer" / "cli.py").exists()
+
+
+def test_daemon_plan_then_execute(daemon, tmp_path):
+    """测试分步规划和执行"""
+    client = DaemonClient(daemon.socket_path)
+    planned = client.request("plan", requirements=REQUIREMENTS, offline=True)
+
+    result = client.request("execute", requirements=REQUIREMENTS,
+                            task_list=planned["task_list"], output_dir=str(tmp_path / "out"))
+    assert result["project_name"] == "file-renamer"
+
+
+def test_daemon_rejects_bad_request(daemon):
+    """测试无效请求返回错误而不是断开"""
+    client = DaemonClient(daemon.socket_path)
+    with pytest.raises(DaemonError):
+        client.request("plan")
+    with pytest.raises(DaemonError):
+        client.request("unknown")
+    assert client.request("ping")["requests"] == 3
+
+
+def test_second_daemon_refuses_to_start(daemon):
+    """测试同一 socket 不能启动两个守护进程"""
+    with pytest.raises(RuntimeError):
+        ScaffoldDaemon(daemon.socket_path, daemon.scaffolder)
+
+
+def test_socket_is_private(daemon):
+    """测试 socket 创建时即只允许当前用户访问，且不改变进程的 umask"""
+    assert stat.S_IMODE(os.stat(daemon.socket_path).st_mode) == 0o600
+    umask = os.umask(0o022)
+    os.umask(umask)
+    assert umask != 0o177
+
+
+def test_daemon_streams_progress(daemon, tmp_path):
+    """测试请求带事件回调时收到任务进度事件"""
+    events = []
+    client = DaemonClient(daemon.socket_path)
+    result = client.request("scaffold", on_event=lambda kind, data: events.append(kind),
+                            requirements=REQUIREMENTS, output_dir=str(tmp_path / "out"), offline=True)
+    assert result["success"]
+    kinds = set(events)
+    assert {"planning", "planned", "task_started", "task_completed", "file_written"} <= kinds
+
+
+def test_daemon_streams_ai_tokens(daemon, stub):
+    """测试 AI 规划的流式输出转发给客户端"""
+    tokens = []
+
+    def on_event(kind, data):
+        if kind == "token":
+            tokens.append(data["text"])
+
+    client = DaemonClient(daemon.socket_path)
+    planned = client.request("plan", on_event=on_event, requirements=REQUIREMENTS)
+    assert planned["task_list"]["project_name"] == "file-renamer"
+    assert "[TASK_LIST_START]" in "".join(tokens)
+
+
+@pytest.mark.parametrize("answer", [True, False])
+def test_daemon_plan_asks_before_reusing_cache(daemon, stub, answer):
+    """测试交互式规划命中缓存任务清单时由客户端决定是否复用"""
+    offline = daemon.scaffolder.plan(REQUIREMENTS, offline=True)
+    daemon.scaffolder.plan_cache.add(REQUIREMENTS, offline)
+    before = stub.requests
+    asked = []
+
+    def on_confirm(name, data):
+        asked.append((name, data))
+        return answer
+
+    client = DaemonClient(daemon.socket_path)
+    planned = client.request("plan", on_confirm=on_confirm, requirements=REQUIREMENTS)
+    assert [name for name, _ in asked] == ["reuse_plan"]
+    assert asked[0][1]["purpose"] == REQUIREMENTS["purpose"]
+    # 拒绝复用时由 AI 重新规划
+    assert stub.requests - before == (0 if answer else 1)
+    assert TaskList(**planned["task_list"]).project_name == "file-renamer"
+
+
+def test_daemon_plan_reuses_cache_without_asking(daemon, stub):
+    """测试非交互请求命中缓存任务清单时直接复用"""
+    offline = daemon.scaffolder.plan(REQUIREMENTS, offline=True)
+    daemon.scaffolder.plan_cache.add(REQUIREMENTS, offline)
+    before = stub.requests
+
+    client = DaemonClient(daemon.socket_path)
+    client.request("plan", requirements=REQUIREMENTS)
+    assert stub.requests == before
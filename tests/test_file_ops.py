@@ -61,6 +61,17 @@ def test_create_file_with_parent_dir(temp_dir):
     assert test_file.parent.exists()
 
 
+def test_create_file_replaces_atomically(temp_dir):
+    """测试覆盖写入不留下临时文件"""
+    test_file = temp_dir / "test.txt"
+    create_file(test_file, "old")
+    
+    success = create_file(test_file, "new")
+    assert success == True
+    assert test_file.read_text() == "new"
+    assert [p.name for p in temp_dir.iterdir()] == ["test.txt"]
+
+
 def test_read_file(temp_dir):
     """测试读取文件"""
     test_file = temp_dir / "read_test.txt"
@@ -0,0 +1,116 @@
+"""
+尾延迟对冲测试
+"""
+
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+
+from agentcli.ai_client import AIClient
+from agentcli.config import Config
+from agentcli.hedging import HedgeBudget, percentile
+
+
+def make_chunk(text):
+    """构造一个流式响应片段"""
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class FakeStream:
+    """模拟流式响应，stall=True 时在输出第一个片段后卡住直到被关闭"""
+
+    def __init__(self, pieces, stall=False):
+        self.pieces = pieces
+        self.stall = stall
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        for i, piece in enumerate(self.pieces):
+            if self.stall and i == 1:
+                self.closed.wait(5)
+                raise ConnectionError("stream closed")
+            yield make_chunk(piece)
+
+    def close(self):
+        self.closed.set()
+
+
+class FakeCompletions:
+    """依次返回预设的流"""
+
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        stream = self.streams[self.calls]
+        self.calls += 1
+        return stream
+
+
+def make_client(streams, **overrides):
+    """构造使用模拟流的 AI 客户端"""
+    config = Config(
+        deepseek_api_key="sk-test",
+        system_prompt="test",
+        project_root=Path("."),
+        **overrides
+    )
+    client = AIClient(config)
+    completions = FakeCompletions(streams)
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    client._get_client = lambda endpoint: fake
+    return client, completions
+
+
+def test_percentile():
+    """测试百分位计算"""
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 95) == 0
+
+
+def test_hedge_budget_limits_rate():
+    """测试对冲预算按比例限制"""
+    budget = HedgeBudget(ratio=0.1, burst=1)
+    assert budget.try_acquire() == True
+    assert budget.try_acquire() == False
+
+    for _ in range(10):
+        budget.record_request()
+    assert budget.try_acquire() == True
+
+
+def test_stalled_stream_is_hedged():
+    """测试主请求卡顿时对冲请求胜出并取消主请求"""
+    primary = FakeStream(["prim", "ary"], stall=True)
+    hedge = FakeStream(["hedged ", "result"])
+    client, completions = make_client(
+        [primary, hedge],
+        hedge_ttft_seconds=1,
+        hedge_gap_seconds=0.05
+    )
+
+    endpoint = client.config.get_routes("code_generation")[0]
+    result, _ = client._chat_stream(endpoint, [{"role": "user", "content": "hi"}])
+
+    assert result == "hedged result"
+    assert completions.calls == 2
+    assert primary.closed.is_set()
+
+    summary = client.hedge_stats.summary()
+    assert summary["hedges_issued"] == 1
+    assert summary["hedges_won"] == 1
+
+
+def test_fast_stream_is_not_hedged():
+    """测试正常的流不会触发对冲"""
+    client, completions = make_client([FakeStream(["fast ", "path"])])
+
+    endpoint = client.config.get_routes("code_generation")[0]
+    result, _ = client._chat_stream(endpoint, [{"role": "user", "content": "hi"}])
+
+    assert result == "fast path"
+    assert completions.calls == 1
+    assert client.hedge_stats.summary()["hedges_issued"] == 0
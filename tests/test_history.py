@@ -0,0 +1,99 @@
+"""
+对话历史压缩测试
+"""
+
+from agentcli.conversation import ConversationManager
+from agentcli.history import HistoryManager, SUMMARY_HEADER, is_summary
+from agentcli.utils.tokens import estimate_messages_tokens
+
+
+REQUIREMENTS = {
+    "project_type": "Python CLI 工具",
+    "purpose": "文件批量重命名工具",
+    "project_name": "file-renamer",
+}
+
+
+def make_history(turns):
+    """构造多轮对话"""
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"第 {i} 轮问题 " + "需求描述" * 20})
+        history.append({"role": "assistant", "content": f"第 {i} 轮回答 " + "好的" * 20})
+    return history
+
+
+def test_short_history_is_unchanged():
+    """测试未超出上限时原样返回"""
+    manager = HistoryManager(max_tokens=3000)
+    history = make_history(2)
+
+    assert manager.compact(history, REQUIREMENTS) == history
+    assert manager.stats["compactions"] == 0
+
+
+def test_long_history_stays_under_ceiling():
+    """测试超出上限时折叠为摘要，保留最近轮次和全部需求字段"""
+    manager = HistoryManager(max_tokens=400)
+    history = make_history(50)
+
+    compacted = manager.compact(history, REQUIREMENTS, reserved_tokens=50)
+
+    assert estimate_messages_tokens(compacted) <= 350
+    assert compacted[0]["content"].startswith(SUMMARY_HEADER)
+    for key, value in REQUIREMENTS.items():
+        assert f"- {key}: {value}" in compacted[0]["content"]
+    assert compacted[-1] == history[-1]
+    assert len(history) == 100
+
+
+def test_non_requirement_phase_sends_summary_only():
+    """测试规划阶段只发送需求摘要"""
+    manager = HistoryManager(max_tokens=3000)
+
+    compacted = manager.compact(make_history(2), REQUIREMENTS, phase="planning")
+
+    assert len(compacted) == 1
+    assert compacted[0]["role"] == "system"
+
+
+def test_oversized_requirements_keep_every_field():
+    """测试需求本身超出上限时截断字段值而不丢弃字段"""
+    requirements = dict(REQUIREMENTS, purpose="很长的描述" * 500)
+    manager = HistoryManager(max_tokens=200)
+
+    compacted = manager.compact(make_history(5), requirements)
+
+    assert estimate_messages_tokens(compacted) <= 200
+    for key in requirements:
+        assert f"- {key}: " in compacted[0]["content"]
+
+
+def test_repeated_compaction_keeps_one_summary():
+    """测试反复压缩已压缩的历史时摘要被替换而不是累积，且始终不超过上限"""
+    manager = HistoryManager(max_tokens=150)
+    history = []
+    for turn in make_history(30):
+        history = manager.compact(history + [turn], REQUIREMENTS, reserved_tokens=20)
+        assert estimate_messages_tokens(history) <= 130
+        assert sum(is_summary(message) for message in history) <= 1
+    assert is_summary(history[0])
+    assert history[-1]["content"].startswith("第 29 轮回答")
+
+
+def test_summary_is_clamped_to_tiny_budget():
+    """测试字段名本身已超出预算时截断摘要，仍不超过上限"""
+    requirements = {f"field_{i}": "值" * 10 for i in range(40)}
+    for max_tokens in (3, 10, 40):
+        compacted = HistoryManager(max_tokens=max_tokens).compact(make_history(3), requirements, phase="planning")
+        assert estimate_messages_tokens(compacted) <= max_tokens
+
+
+def test_conversation_keeps_full_history():
+    """测试对话管理器保存完整历史，压缩只作用于发送的副本"""
+    manager = ConversationManager()
+    manager.requirements = dict(REQUIREMENTS)
+    for message in make_history(50):
+        manager.add_message(message["role"], message["content"])
+
+    assert manager.conversation_history == make_history(50)
@@ -176,3 +176,33 @@ def test_task_executor_failure_handling(temp_dir, mock_templates_dir):
     success = executor.execute_single_task(task)
     assert success == False
 
+
+
+def test_task_executor_writes_code_files_as_generated(temp_dir, mock_templates_dir):
+    """测试代码文件生成后立即写入，后续文件的上下文从磁盘读取"""
+    seen_context = []
+    
+    def generate_code_content(file_path, created_files, **kwargs):
+        seen_context.append(sorted(created_files))
+        return f'"""{file_path}"""\n'
+    
+    ai_client = Mock()
+    ai_client.generate_code_content.side_effect = generate_code_content
+    executor = TaskExecutor(mock_templates_dir, temp_dir, ai_client=ai_client, requirements={})
+    
+    task_list = TaskList(
+        reasoning="测试",
+        project_name="test-project",
+        tasks=[
+            Task(id=1, name="创建目录", description="创建项目目录", type="create_directory",
+                 params={"path": "test-project"}),
+            Task(id=2, name="生成 a.py", description="模块 a", type="create_file",
+                 params={"path": "test-project/a.py", "code_description": "模块 a"}),
+            Task(id=3, name="生成 b.py", description="模块 b", type="create_file",
+                 params={"path": "test-project/b.py", "code_description": "模块 b"}),
+        ]
+    )
+    
+    assert executor.execute(task_list) == True
+    assert seen_context == [[], ["test-project/a.py"]]
+    assert (temp_dir / "test-project" / "b.py").read_text() == '"""test-project/b.py"""\n'
@@ -0,0 +1,157 @@
+"""
+持久化任务队列与工作进程测试
+"""
+
+import threading
+from pathlib import Path
+
+from agentcli.config import Config
+from agentcli.job_queue import DEAD, QUEUED, SUCCEEDED, SQLiteJobQueue, open_queue
+from agentcli.scaffold import Scaffolder
+from agentcli.worker import Worker
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_requirements(name):
+    return {
+        "project_type": "Python CLI 工具",
+        "purpose": "文件批量重命名工具",
+        "project_name": name,
+    }
+
+
+def test_lease_complete(tmp_path):
+    """测试领取任务后完成"""
+    queue = SQLiteJobQueue(tmp_path / "jobs.db")
+    job_id = queue.enqueue({"requirements": {"project_name": "a"}})
+
+    job = queue.lease("w1", visibility_timeout=60)
+    assert job.id == job_id
+    assert job.attempts == 1
+    assert queue.lease("w2", visibility_timeout=60) is None
+
+    assert queue.complete(job.id, job.lease_token, {"ok": True}) == True
+    assert queue.stats()[SUCCEEDED] == 1
+
+
+def test_expired_lease_is_redelivered(tmp_path):
+    """测试租约过期后任务被其他工作进程接管，旧租约失效"""
+    clock = FakeClock()
+    queue = SQLiteJobQueue(tmp_path / "jobs.db", clock=clock)
+    queue.enqueue({})
+
+    first = queue.lease("w1", visibility_timeout=60)
+    clock.now += 30
+    assert queue.heartbeat(first.id, first.lease_token, 60) == True
+    clock.now += 59
+    assert queue.lease("w2", visibility_timeout=60) is None
+
+    clock.now += 2
+    second = queue.lease("w2", visibility_timeout=60)
+    assert second.id == first.id
+    assert second.attempts == 2
+    assert queue.complete(first.id, first.lease_token, {}) == False
+    assert queue.heartbeat(first.id, first.lease_token, 60) == False
+
+
+def test_retry_then_dead_letter(tmp_path):
+    """测试失败后延迟重试，超过最大尝试次数进入死信"""
+    clock = FakeClock()
+    queue = SQLiteJobQueue(tmp_path / "jobs.db", clock=clock)
+    queue.enqueue({}, max_attempts=2)
+
+    job = queue.lease("w1", 60)
+    assert queue.fail(job.id, job.lease_token, "boom", retry_delay=10) == QUEUED
+    assert queue.lease("w1", 60) is None
+
+    clock.now += 10
+    job = queue.lease("w1", 60)
+    assert queue.fail(job.id, job.lease_token, "boom", retry_delay=10) == DEAD
+    assert queue.stats()[DEAD] == 1
+
+    assert queue.requeue_dead() == 1
+    assert queue.lease("w1", 60) is not None
+
+
+def test_concurrent_leases_are_exclusive(tmp_path):
+    """测试多个工作线程并发领取时每个任务只被领取一次"""
+    queue = open_queue(str(tmp_path / "jobs.db"))
+    for i in range(40):
+        queue.enqueue({"n": i})
+
+    leased = []
+    lock = threading.Lock()
+
+    def drain(worker_id):
+        local_queue = SQLiteJobQueue(tmp_path / "jobs.db")
+        while True:
+            job = local_queue.lease(worker_id, 60)
+            if job is None:
+                return
+            with lock:
+                leased.append(job.id)
+
+    threads = [threading.Thread(target=drain, args=(f"w{i}",)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(leased) == list(range(1, 41))
+
+
+def test_worker_runs_offline_jobs(tmp_path):
+    """测试工作进程执行队列中的任务并发布到输出目录"""
+    config = Config(
+        deepseek_api_key="sk-test",
+        system_prompt="test",
+        project_root=Path("."),
+        cache_dir=tmp_path / "cache",
+        artifact_cache_enabled=False
+    )
+    queue = SQLiteJobQueue(tmp_path / "jobs.db")
+    for name in ("tool-a", "tool-b"):
+        queue.enqueue({"requirements": make_requirements(name), "offline": True})
+    queue.enqueue({"requirements": {"project_type": "未知类型", "purpose": "x", "project_name": "bad"},
+                   "offline": True}, max_attempts=1)
+
+    worker = Worker(queue, Scaffolder(config), tmp_path / "out", retry_delay=0)
+    worker.run(burst=True)
+
+    assert (tmp_path / "out" / "tool-a" / "tool_a" / "cli.py").exists()
+    assert (tmp_path / "out" / "tool-b" / "tool_b" / "cli.py").exists()
+    assert not (tmp_path / "out" / ".staging").exists() or not any((tmp_path / "out" / ".staging").iterdir())
+    assert queue.stats() == {"queued": 0, "leased": 0, "succeeded": 2, "dead": 1}
+
+
+def test_worker_discards_result_when_lease_lost_before_publish(tmp_path):
+    """测试心跳间隙中租约被接管时，过期工作进程不发布产物"""
+    clock = FakeClock()
+    queue = SQLiteJobQueue(tmp_path / "jobs.db", clock=clock)
+    queue.enqueue({"requirements": make_requirements("tool-a"), "offline": True})
+    taken_over = []
+
+    class SlowScaffolder:
+        """生成完成时租约已过期并被另一个工作进程接管"""
+
+        def run(self, requirements, output_dir, offline=False):
+            (output_dir / "tool-a").mkdir(parents=True)
+            clock.now += 301
+            taken_over.append(queue.lease("w2", visibility_timeout=300))
+            return {"success": True, "project_name": "tool-a", "elapsed": 0.0}
+
+    worker = Worker(queue, SlowScaffolder(), tmp_path / "out", visibility_timeout=300)
+    assert worker.run_once() == True
+
+    assert taken_over[0] is not None
+    assert not (tmp_path / "out" / "tool-a").exists()
+    assert queue.stats()["leased"] == 1
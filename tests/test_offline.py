@@ -0,0 +1,180 @@
+"""
+离线模板渲染测试
+"""
+
+import ast
+import json
+import time
+import pytest
+
+from agentcli.config import get_templates_dir
+from agentcli.task_executor import TaskExecutor
+from agentcli.task_generator import TaskGenerator
+from agentcli.utils.template_loader import TemplateLoader, derive_template_variables, matches_condition
+
+
+CLI_REQUIREMENTS = {
+    "project_type": "Python CLI 工具",
+    "purpose": "文件批量重命名工具",
+    "project_name": "file-renamer",
+}
+
+FASTAPI_REQUIREMENTS = {
+    "project_type": "Python Web API (FastAPI)",
+    "purpose": "图书管理 API",
+    "database": "SQLite",
+    "docker": "不需要",
+    "project_name": "book-api",
+}
+
+WORKER_REQUIREMENTS = {
+    "project_type": "Python 异步 Worker（队列消费 / ETL）",
+    "purpose": "订单数据 ETL",
+    "project_name": "order-etl",
+}
+
+
+def render(requirements, output_dir):
+    """离线生成任务清单并执行"""
+    templates_dir = get_templates_dir()
+    task_list = TaskGenerator().generate_offline_tasks(requirements, TemplateLoader(templates_dir))
+    assert task_list is not None
+    assert len(task_list.tasks) <= 10
+
+    executor = TaskExecutor(templates_dir, output_dir, requirements=requirements)
+    assert executor.execute(task_list) == True
+    return output_dir / task_list.project_name
+
+
+@pytest.mark.parametrize("requirements", [CLI_REQUIREMENTS, FASTAPI_REQUIREMENTS, WORKER_REQUIREMENTS])
+def test_offline_render_produces_valid_project(tmp_path, requirements):
+    """测试离线渲染：所有文件变量已替换，Python 文件语法正确"""
+    started_at = time.perf_counter()
+    project_dir = render(requirements, tmp_path)
+    assert time.perf_counter() - started_at < 1.0
+
+    files = [p for p in project_dir.rglob("*") if p.is_file()]
+    assert files
+    for path in files:
+        content = path.read_text(encoding="utf-8")
+        assert "{{" not in content, f"未替换的变量: {path}"
+        if path.suffix == ".py":
+            ast.parse(content, filename=str(path))
+
+
+def test_offline_cli_layout(tmp_path):
+    """测试 Python CLI 模板的离线布局"""
+    project_dir = render(CLI_REQUIREMENTS, tmp_path)
+
+    assert (project_dir / "file_renamer" / "__init__.py").exists()
+    assert (project_dir / "file_renamer" / "__main__.py").exists()
+    assert (project_dir / "file_renamer" / "cli.py").exists()
+    assert (project_dir / "file_renamer" / "commands" / "__init__.py").exists()
+    assert (project_dir / "file_renamer" / "commands" / "run.py").exists()
+    assert (project_dir / "tests" / "test_core.py").exists()
+    assert "from file_renamer.core import" in (project_dir / "tests" / "test_core.py").read_text()
+
+
+def test_offline_worker_layout(tmp_path):
+    """测试异步 Worker 模板的离线布局，Worker 并发数按性能画像推导"""
+    project_dir = render({**WORKER_REQUIREMENTS, "workload": "I/O 密集"}, tmp_path)
+
+    for name in ("__init__.py", "__main__.py", "config.py", "pipeline.py", "worker.py"):
+        assert (project_dir / "order_etl" / name).exists()
+    assert (project_dir / "tests" / "test_pipeline.py").exists()
+    assert "from order_etl.pipeline import" in (project_dir / "tests" / "test_pipeline.py").read_text()
+    assert '"WORKER_CONCURRENCY", 32' in (project_dir / "order_etl" / "config.py").read_text()
+
+
+def test_offline_layout_conditions(tmp_path):
+    """测试布局条件：不需要 Docker 时不生成 Dockerfile"""
+    project_dir = render(FASTAPI_REQUIREMENTS, tmp_path)
+
+    assert (project_dir / "app" / "db" / "database.py").exists()
+    assert not (project_dir / "Dockerfile").exists()
+
+
+def test_offline_fastapi_async_database(tmp_path):
+    """测试 FastAPI 模板按数据库类型选择异步驱动"""
+    project_dir = render(FASTAPI_REQUIREMENTS, tmp_path)
+
+    assert "sqlite+aiosqlite:///./book-api.db" in (project_dir / "app" / "core" / "config.py").read_text()
+    assert "aiosqlite" in (project_dir / "requirements.txt").read_text()
+    assert (project_dir / "tests" / "test_database.py").exists()
+
+    postgres = derive_template_variables({**FASTAPI_REQUIREMENTS, "database": "PostgreSQL"})
+    assert postgres["database_url"].startswith("postgresql+asyncpg://")
+    assert postgres["database_driver"].startswith("asyncpg")
+
+
+def test_matches_condition():
+    """测试布局条件匹配"""
+    assert matches_condition(None, {}) == True
+    assert matches_condition({"database": ["SQLite", "PostgreSQL"]}, {"database": "SQLite"}) == True
+    assert matches_condition({"database": ["SQLite"]}, {"database": "不需要"}) == False
+    assert matches_condition({"features": ["缓存"]}, {"features": "指标, 缓存"}) == True
+
+
+def test_offline_fastapi_production_profile(tmp_path):
+    """测试生产配置：生成 Gunicorn 配置和多阶段 Dockerfile，替换开发版本"""
+    requirements = {**FASTAPI_REQUIREMENTS, "docker": "需要", "server_profile": "生产"}
+    project_dir = render(requirements, tmp_path / "prod")
+
+    assert (project_dir / "gunicorn_conf.py").exists()
+    assert "-r requirements.txt" in (project_dir / "requirements-prod.txt").read_text()
+    assert "AS builder" in (project_dir / "Dockerfile").read_text()
+    assert "./app:/app/app" not in (project_dir / "docker-compose.yml").read_text()
+    assert '"production"' in (project_dir / "app" / "core" / "config.py").read_text()
+
+    dev_dir = render({**FASTAPI_REQUIREMENTS, "docker": "需要"}, tmp_path / "dev")
+    assert not (dev_dir / "gunicorn_conf.py").exists()
+    assert "AS builder" not in (dev_dir / "Dockerfile").read_text()
+    assert '"development"' in (dev_dir / "app" / "core" / "config.py").read_text()
+
+
+def test_offline_fastapi_optional_features(tmp_path):
+    """测试可选功能：选择缓存时才生成缓存模块及其测试"""
+    project_dir = render({**FASTAPI_REQUIREMENTS, "features": "缓存, 指标"}, tmp_path / "cached")
+    assert (project_dir / "app" / "cache.py").exists()
+    assert (project_dir / "tests" / "test_cache.py").exists()
+    assert (project_dir / "app" / "metrics.py").exists()
+    assert (project_dir / "tests" / "test_metrics.py").exists()
+
+    plain_dir = render(FASTAPI_REQUIREMENTS, tmp_path / "plain")
+    assert not (plain_dir / "app" / "cache.py").exists()
+    assert not (plain_dir / "tests" / "test_cache.py").exists()
+    assert not (plain_dir / "app" / "metrics.py").exists()
+
+
+def test_offline_fastapi_perf_harness(tmp_path):
+    """测试负载测试基线覆盖压测的所有路由，且 perf 标记已注册并默认跳过"""
+    project_dir = render(FASTAPI_REQUIREMENTS, tmp_path)
+
+    baseline = json.loads((project_dir / "tests" / "perf_baseline.json").read_text())
+    tree = ast.parse((project_dir / "tests" / "loadtest.py").read_text())
+    routes = next(
+        ast.literal_eval(node.value) for node in tree.body
+        if isinstance(node, ast.AnnAssign) and getattr(node.target, "id", None) == "ROUTES"
+    )
+    assert set(baseline["routes"]) == {f"{method} {path}" for method, path, _ in routes}
+
+    pytest_ini = (project_dir / "pytest.ini").read_text()
+    assert "perf:" in pytest_ini
+    assert '-m "not perf"' in pytest_ini
+
+
+def test_offline_performance_profile(tmp_path):
+    """测试性能画像驱动生成：选择布局默认值并写入连接池、并行度等默认值"""
+    profile = {"expected_load": "高", "data_volume": "大", "workload": "I/O 密集"}
+    project_dir = render({**FASTAPI_REQUIREMENTS, **profile}, tmp_path / "api")
+    assert (project_dir / "gunicorn_conf.py").exists()
+    assert (project_dir / "app" / "cache.py").exists()
+    assert (project_dir / "app" / "metrics.py").exists()
+    config = (project_dir / "app" / "core" / "config.py").read_text()
+    assert 'os.getenv("DB_POOL_SIZE", "20")' in config
+
+    cli_dir = render({**CLI_REQUIREMENTS, **profile}, tmp_path / "cli")
+    run = (cli_dir / "file_renamer" / "commands" / "run.py").read_text()
+    assert "default=8" in run
+    assert "default=10000" in run
+    assert "default=True" in run
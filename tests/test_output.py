@@ -0,0 +1,147 @@
+"""
+无头输出模式测试
+"""
+
+import io
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from agentcli.output import NdjsonWriter
+
+from .stub_llm import StubLLMServer
+
+PACKAGE_ROOT = Path(__file__).resolve().parent.parent
+
+# 在子进程中运行 ndjson 模式，结束时把是否导入了 rich 写到标准错误
+RUNNER = """
+import sys
+from agentcli.main import main
+try:
+    main(sys.argv[1:])
+except SystemExit as e:
+    code = e.code
+else:
+    code = 0
+sys.stderr.write("RICH_LOADED=%s\\n" % any(m == "rich" or m.startswith("rich.") for m in sys.modules))
+sys.exit(code)
+"""
+
+
+def run_headless(args, tmp_path):
+    requirements = tmp_path / "req.json"
+    requirements.write_text(json.dumps({
+        "project_type": "Python CLI 工具",
+        "purpose": "文件批量重命名工具",
+        "project_name": "file-renamer",
+    }), encoding="utf-8")
+    result = subprocess.run(
+        [sys.executable, "-c", RUNNER, "--output", "ndjson", "-r", str(requirements),
+         "-o", str(tmp_path / "out"), "--no-daemon"] + args,
+        cwd=PACKAGE_ROOT,
+        env={**os.environ, "PYTHONPATH": str(PACKAGE_ROOT), "AGENTCLI_CACHE_DIR": str(tmp_path / "cache")},
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+    events = [json.loads(line) for line in result.stdout.splitlines()]
+    return result, events
+
+
+def test_writer_batches_tokens():
+    """测试 token 按间隔合并输出，其他事件前先写出累积的 token"""
+    stream = io.StringIO()
+    writer = NdjsonWriter(stream, flush_interval=60)
+    for i in range(1000):
+        writer("token", {"text": "x"})
+    writer("file_written", {"path": "a.py"})
+    writer("token", {"text": "y"})
+    writer.close()
+
+    events = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [event["event"] for event in events] == ["token_batch", "file_written", "token_batch"]
+    assert events[0]["tokens"] == 1000 and events[0]["text"] == "x" * 1000
+    assert writer.token_count == 1001
+
+
+def test_offline_headless_run(tmp_path):
+    """测试离线 ndjson 模式：只输出 JSON 行，且不导入 rich"""
+    result, events = run_headless(["--offline"], tmp_path)
+
+    assert result.returncode == 0, result.stderr
+    assert "RICH_LOADED=False" in result.stderr
+    kinds = [event["event"] for event in events]
+    assert kinds[0] == "run_started" and kinds[-1] == "run_summary"
+    assert "file_written" in kinds
+    summary = events[-1]
+    assert summary["success"] and "planning" in summary["timings"]
+    assert (tmp_path / "out" / "file-renamer" / "setup.py").exists()
+
+
+def test_offline_headless_unknown_project_type(tmp_path, capsys):
+    """测试离线 ndjson 模式下没有对应模板时输出 error 事件并以非零状态退出"""
+    from agentcli import main as main_module
+    from agentcli.output import set_output_mode
+
+    requirements = tmp_path / "req.json"
+    requirements.write_text(json.dumps({
+        "project_type": "rust",
+        "purpose": "命令行工具",
+        "project_name": "rusty",
+    }), encoding="utf-8")
+    try:
+        with pytest.raises(SystemExit) as exc_info:
+            main_module.run_ndjson(str(tmp_path / "out"), True, str(requirements), flush_interval=10)
+    finally:
+        set_output_mode("text")
+
+    assert exc_info.value.code == 1
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [event["event"] for event in events] == ["run_started", "planning", "error"]
+    assert "rust" in events[-1]["message"]
+
+
+def test_headless_run_with_llm(tmp_path, monkeypatch, capsys):
+    """测试调用模型时输出 token_batch 和 file_validated 事件"""
+    from agentcli import main as main_module
+    from agentcli.config import Config
+    from agentcli.output import set_output_mode
+
+    stub = StubLLMServer(chunks=50).start()
+    config = Config(
+        deepseek_api_key="sk-test",
+        deepseek_base_url=stub.base_url,
+        system_prompt="test",
+        project_root=PACKAGE_ROOT,
+        cache_dir=tmp_path / "cache",
+        plan_cache_enabled=False,
+        artifact_cache_enabled=False
+    )
+    monkeypatch.setattr(main_module, "load_config", lambda: config)
+    requirements = tmp_path / "req.json"
+    requirements.write_text(json.dumps({
+        "project_type": "Python CLI 工具",
+        "purpose": "文件批量重命名工具",
+        "project_name": "file-renamer",
+    }), encoding="utf-8")
+    try:
+        main_module.run_ndjson(str(tmp_path / "out"), False, str(requirements), flush_interval=10)
+    finally:
+        set_output_mode("text")
+        stub.shutdown()
+        stub.server_close()
+
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    kinds = [event["event"] for event in events]
+    assert "file_validated" in kinds
+    # 每次模型调用的 token 合并为一个批次（规划 + 一个代码文件）
+    batches = [event for event in events if event["event"] == "token_batch"]
+    assert len(batches) == 2
+    summary = events[-1]
+    assert summary["event"] == "run_summary" and summary["success"]
+    assert summary["tokens"] == sum(batch["tokens"] for batch in batches) > 50
+    assert summary["stats"]["requests"] == 2
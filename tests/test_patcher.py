@@ -0,0 +1,178 @@
+"""
+增量修改模块测试
+"""
+
+import re
+import pytest
+from pathlib import Path
+from unittest.mock import Mock
+
+from agentcli.ai_client import AIClient
+from agentcli.config import Config
+from agentcli.patcher import (
+    PatchError,
+    ProjectUpdater,
+    apply_patch,
+    parse_patch,
+)
+
+
+ORIGINAL = '''"""核心模块"""
+
+
+def greet(name):
+    """打招呼"""
+    message = "Hello, " + name
+    return message
+
+
+def farewell(name):
+    return "Bye, " + name
+'''
+
+
+def test_search_replace_exact():
+    """测试逐字匹配的搜索/替换块"""
+    response = '''<<<<<<< SEARCH
+    message = "Hello, " + name
+=======
+    message = f"Hello, {name}!"
+>>>>>>> REPLACE
+'''
+    result = apply_patch(ORIGINAL, response)
+    assert 'message = f"Hello, {name}!"' in result
+    assert "farewell" in result
+
+
+def test_search_replace_fuzzy_indentation():
+    """测试缩进不一致、内容略有差异时仍能定位并修正缩进"""
+    response = '''<<<<<<< SEARCH
+def farewell(name):
+  return "Bye, " + name
+=======
+def farewell(name):
+  return "Goodbye, " + name
+>>>>>>> REPLACE
+'''
+    result = apply_patch(ORIGINAL, response)
+    assert '    return "Goodbye, " + name' in result
+
+    typo = '''<<<<<<< SEARCH
+    message = "Hello " + name
+=======
+    message = "Hi, " + name
+>>>>>>> REPLACE
+'''
+    assert '"Hi, " + name' in apply_patch(ORIGINAL, typo)
+
+
+def test_unified_diff():
+    """测试 unified diff（行号不准、空上下文行缺少前导空格）"""
+    response = '''```diff
+--- a/core.py
++++ b/core.py
+@@ -9,3 +9,4 @@
+ 
+ def farewell(name):
+-    return "Bye, " + name
++    \"\"\"道别\"\"\"
++    return "Bye, " + name
+```
+'''
+    result = apply_patch(ORIGINAL, response)
+    assert '    """道别"""\n    return "Bye, " + name' in result
+    assert result.count("def farewell") == 1
+
+
+def test_unmatched_patch_raises():
+    """测试找不到要修改的代码或没有补丁时报错"""
+    response = '''<<<<<<< SEARCH
+class Missing:
+    pass
+=======
+class Found:
+    pass
+>>>>>>> REPLACE
+'''
+    with pytest.raises(PatchError):
+        apply_patch(ORIGINAL, response)
+    with pytest.raises(PatchError):
+        parse_patch("这里没有补丁")
+
+
+def make_project(tmp_path):
+    project = tmp_path / "demo"
+    (project / "demo").mkdir(parents=True)
+    (project / "demo" / "__init__.py").write_text('__version__ = "0.1.0"\n', encoding="utf-8")
+    (project / "demo" / "core.py").write_text(ORIGINAL, encoding="utf-8")
+    return project
+
+
+def test_updater_applies_patch(tmp_path):
+    """测试补丁可以应用时不会整文件重新生成"""
+    project = make_project(tmp_path)
+    ai_client = Mock()
+    ai_client.generate_code_edit.return_value = '''<<<<<<< SEARCH
+    return "Bye, " + name
+=======
+    return "Goodbye, " + name
+>>>>>>> REPLACE
+'''
+    updater = ProjectUpdater(ai_client, project)
+    result = updater.update_file("demo/core.py", "改为 Goodbye")
+
+    assert result["success"] and result["mode"] == "patch"
+    assert '"Goodbye, " + name' in (project / "demo" / "core.py").read_text(encoding="utf-8")
+    ai_client.generate_file_rewrite.assert_not_called()
+    assert updater.stats["output_tokens"] < updater.stats["full_file_tokens"]
+
+
+def test_updater_falls_back_to_regeneration(tmp_path):
+    """测试补丁无法应用或应用后语法错误时回退到整文件重新生成"""
+    project = make_project(tmp_path)
+    ai_client = Mock()
+    ai_client.generate_code_edit.return_value = '''<<<<<<< SEARCH
+    return "Bye, " + name
+=======
+    return "Bye, " + (name
+>>>>>>> REPLACE
+'''
+    ai_client.generate_file_rewrite.return_value = ORIGINAL.replace("Bye", "Goodbye")
+    updater = ProjectUpdater(ai_client, project)
+    result = updater.update_file("demo/core.py", "改为 Goodbye")
+
+    assert result["success"] and result["mode"] == "regenerate"
+    kwargs = ai_client.generate_file_rewrite.call_args.kwargs
+    assert kwargs["current_content"] == ORIGINAL
+    assert "Goodbye" in (project / "demo" / "core.py").read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("file_path", ["demo/long.py", "README.md"])
+def test_regeneration_sees_full_current_file(tmp_path, file_path):
+    """测试整文件重新生成时模型看到目标文件的完整内容（超过 2KB、非 .py 文件也不截断）"""
+    project = make_project(tmp_path)
+    if file_path.endswith(".py"):
+        current = "".join(f"def func_{i}():\n    return {i}\n\n\n" for i in range(150)) + "MARKER = 'old'\n"
+    else:
+        current = "# Demo\n\n```bash\npython -m demo\n```\n\n" + "说明文字。\n" * 400 + "MARKER = 'old'\n"
+    assert len(current) > 2000
+    (project / file_path).write_text(current, encoding="utf-8")
+
+    def echo_model(messages, **kwargs):
+        # 模型按提示中的当前内容改写：只有提示包含完整内容时才能保留未改动的部分
+        match = re.search(r"文件当前内容（完整）：\*\*\n(`{3,})\n(.*?)\n\1\n", messages[-1]["content"], re.DOTALL)
+        return match.group(2).replace("MARKER = 'old'", "MARKER = 'new'") if match else "MARKER = 'new'\n"
+
+    client = AIClient(Config(deepseek_api_key="sk-test", system_prompt="test", project_root=Path(".")))
+    client.chat = echo_model
+    result = ProjectUpdater(client, project).update_file(file_path, "把 MARKER 改为 new", full=True)
+
+    assert result["success"] and result["mode"] == "regenerate"
+    assert (project / file_path).read_text(encoding="utf-8") == current.replace("'old'", "'new'")
+
+
+def test_updater_rejects_missing_file(tmp_path):
+    """测试文件不存在或路径不安全时直接失败"""
+    updater = ProjectUpdater(Mock(), make_project(tmp_path))
+    assert not updater.update_file("demo/missing.py", "x")["success"]
+    assert not updater.update_file("../outside.py", "x")["success"]
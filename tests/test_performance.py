@@ -0,0 +1,76 @@
+"""
+性能画像测试
+"""
+
+from pathlib import Path
+
+from agentcli.ai_client import AIClient
+from agentcli.config import Config
+from agentcli.performance import (
+    apply_performance_defaults,
+    has_performance_profile,
+    performance_guidance,
+    performance_variables,
+)
+
+
+def test_performance_variables_defaults():
+    """测试没有画像时使用通用默认值"""
+    assert performance_variables({}) == {
+        "db_pool_size": "5",
+        "db_max_overflow": "10",
+        "cli_jobs": "1",
+        "cli_threads": "False",
+        "chunk_size": "1000",
+        "worker_concurrency": "4",
+    }
+
+
+def test_performance_variables_from_profile():
+    """测试按画像推导连接池、并行度和批大小"""
+    variables = performance_variables({"expected_load": "高", "data_volume": "大", "workload": "I/O 密集"})
+    assert variables["db_pool_size"] == "20"
+    assert variables["db_max_overflow"] == "40"
+    assert variables["cli_jobs"] == "8"
+    assert variables["cli_threads"] == "True"
+    assert variables["chunk_size"] == "10000"
+    assert variables["worker_concurrency"] == "32"
+
+    assert performance_variables({"workload": "CPU 密集"})["cli_jobs"] == "0"
+
+
+def test_apply_performance_defaults():
+    """测试画像补全布局选项，且不覆盖已有回答"""
+    requirements = {"expected_load": "高"}
+    result = apply_performance_defaults(requirements)
+    assert result["server_profile"] == "生产"
+    assert result["features"] == "缓存, 指标"
+    assert requirements == {"expected_load": "高"}
+
+    assert apply_performance_defaults({"latency_slo": "严格"})["features"] == "缓存"
+    assert apply_performance_defaults({"expected_load": "高", "features": "无"})["features"] == "无"
+    assert apply_performance_defaults({"expected_load": "低"}) == {"expected_load": "低"}
+
+
+def test_performance_guidance():
+    """测试画像转换为代码生成要求"""
+    assert not has_performance_profile({"project_type": "fastapi"})
+    assert performance_guidance({}) == []
+
+    requirements = {"workload": "CPU 密集", "data_volume": "大"}
+    assert has_performance_profile(requirements)
+    guidance = performance_guidance(requirements)
+    assert any("ProcessPoolExecutor" in item for item in guidance)
+    assert any("流式" in item for item in guidance)
+
+
+def test_requirements_prompt_includes_guidance():
+    """测试提示词在有画像时附带性能要求"""
+    client = AIClient(Config(deepseek_api_key="sk-test", system_prompt="test", project_root=Path(".")))
+    plain = client._requirements_prompt({"purpose": "图书管理"})
+    assert plain == "- purpose: 图书管理\n"
+
+    prompt = client._requirements_prompt({"purpose": "图书管理", "expected_load": "高"})
+    assert "- expected_load: 高" in prompt
+    assert "性能要求" in prompt
+    assert "高负载" in prompt
@@ -0,0 +1,120 @@
+"""
+任务清单相似度缓存测试
+"""
+
+from agentcli.config import get_templates_dir
+from agentcli.plan_cache import PlanCache, tokenize, tfidf_similarity
+from agentcli.task_generator import Task, TaskGenerator, TaskList
+from agentcli.utils.template_loader import TemplateLoader
+
+
+def make_requirements(purpose, project_name, project_type="Python CLI 工具"):
+    """构造需求字典"""
+    return {"project_type": project_type, "purpose": purpose, "project_name": project_name}
+
+
+def make_task_list(project_name, module_name):
+    """构造任务清单"""
+    return TaskList(
+        reasoning="测试",
+        project_name=project_name,
+        tasks=[
+            Task(
+                id=1,
+                name="创建目录",
+                description="创建包目录",
+                type="create_directory",
+                params={"path": f"{project_name}/{module_name}"}
+            ),
+            Task(
+                id=2,
+                name="生成 README",
+                description="生成项目文档",
+                type="create_file",
+                params={
+                    "path": f"{project_name}/README.md",
+                    "template": "python_cli/README.md",
+                    "variables": {"project_name": project_name, "description": "旧描述"}
+                }
+            ),
+        ]
+    )
+
+
+def test_similar_purposes_score_high():
+    """测试措辞不同的相似需求得分较高"""
+    query = tokenize("batch file rename tool")
+    documents = [tokenize("file renamer CLI"), tokenize("weather forecast dashboard")]
+
+    scores = tfidf_similarity(query, documents)
+
+    assert scores[0] > 0.6
+    assert scores[1] == 0
+
+
+def test_cache_hit_resubstitutes_names(tmp_path):
+    """测试命中缓存后替换项目名称和变量"""
+    cache = PlanCache(tmp_path)
+    cache.add(make_requirements("file renamer CLI", "file-renamer"), make_task_list("file-renamer", "file_renamer"))
+
+    requirements = make_requirements("batch file rename tool", "bulk-rename")
+    match = cache.lookup(requirements)
+    assert match is not None
+
+    task_list = cache.adapt(match[1], requirements)
+    assert task_list.project_name == "bulk-rename"
+    assert task_list.tasks[0].params["path"] == "bulk-rename/bulk_rename"
+    assert task_list.tasks[1].params["variables"] == {
+        "project_name": "bulk-rename",
+        "description": "batch file rename tool"
+    }
+
+
+def test_cache_requires_exact_type_match(tmp_path):
+    """测试项目类型不同时不命中，并统计命中率"""
+    cache = PlanCache(tmp_path)
+    cache.add(make_requirements("file renamer", "file-renamer"), make_task_list("file-renamer", "file_renamer"))
+
+    assert cache.lookup(make_requirements("file renamer", "x", "Python Web API (FastAPI)")) is None
+    assert cache.lookup(make_requirements("file renamer", "y")) is not None
+
+    # 统计持久化到磁盘
+    reloaded = PlanCache(tmp_path)
+    assert reloaded.stats["lookups"] == 2
+    assert reloaded.stats["hit_rate"] == 0.5
+
+
+def offline_task_list(requirements):
+    """离线生成任务清单"""
+    return TaskGenerator().generate_offline_tasks(requirements, TemplateLoader(get_templates_dir()))
+
+
+def test_adapt_only_rewrites_structured_fields():
+    """测试旧名称是模板路径的子串时，只改写项目目录和变量，不改写模板路径和包目录"""
+    old = {"project_type": "fastapi", "purpose": "笔记 API", "database": "SQLite", "project_name": "app"}
+    new = {**old, "project_name": "notes"}
+    entry = {"requirements": old, "task_list": offline_task_list(old).model_dump()}
+
+    task_list = PlanCache.adapt(entry, new)
+    assert task_list.project_name == "notes"
+    assert task_list.tasks[0].params["path"] == "notes"
+    files = [f for task in task_list.tasks for f in task.params.get("files", [])]
+    paths = {f["path"] for f in files}
+    assert "notes/app/__init__.py" in paths
+    assert "{{project_name}}/app/main.py" in paths
+    assert {"path": "{{project_name}}/app/main.py", "template": "fastapi/main.py"} in files
+    assert all(task.params.get("variables", {}).get("project_name", "notes") == "notes" for task in task_list.tasks)
+
+
+def test_adapt_keeps_template_paths():
+    """测试旧名称是模板路径的子串时（cli 与 python_cli/cli.py），模板路径和占位符保持不变"""
+    old = {"project_type": "python_cli", "purpose": "命令行工具", "project_name": "cli"}
+    new = {**old, "project_name": "bulk-rename"}
+    entry = {"requirements": old, "task_list": offline_task_list(old).model_dump()}
+
+    task_list = PlanCache.adapt(entry, new)
+    files = [f for task in task_list.tasks for f in task.params.get("files", [])]
+    assert {"path": "{{project_name}}/{{module_name}}/cli.py", "template": "python_cli/cli.py"} in files
+    assert any(f["path"] == "bulk-rename/{{module_name}}/commands/__init__.py" for f in files)
+    variables = task_list.tasks[-1].params["variables"]
+    assert variables["module_name"] == "bulk_rename"
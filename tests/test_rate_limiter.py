@@ -0,0 +1,167 @@
+"""
+请求调控模块测试
+"""
+
+import pytest
+from types import SimpleNamespace
+
+from agentcli.rate_limiter import (
+    TokenBucket,
+    CircuitBreaker,
+    CircuitOpenError,
+    RequestGovernor,
+    compute_backoff,
+    get_retry_after,
+    is_transient_error,
+)
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeStatusError(Exception):
+    """带 HTTP 状态码和响应头的模拟异常"""
+
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+def test_token_bucket_burst_then_wait():
+    """测试令牌桶：突发容量耗尽后需要等待"""
+    clock = FakeClock()
+    bucket = TokenBucket(2, 1, clock=clock, sleep=clock.sleep)
+
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(1.0)
+
+    waited = bucket.acquire()
+    assert waited == pytest.approx(1.0)
+    assert clock.now == pytest.approx(1.0)
+
+
+def test_circuit_breaker_transitions():
+    """测试熔断器状态转换"""
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.allow_request() == True
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request() == False
+
+    clock.now = 10
+    assert breaker.allow_request() == True  # 探测请求
+    assert breaker.allow_request() == False  # 探测期间其余请求被拒绝
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_error_classification():
+    """测试瞬时错误与致命错误的区分"""
+    assert is_transient_error(FakeStatusError(429)) == True
+    assert is_transient_error(FakeStatusError(503)) == True
+    assert is_transient_error(FakeStatusError(401)) == False
+    assert is_transient_error(FakeStatusError(400)) == False
+    assert is_transient_error(ConnectionError("reset")) == True
+
+
+def test_retry_after_is_honored():
+    """测试 Retry-After 解析与退避计算"""
+    assert get_retry_after(FakeStatusError(429, {"retry-after": "7"})) == 7
+    assert get_retry_after(FakeStatusError(429, {"retry-after-ms": "1500"})) == 1.5
+    assert get_retry_after(FakeStatusError(429)) is None
+
+    delay = compute_backoff(0, base_delay=1, max_delay=30, retry_after=7)
+    assert 7 <= delay <= 8
+
+    for attempt in range(6):
+        assert 0 <= compute_backoff(attempt, base_delay=1, max_delay=4) <= 4
+
+
+def test_governor_fails_fast_when_open():
+    """测试调控器：致命错误不计入熔断，瞬时错误累计后快速失败"""
+    governor = RequestGovernor(failure_threshold=2, recovery_timeout=60)
+
+    assert governor.record_failure(FakeStatusError(401)) == False
+    assert governor.breaker.state == CircuitBreaker.CLOSED
+
+    assert governor.record_failure(FakeStatusError(502)) == True
+    assert governor.record_failure(FakeStatusError(502)) == True
+
+    with pytest.raises(CircuitOpenError):
+        governor.before_request()
+    assert governor.stats["rejected"] == 1
+
+
+def test_unknown_error_releases_half_open_probe():
+    """测试半开探测请求以未知异常结束时仍然报告给熔断器，后续请求不会一直被拒绝"""
+    import time
+    from pathlib import Path
+
+    from agentcli.ai_client import AIClient
+    from agentcli.config import Config
+
+    config = Config(
+        deepseek_api_key="sk-test",
+        deepseek_base_url="https://half-open-probe.test",
+        system_prompt="test",
+        project_root=Path(".")
+    )
+    client = AIClient(config)
+    governor = client._get_governor(config.get_routes("requirements")[0])
+    breaker = governor.breaker
+    breaker.state = CircuitBreaker.OPEN
+    breaker._opened_at = time.monotonic() - breaker.recovery_timeout
+
+    def broken_request(*args, **kwargs):
+        raise RuntimeError("响应解析失败")
+
+    client._request = broken_request
+    assert client.chat([{"role": "user", "content": "hi"}], retry_count=1) is None
+    # 程序错误不计入成功或失败，只释放探测名额
+    assert breaker.consecutive_failures == 0
+    assert governor.stats["transient_errors"] == 0 and governor.stats["fatal_errors"] == 0
+    assert breaker.allow_request() == True
+
+
+def test_run_stats_are_per_client():
+    """测试运行统计只包含本客户端的请求，不包含共享同一调控器的其他客户端"""
+    from pathlib import Path
+    from types import SimpleNamespace
+
+    from agentcli.ai_client import AIClient
+    from agentcli.config import Config
+
+    config = Config(
+        deepseek_api_key="sk-test",
+        deepseek_base_url="https://per-client-stats.test",
+        system_prompt="test",
+        project_root=Path(".")
+    )
+    busy, idle = AIClient(config), AIClient(config)
+    completion = SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content="ok"), finish_reason="stop")]
+    )
+    fake = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: completion)))
+    busy._get_client = lambda endpoint: fake
+
+    for _ in range(3):
+        assert busy.chat([{"role": "user", "content": "hi"}]) == "ok"
+
+    assert busy.get_run_stats()["requests"] == 3
+    assert idle.get_run_stats()["requests"] == 0
@@ -0,0 +1,97 @@
+"""
+阶段路由测试
+"""
+
+import pytest
+from pathlib import Path
+from types import SimpleNamespace
+
+from openai import OpenAIError
+
+from agentcli.ai_client import AIClient
+from agentcli.config import Config, RouteEndpoint, load_routes
+from agentcli.rate_limiter import reset_governors
+from agentcli.router import EndpointRouter
+
+
+class FakeTransientError(OpenAIError):
+    """模拟 503 错误"""
+    status_code = 503
+
+
+def endpoint(base_url, model="m"):
+    """构造测试端点"""
+    return RouteEndpoint(base_url=base_url, api_key="sk-test", model=model)
+
+
+def test_load_routes_fills_defaults(tmp_path, monkeypatch):
+    """测试路由表加载：缺省字段使用默认值"""
+    monkeypatch.setenv("LOCAL_KEY", "local-secret")
+    routes_file = tmp_path / "routes.yaml"
+    routes_file.write_text(
+        "planning:\n"
+        "  - model: deepseek-reasoner\n"
+        "code_generation:\n"
+        "  - base_url: http://localhost:8001/v1\n"
+        "    api_key_env: LOCAL_KEY\n"
+        "    model: local-coder\n"
+        "    max_tokens: 1000\n",
+        encoding="utf-8"
+    )
+
+    routes = load_routes(routes_file, "sk-default", "https://api.deepseek.com")
+
+    assert routes["planning"][0].model == "deepseek-reasoner"
+    assert routes["planning"][0].api_key == "sk-default"
+    assert routes["planning"][0].temperature == 0.3
+    assert routes["code_generation"][0].api_key == "local-secret"
+    assert routes["code_generation"][0].max_tokens == 1000
+
+
+def test_load_routes_rejects_unknown_phase(tmp_path):
+    """测试路由表加载：未知阶段报错"""
+    routes_file = tmp_path / "routes.yaml"
+    routes_file.write_text("deploy:\n  - model: x\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="未知的路由阶段"):
+        load_routes(routes_file, "sk", "https://api.deepseek.com")
+
+
+def test_router_prefers_fastest_endpoint():
+    """测试路由器按滑动平均延迟排序"""
+    router = EndpointRouter()
+    slow, fast = endpoint("http://slow"), endpoint("http://fast")
+
+    router.record_latency(slow, 5.0)
+    router.record_latency(fast, 1.0)
+
+    assert router.order([slow, fast], {}) == [fast, slow]
+
+
+def test_chat_fails_over_to_next_endpoint():
+    """测试首选端点失败时自动切换到下一个端点"""
+    reset_governors()
+    config = Config(
+        deepseek_api_key="sk-test",
+        system_prompt="test",
+        project_root=Path("."),
+        routes={"planning": [endpoint("http://primary"), endpoint("http://backup")]}
+    )
+    client = AIClient(config)
+    calls = []
+
+    def create(base_url, **kwargs):
+        calls.append(base_url)
+        if base_url == "http://primary":
+            raise FakeTransientError("unavailable")
+        message = SimpleNamespace(content="ok")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+    client._get_client = lambda ep: SimpleNamespace(chat=SimpleNamespace(
+        completions=SimpleNamespace(create=lambda **kw: create(ep.base_url, **kw))
+    ))
+
+    result = client.chat([{"role": "user", "content": "hi"}], phase="planning")
+
+    assert result == "ok"
+    assert calls == ["http://primary", "http://backup"]
@@ -0,0 +1,179 @@
+"""
+HTTP 服务测试
+
+使用本地替身 LLM 服务跑通完整的规划和代码生成流程。
+"""
+
+import io
+import json
+import math
+import threading
+import time
+import urllib.error
+import urllib.request
+import zipfile
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from agentcli.config import Config
+from agentcli.hedging import percentile
+from agentcli.scaffold import Scaffolder
+from agentcli.service import JobManager, ScaffoldService
+
+from .stub_llm import StubLLMServer
+
+
+WORKERS = 4
+
+
+def make_requirements(name):
+    return {
+        "project_type": "Python CLI 工具",
+        "purpose": "文件批量重命名工具",
+        "project_name": name,
+    }
+
+
+@pytest.fixture
+def service(tmp_path):
+    """启动替身 LLM 服务和 HTTP 服务，返回 (服务地址, 替身服务)"""
+    stub = StubLLMServer(latency=0.02, token_delay=0.005).start()
+    config = Config(
+        deepseek_api_key="sk-test",
+        deepseek_base_url=stub.base_url,
+        system_prompt="test",
+        project_root=Path("."),
+        cache_dir=tmp_path / "cache",
+        plan_cache_enabled=False,
+        artifact_cache_enabled=False
+    )
+    job_manager = JobManager(Scaffolder(config), tmp_path / "jobs", workers=WORKERS, max_queue=64)
+    job_manager.start()
+    server = ScaffoldService(("127.0.0.1", 0), job_manager)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    yield f"http://127.0.0.1:{server.server_address[1]}", stub
+
+    server.shutdown()
+    server.server_close()
+    job_manager.stop()
+    stub.shutdown()
+    stub.server_close()
+
+
+def request(url, payload=None):
+    """发送请求并解析 JSON 响应"""
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=30) as response:
+        return response.status, json.loads(response.read())
+
+
+def read_events(url, last_event_id=None):
+    """读取 SSE 事件流直到服务端关闭"""
+    events = []
+    headers = {"Last-Event-ID": str(last_event_id)} if last_event_id is not None else {}
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=30) as response:
+        event = {}
+        for raw in response:
+            line = raw.decode("utf-8").rstrip("\n")
+            if not line:
+                if event:
+                    events.append(event)
+                event = {}
+            elif line.startswith("id: "):
+                event["id"] = int(line[4:])
+            elif line.startswith("event: "):
+                event["event"] = line[7:]
+            elif line.startswith("data: "):
+                event["data"] = json.loads(line[6:])
+    return events
+
+
+def test_job_lifecycle(service):
+    """测试提交任务、订阅事件、下载压缩包"""
+    base_url, stub = service
+    status, job = request(f"{base_url}/jobs", {"requirements": make_requirements("file-renamer")})
+    assert status == 202
+
+    events = read_events(base_url + job["events"])
+    kinds = [event["event"] for event in events]
+    assert kinds[0] == "status"
+    assert "planned" in kinds
+    assert "token" in kinds
+    assert "file_written" in kinds
+    assert events[-1]["data"]["status"] == "succeeded"
+
+    _, detail = request(f"{base_url}/jobs/{job['id']}")
+    assert detail["status"] == "succeeded"
+
+    with urllib.request.urlopen(base_url + detail["archive"], timeout=30) as response:
+        names = zipfile.ZipFile(io.BytesIO(response.read())).namelist()
+    assert "file-renamer/file_renamer/core.py" in names
+    assert stub.requests == 2
+
+
+def test_finished_job_drops_token_events(service):
+    """测试任务结束后只保留状态和文件事件，续传仍按事件序号进行"""
+    base_url, _ = service
+    _, job = request(f"{base_url}/jobs", {"requirements": make_requirements("file-renamer")})
+    live = read_events(base_url + job["events"])
+    assert "token" in [event["event"] for event in live]
+
+    replay = read_events(base_url + job["events"])
+    assert replay == [event for event in live if event["event"] != "token"]
+
+    planned = next(event for event in live if event["event"] == "planned")
+    resumed = read_events(base_url + job["events"], last_event_id=planned["id"])
+    assert resumed == [event for event in replay if event["id"] > planned["id"]]
+    assert resumed[-1]["data"]["status"] == "succeeded"
+
+
+def test_invalid_requirements_rejected(service):
+    """测试缺少字段的需求返回 400"""
+    base_url, _ = service
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        request(f"{base_url}/jobs", {"requirements": {"purpose": "x"}})
+    assert exc_info.value.code == 400
+
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        request(f"{base_url}/jobs", [])
+    assert exc_info.value.code == 400
+
+
+def test_unknown_job_returns_404(service):
+    """测试查询不存在的任务返回 404"""
+    base_url, _ = service
+    with pytest.raises(urllib.error.HTTPError) as exc_info:
+        request(f"{base_url}/jobs/deadbeef")
+    assert exc_info.value.code == 404
+
+
+def test_concurrent_load_latency(service):
+    """压测：并发提交任务，全部成功且 p99 延迟不超过排队轮数决定的上限"""
+    base_url, stub = service
+    total, clients = 24, 8
+
+    def run_job(i):
+        started_at = time.perf_counter()
+        _, job = request(f"{base_url}/jobs", {"requirements": make_requirements(f"load-{i}")})
+        events = read_events(base_url + job["events"])
+        return events[-1]["data"]["status"], time.perf_counter() - started_at
+
+    # 单个任务的服务时间：2 次 LLM 调用（首 token 延迟 + 逐片段输出）加本地的渲染、验证和打包。
+    # 本地部分受 GIL 限制，工作线程同时执行时最多放慢 WORKERS 倍
+    run_job("warmup")
+    llm_seconds = 2 * (stub.latency + stub.chunks * stub.token_delay)
+    local_seconds = max(0.0, min(run_job(f"solo-{i}")[1] for i in range(2)) - llm_seconds)
+    service_seconds = llm_seconds + WORKERS * local_seconds
+
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        results = list(pool.map(run_job, range(total)))
+
+    assert all(status == "succeeded" for status, _ in results)
+    latencies = [latency for _, latency in results]
+    # 8 个并发客户端、4 个工作线程：每个任务前面最多排一轮，再留一轮余量吸收调度抖动
+    rounds = math.ceil(clients / WORKERS) + 1
+    p99 = percentile(latencies, 99)
+    assert p99 <= rounds * service_seconds, f"p99 {p99:.2f}s 超过 {rounds} 轮服务时间 {service_seconds:.2f}s"